@@ -59,3 +59,17 @@ QCHAT_MESSAGE_TYPE_LIKE = "like"
 QCHAT_MESSAGE_TYPE_GEOJSON = "geojson"
 QCHAT_MESSAGE_TYPE_CRS = "crs"
 QCHAT_MESSAGE_TYPE_BBOX = "bbox"
+# envelope of a compressed message, see qchat_compression
+QCHAT_MESSAGE_TYPE_COMPRESSED = "compressed"
+# part of a message sent in chunks, see qchat_chunks
+QCHAT_MESSAGE_TYPE_CHUNK = "chunk"
+
+# local message types, never sent on the wire
+QCHAT_MESSAGE_TYPE_OVERSIZED = "oversized"
+QCHAT_MESSAGE_TYPE_ADMIN = "admin"
+
+# QChat instance capabilities, advertised in the instance rules
+QCHAT_RULE_BINARY_FRAMES = "binary_frames"
+QCHAT_RULE_COMPRESSION = "compression"
+QCHAT_RULE_MSGPACK = "msgpack"
+QCHAT_RULE_CHUNKS = "chunks"
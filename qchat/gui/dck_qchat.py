@@ -1,6 +1,4 @@
 # standard
-import base64
-import json
 import tempfile
 from functools import partial
 from pathlib import Path
@@ -11,16 +9,9 @@ from PyQt5 import QtWebSockets  # noqa QGS103
 from qgis.core import Qgis, QgsApplication, QgsJsonExporter, QgsMapLayer, QgsProject
 from qgis.gui import QgisInterface, QgsDockWidget
 from qgis.PyQt import uic
-from qgis.PyQt.QtCore import QPoint, Qt
+from qgis.PyQt.QtCore import QModelIndex, QPersistentModelIndex, QPoint, Qt
 from qgis.PyQt.QtGui import QCursor, QIcon
-from qgis.PyQt.QtWidgets import (
-    QAction,
-    QFileDialog,
-    QMenu,
-    QMessageBox,
-    QTreeWidgetItem,
-    QWidget,
-)
+from qgis.PyQt.QtWidgets import QAction, QFileDialog, QMenu, QMessageBox, QWidget
 
 from qchat.__about__ import __title__
 from qchat.constants import (
@@ -30,37 +21,62 @@ from qchat.constants import (
     CHEATCODE_IAMAROBOT,
     CHEATCODE_QGIS_PRO_LICENSE,
     CHEATCODES,
+    QCHAT_MESSAGE_TYPE_ADMIN,
     QCHAT_MESSAGE_TYPE_BBOX,
     QCHAT_MESSAGE_TYPE_CRS,
+    QCHAT_MESSAGE_TYPE_EXITER,
     QCHAT_MESSAGE_TYPE_GEOJSON,
     QCHAT_MESSAGE_TYPE_IMAGE,
     QCHAT_MESSAGE_TYPE_LIKE,
+    QCHAT_MESSAGE_TYPE_NB_USERS,
     QCHAT_MESSAGE_TYPE_NEWCOMER,
+    QCHAT_MESSAGE_TYPE_OVERSIZED,
     QCHAT_MESSAGE_TYPE_TEXT,
-    QCHAT_NICKNAME_MINLENGTH,
+    QCHAT_MESSAGE_TYPE_UNCOMPLIANT,
+    QCHAT_RULE_BINARY_FRAMES,
+    QCHAT_RULE_CHUNKS,
+    QCHAT_RULE_COMPRESSION,
+    QCHAT_RULE_MSGPACK,
 )
-from qchat.gui.qchat_tree_widget_items import (
+from qchat.gui.qchat_chat_model import QChatChatDelegate, QChatChatModel
+from qchat.gui.qchat_chat_rows import (
+    COLOR_ADMIN,
+    COLOR_MENTION,
+    COLOR_SELF,
     MESSAGE_COLUMN,
-    QChatAdminTreeWidgetItem,
-    QChatBboxTreeWidgetItem,
-    QChatCrsTreeWidgetItem,
-    QChatGeojsonTreeWidgetItem,
-    QChatImageTreeWidgetItem,
-    QChatTextTreeWidgetItem,
+    QChatAdminRow,
+    QChatBboxRow,
+    QChatChatRow,
+    QChatCrsRow,
+    QChatGeojsonRow,
+    QChatImageRow,
+    QChatOversizedRow,
+    QChatTextRow,
 )
+from qchat.gui.qchat_thumbnails import pixmap_cache
+from qchat.logic import qchat_json, qchat_msgpack
 from qchat.logic.qchat_api_client import QChatApiClient
+from qchat.logic.qchat_connection_manager import QChatConnectionManager
+from qchat.logic.qchat_connection_state import QChatConnectionState
+from qchat.logic.qchat_message_batcher import QChatMessageBatcher
 from qchat.logic.qchat_messages import (
+    QChatAdminMessage,
     QChatBboxMessage,
     QChatCrsMessage,
     QChatExiterMessage,
     QChatGeojsonMessage,
     QChatImageMessage,
     QChatLikeMessage,
+    QChatMessage,
     QChatNbUsersMessage,
     QChatNewcomerMessage,
+    QChatOversizedMessage,
     QChatTextMessage,
     QChatUncompliantMessage,
 )
+from qchat.logic.qchat_payload_guard import payload_limits_from_megabytes
+from qchat.logic.qchat_ui_scheduler import QChatUiScheduler
+from qchat.logic.qchat_validation import QChatRules, QChatValidationError
 from qchat.logic.qchat_websocket import QChatWebsocket
 from qchat.tasks.dizzy import DizzyTask
 
@@ -72,14 +88,17 @@ from qchat.toolbelt.preferences import PlgSettingsStructure
 # -- GLOBALS --
 MARKER_VALUE = "---"
 
+# rows inserted in the chat by each queued update of the view
+ROWS_PER_UPDATE = 50
+
 
 class QChatWidget(QgsDockWidget):
     initialized: bool = False
-    connected: bool = False
     current_room: Optional[str] = None
 
     qchat_client: QChatApiClient
-    qchat_ws: QChatWebsocket
+    connections: QChatConnectionManager
+    nickname: str = ""
 
     min_author_length: int
     max_author_length: int
@@ -122,22 +141,20 @@ class QChatWidget(QgsDockWidget):
         self.closed.connect(self.on_widget_closed)
 
         # connect signal listener
-        self.connected = False
         self.btn_connect.pressed.connect(self.on_connect_button_clicked)
         self.btn_connect.setIcon(QIcon(QgsApplication.iconPath("mIconConnect.svg")))
 
-        # tree widget initialization
-        self.twg_chat.setHeaderLabels(
-            [
-                self.tr("Date"),
-                self.tr("Nickname"),
-                self.tr("Message"),
-            ]
-        )
-        self.twg_chat.itemClicked.connect(self.on_message_clicked)
-        self.twg_chat.itemDoubleClicked.connect(self.on_message_double_clicked)
-        self.twg_chat.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.twg_chat.customContextMenuRequested.connect(
+        # chat view initialization, over a model of lightweight rows
+        self.chat_model = QChatChatModel(self)
+        self.tvw_chat.setModel(self.chat_model)
+        self.tvw_chat.setItemDelegate(QChatChatDelegate(self.tvw_chat))
+        self.chat_model.rowsInserted.connect(self.update_history_memory)
+        self.chat_model.rowsRemoved.connect(self.update_history_memory)
+        self.chat_model.modelReset.connect(self.update_history_memory)
+        self.tvw_chat.clicked.connect(self.on_message_clicked)
+        self.tvw_chat.doubleClicked.connect(self.on_message_double_clicked)
+        self.tvw_chat.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.tvw_chat.customContextMenuRequested.connect(
             self.on_custom_context_menu_requested
         )
 
@@ -155,25 +172,47 @@ class QChatWidget(QgsDockWidget):
             QIcon(QgsApplication.iconPath("mActionDeleteSelectedFeatures.svg"))
         )
 
-        # initialize websocket client
-        self.qchat_ws = QChatWebsocket()
-        self.qchat_ws.error.connect(self.on_ws_error)
-        self.qchat_ws.uncompliant_message_received.connect(
-            self.on_uncompliant_message_received
-        )
-        self.qchat_ws.text_message_received.connect(self.on_text_message_received)
-        self.qchat_ws.image_message_received.connect(self.on_image_message_received)
-        self.qchat_ws.nb_users_message_received.connect(
-            self.on_nb_users_message_received
-        )
-        self.qchat_ws.newcomer_message_received.connect(
-            self.on_newcomer_message_received
-        )
-        self.qchat_ws.exiter_message_received.connect(self.on_exiter_message_received)
-        self.qchat_ws.like_message_received.connect(self.on_like_message_received)
-        self.qchat_ws.geojson_message_received.connect(self.on_geojson_message_received)
-        self.qchat_ws.crs_message_received.connect(self.on_crs_message_received)
-        self.qchat_ws.bbox_message_received.connect(self.on_bbox_message_received)
+        # websockets of the open rooms, the current one being displayed
+        self.connections = QChatConnectionManager(parent=self)
+        self.connections.configure = self.configure_connection
+        self.connections.connected.connect(self.on_ws_connected)
+        self.connections.disconnected.connect(self.on_ws_disconnected)
+        self.connections.error.connect(self.on_ws_error)
+        self.connections.reconnect_scheduled.connect(self.on_ws_reconnect_scheduled)
+        self.connections.reconnected.connect(self.on_ws_reconnected)
+        self.connections.status_changed.connect(self.on_ws_status_changed)
+        self.connections.transfer_progress.connect(self.on_transfer_progress)
+        # rules of the instance, applied to the websocket of each room
+        self.instance_rules: dict = {}
+        self.nb_users: Optional[int] = None
+        # chunks done and chunks count of the ongoing chunked transfers, by id
+        self.transfers: dict[str, tuple[int, int]] = {}
+
+        # received messages are handled in batches, coalescing bursts
+        self.message_handlers = {
+            QCHAT_MESSAGE_TYPE_UNCOMPLIANT: self.on_uncompliant_message_received,
+            QCHAT_MESSAGE_TYPE_TEXT: self.on_text_message_received,
+            QCHAT_MESSAGE_TYPE_IMAGE: self.on_image_message_received,
+            QCHAT_MESSAGE_TYPE_NB_USERS: self.on_nb_users_message_received,
+            QCHAT_MESSAGE_TYPE_NEWCOMER: self.on_newcomer_message_received,
+            QCHAT_MESSAGE_TYPE_EXITER: self.on_exiter_message_received,
+            QCHAT_MESSAGE_TYPE_LIKE: self.on_like_message_received,
+            QCHAT_MESSAGE_TYPE_GEOJSON: self.on_geojson_message_received,
+            QCHAT_MESSAGE_TYPE_CRS: self.on_crs_message_received,
+            QCHAT_MESSAGE_TYPE_BBOX: self.on_bbox_message_received,
+            QCHAT_MESSAGE_TYPE_OVERSIZED: self.on_oversized_message_received,
+            QCHAT_MESSAGE_TYPE_ADMIN: self.on_admin_message_received,
+        }
+        self.in_batch = False
+        # rows of the current batch, inserted at once at its end
+        self.batch_rows: list[QChatChatRow] = []
+        # True while the history of a room is displayed again, not to notify twice
+        self.replaying = False
+        self.message_batcher = QChatMessageBatcher(parent=self)
+        self.message_batcher.batch_ready.connect(self.on_messages_batch_received)
+        # insertions, scrolls and title updates, run frame by frame
+        self.ui_scheduler = QChatUiScheduler(parent=self)
+        self.connections.message_received.connect(self.on_room_message_received)
 
         # send message signal listener
         self.lne_message.returnPressed.connect(self.on_send_button_clicked)
@@ -210,6 +249,17 @@ class QChatWidget(QgsDockWidget):
     def settings(self) -> PlgSettingsStructure:
         return self.plg_settings.get_plg_settings()
 
+    @property
+    def qchat_ws(self) -> Optional[QChatWebsocket]:
+        """
+        Websocket of the room displayed in the chat, None if it is not open
+        """
+        return self.connections.connection(self.current_room)
+
+    @property
+    def connected(self) -> bool:
+        return self.connections.is_connected(self.current_room)
+
     def load_settings(self) -> None:
         """Load options from QgsSettings into UI form."""
         self.grb_instance.setTitle(
@@ -221,6 +271,18 @@ class QChatWidget(QgsDockWidget):
         self.btn_send.setIcon(
             QIcon(QgsApplication.iconPath(self.settings.author_avatar))
         )
+        # shared with the authors of received messages, compared to each of them
+        self.nickname = self.connections.string_table.intern(
+            self.settings.author_nickname
+        )
+        self.chat_model.show_avatars = self.settings.qchat_show_avatars
+        self.chat_model.set_colors(
+            {
+                COLOR_ADMIN: self.settings.qchat_color_admin,
+                COLOR_MENTION: self.settings.qchat_color_mention,
+                COLOR_SELF: self.settings.qchat_color_self,
+            }
+        )
 
     def on_widget_opened(self) -> None:
         """
@@ -243,10 +305,16 @@ class QChatWidget(QgsDockWidget):
             rules = self.qchat_client.get_rules()
             self.min_author_length = rules["min_author_length"]
             self.max_author_length = rules["max_author_length"]
+            # cached to configure the websocket of each room
+            self.instance_rules = rules
         except Exception as exc:
             self.iface.messageBar().pushCritical(self.tr("QChat error"), str(exc))
             self.min_author_length = 3
             self.max_author_length = 32
+            self.instance_rules = {}
+
+        # decoding, batching and size limits of incoming messages
+        self.apply_performance_settings()
 
         # clear rooms combobox items
         self.cbb_room.clear()  # delete all items from comboBox
@@ -317,7 +385,11 @@ Max nickname length: {max_nickname_length}"""
 
 Rooms:
 
-{rooms_status}"""
+{rooms_status}
+
+Diagnostics:
+
+{diagnostics}"""
             ).format(
                 status=status["status"],
                 rooms_status="\n".join(
@@ -326,11 +398,180 @@ Rooms:
                         for r in status["rooms"]
                     ]
                 ),
+                diagnostics="\n".join(
+                    f"- {label}: {value}" for label, value in self.diagnostics()
+                ),
             )
             QMessageBox.information(self, self.tr("QChat instance status"), text)
         except Exception as exc:
             self.log(message=str(exc), log_level=Qgis.Critical)
 
+    def diagnostics(self) -> list[tuple[str, str]]:
+        """
+        Returns client side diagnostics as (label, value) tuples
+        The websocket diagnostics are those of the room displayed in the chat
+        """
+        rows = [
+            (
+                self.tr("Open rooms"),
+                self.tr(
+                    "{open} of {max} ({evicted} closed to open others), "
+                    "{messages} messages in history"
+                ).format(
+                    open=len(self.connections.rooms),
+                    max=self.connections.max_rooms,
+                    evicted=self.connections.evicted_total,
+                    messages=self.connections.history_total,
+                ),
+            ),
+            (
+                self.tr("History memory"),
+                self.tr(
+                    "{chat:.1f} MB displayed, {rooms:.1f} MB in the open rooms, "
+                    "up to {max} MB per room ({evicted} messages evicted)"
+                ).format(
+                    chat=self.chat_model.nbytes / 1024 / 1024,
+                    rooms=self.connections.history_bytes / 1024 / 1024,
+                    max=self.connections.history_max_bytes // 1024 // 1024,
+                    evicted=self.connections.history_dropped_total
+                    + self.chat_model.evicted_total,
+                ),
+            ),
+            (
+                self.tr("Chat view updates"),
+                self.tr(
+                    "{tasks} run, {coalesced} coalesced, {carried} frames over budget, "
+                    "frame time {frame}"
+                ).format(
+                    tasks=self.ui_scheduler.queue.tasks_total,
+                    coalesced=self.ui_scheduler.queue.coalesced_total,
+                    carried=self.ui_scheduler.queue.carried_over_total,
+                    frame=self.ui_scheduler.queue.frame_stats.summary(factor=1000),
+                ),
+            ),
+            (
+                self.tr("Decoded images cache"),
+                self.tr(
+                    "{count} images, {size:.1f} of {max} MB, {hit_rate:.0%} hits"
+                ).format(
+                    count=len(pixmap_cache),
+                    size=pixmap_cache.nbytes / 1024 / 1024,
+                    max=pixmap_cache.max_bytes // 1024 // 1024,
+                    hit_rate=pixmap_cache.hit_rate,
+                ),
+            ),
+        ]
+        if self.qchat_ws is None:
+            return rows
+        return rows + [
+            (
+                self.tr("GUI stall time per received message"),
+                self.qchat_ws.gui_stall_stats.summary(factor=1000),
+            ),
+            (
+                self.tr("Background decoding"),
+                (
+                    self.tr("enabled")
+                    if self.qchat_ws.threaded_decoding
+                    else self.tr("disabled")
+                ),
+            ),
+            (
+                self.tr("Serialisation"),
+                (
+                    "MessagePack"
+                    if self.qchat_ws.msgpack_enabled
+                    else f"JSON ({qchat_json.get_codec().name})"
+                ),
+            ),
+            (
+                self.tr("Compression of large payloads"),
+                (
+                    self.tr("above {size} KB").format(
+                        size=self.qchat_ws.compression_threshold // 1024
+                    )
+                    if self.qchat_ws.compression_active
+                    else self.tr("disabled")
+                ),
+            ),
+            (
+                self.tr("Round-trip time"),
+                self.qchat_ws.heartbeat.rtt_stats.summary(),
+            ),
+            (
+                self.tr("Dead connections detected"),
+                str(self.qchat_ws.heartbeat.dead_total),
+            ),
+            (
+                self.tr("Shared author and avatar strings"),
+                self.tr("{count} strings, reused {hits} times").format(
+                    count=len(self.qchat_ws.string_table),
+                    hits=self.qchat_ws.string_table.hits,
+                ),
+            ),
+            (
+                self.tr("Duplicate messages dropped"),
+                str(self.qchat_ws.duplicates_total),
+            ),
+            (
+                self.tr("Outgoing queue"),
+                self.tr("{depth} queued ({size} bytes), {sent} sent").format(
+                    depth=self.qchat_ws.send_queue.depth,
+                    size=self.qchat_ws.send_queue.queued_bytes,
+                    sent=self.qchat_ws.send_queue.sent_total,
+                ),
+            ),
+            (
+                self.tr("Messages rejected before sending"),
+                self.tr("{rejected} rejected, {split} split").format(
+                    rejected=self.qchat_ws.validator.rejected_total,
+                    split=self.qchat_ws.validator.split_total,
+                ),
+            ),
+            (
+                self.tr("Chunked transfers received"),
+                self.tr("{completed} completed, {dropped} dropped").format(
+                    completed=self.qchat_ws.chunk_reassembler.completed_total,
+                    dropped=self.qchat_ws.chunk_reassembler.dropped_total,
+                ),
+            ),
+            (
+                self.tr("Reconnections"),
+                self.tr("{ok} succeeded, {attempts} attempts").format(
+                    ok=self.qchat_ws.reconnections_total,
+                    attempts=self.qchat_ws.reconnect_attempts_total,
+                ),
+            ),
+            (
+                self.tr("Connection state"),
+                self.tr(
+                    "{state} for {duration:.1f} s, {transitions} transitions"
+                ).format(
+                    state=self.qchat_ws.state.value,
+                    duration=self.qchat_ws.state_machine.time_in_state,
+                    transitions=self.qchat_ws.state_machine.transitions_total,
+                ),
+            ),
+            (
+                self.tr("Handshake time"),
+                self.qchat_ws.state_machine.stats(
+                    QChatConnectionState.CONNECTING, QChatConnectionState.OPEN
+                ).summary(factor=1000),
+            ),
+            (
+                self.tr("Wait before reconnecting"),
+                self.qchat_ws.state_machine.stats(
+                    QChatConnectionState.BACKOFF, QChatConnectionState.CONNECTING
+                ).summary(unit="s"),
+            ),
+            (
+                self.tr("Closing time"),
+                self.qchat_ws.state_machine.stats(
+                    QChatConnectionState.CLOSING, QChatConnectionState.IDLE
+                ).summary(factor=1000),
+            ),
+        ]
+
     def on_settings_button_clicked(self) -> None:
         """
         Action called when clicking on "Settings" button
@@ -344,14 +585,74 @@ Rooms:
         new_instance = self.settings.qchat_instance_uri
         new_nickname = self.settings.author_nickname
 
-        # disconnect if instance or nickname have changed
+        # disconnect from all rooms if instance or nickname have changed
         if old_instance != new_instance or old_nickname != new_nickname:
-            self.disconnect_from_room(log=self.connected, close_ws=self.connected)
             self.on_widget_closed()
             self.on_widget_opened()
 
         # reload settings
         self.load_settings()
+        if self.initialized:
+            self.apply_performance_settings()
+
+    def apply_performance_settings(self) -> None:
+        """
+        Applies the settings of the handling of incoming messages
+        and of the open rooms
+        """
+        settings = self.settings
+        self.message_batcher.set_window(settings.qchat_batch_window_ms)
+        self.ui_scheduler.set_budget(settings.qchat_frame_budget_ms)
+        self.connections.max_rooms = settings.qchat_max_open_rooms
+        self.connections.history_size = settings.qchat_room_history_size
+        self.connections.history_max_bytes = settings.qchat_history_max_mb * 1024 * 1024
+        self.connections.history_heavy_first = settings.qchat_history_evict_heavy_first
+        self.connections.reconfigure()
+        self.chat_model.set_limits(
+            self.connections.history_size,
+            self.connections.history_max_bytes,
+            self.connections.history_heavy_first,
+        )
+        pixmap_cache.set_max_bytes(settings.qchat_image_cache_mb * 1024 * 1024)
+        self.update_history_memory()
+
+    def configure_connection(self, qchat_ws: QChatWebsocket) -> None:
+        """
+        Applies the settings and the cached instance rules to the websocket of a room
+        """
+        settings = self.settings
+        rules = self.instance_rules
+        qchat_ws.set_threaded_decoding(settings.qchat_threaded_decoding)
+        guard = qchat_ws.payload_guard
+        guard.limits = payload_limits_from_megabytes(
+            settings.qchat_max_image_size_mb, settings.qchat_max_layer_size_mb
+        )
+        guard.spill = settings.qchat_spill_oversized_payloads
+        qchat_ws.auto_reconnect = settings.qchat_reconnect_on_connection_lost
+        qchat_ws.backoff.max_delay = settings.qchat_reconnect_max_delay_s
+        qchat_ws.set_heartbeat(
+            settings.qchat_ping_interval_s, settings.qchat_ping_max_missed
+        )
+        qchat_ws.send_queue.set_rates(
+            settings.qchat_send_rate_messages, settings.qchat_send_rate_kbytes * 1024
+        )
+        # to validate outgoing messages
+        qchat_ws.validator.rules = QChatRules.from_dict(rules)
+        qchat_ws.chunks_enabled = bool(rules.get(QCHAT_RULE_CHUNKS, False))
+        qchat_ws.chunk_size = settings.qchat_chunk_size_kb * 1024
+        # binary frames are only used if the instance advertises them
+        qchat_ws.binary_frames_enabled = bool(
+            rules.get(QCHAT_RULE_BINARY_FRAMES, False)
+        )
+        # so are compressed messages
+        qchat_ws.set_compression(
+            bool(rules.get(QCHAT_RULE_COMPRESSION, False)),
+            settings.qchat_compression_threshold_kb * 1024,
+        )
+        # and MessagePack, if installed
+        qchat_ws.msgpack_enabled = qchat_msgpack.is_available() and bool(
+            rules.get(QCHAT_RULE_MSGPACK, False)
+        )
 
     def on_room_changed(self) -> None:
         """
@@ -374,18 +675,18 @@ Rooms:
                 button_connect=self.on_settings_button_clicked,
             )
             return
-        old_room = self.current_room
         new_room = self.cbb_room.currentText()
-        old_is_marker = old_room != MARKER_VALUE
         if new_room == MARKER_VALUE:
             if self.connected:
-                self.disconnect_from_room(log=old_is_marker, close_ws=old_is_marker)
+                self.disconnect_from_room()
             self.current_room = MARKER_VALUE
+            self.connections.view(MARKER_VALUE)
             return
-        if self.connected:
-            self.disconnect_from_room(log=old_is_marker, close_ws=old_is_marker)
-        self.connect_to_room(new_room)
-        self.current_room = new_room
+        if self.connections.connection(new_room) is None:
+            self.connect_to_room(new_room)
+        else:
+            # the room is already open in the background: only the view changes
+            self.show_room(new_room)
 
         # write new room value to auto-reconnect room in settings if needed
         settings = self.settings
@@ -425,42 +726,77 @@ Rooms:
     def connect_to_room(self, room: str) -> None:
         """
         Connect widget to a specific room
+        The rooms already open stay connected in the background
         """
-        self.qchat_ws.open(self.settings.qchat_instance_uri, room)
-        self.qchat_ws.connected.connect(partial(self.on_ws_connected, room))
+        self.show_room(room)
+        self.connections.open(self.settings.qchat_instance_uri, room)
 
-    def on_ws_connected(self, room: str) -> None:
+    def show_room(self, room: str) -> None:
         """
-        Action called when websocket is connected to a room
+        Displays a room in the chat, replaying the history kept for it
         """
-        self.btn_connect.setText(self.tr("Disconnect"))
-        self.btn_list_users.setEnabled(True)
-        self.grb_user.setEnabled(True)
         self.current_room = room
+        self.connections.view(room)
+        self.message_batcher.clear()
+        self.transfers.clear()
+        self.ui_scheduler.clear()
+        self.chat_model.clear()
+        history = self.connections.history(room)
+        self.nb_users = history.nb_users if history else None
+        if history:
+            self.replaying = True
+            try:
+                self.on_messages_batch_received(list(history))
+            finally:
+                self.replaying = False
+        self.update_connection_widgets()
+        self.update_title()
+
+    def update_connection_widgets(self) -> None:
+        """
+        Enables the widgets matching the connection state of the current room
+        """
+        connected = self.connected
+        self.btn_connect.setText(
+            self.tr("Disconnect") if connected else self.tr("Connect")
+        )
+        self.btn_list_users.setEnabled(connected)
+        self.grb_user.setEnabled(connected)
+        self.grb_qchat.setTitle(self.tr("QChat"))
 
-        # write new room value to auto-reconnect room in settings if needed
-        settings = self.settings
-        if settings.qchat_auto_reconnect:
-            settings.qchat_auto_reconnect_room = room
-            self.plg_settings.save_from_object(settings)
+    def on_ws_connected(self, room: str, reconnected: bool = False) -> None:
+        """
+        Action called when websocket is connected to a room
+        :param reconnected: True after an automatic reconnection, the chat is kept
+        """
+        if room == self.current_room:
+            self.update_connection_widgets()
+            self.update_title()
 
-        self.connected = True
-        self.twg_chat.clear()
-        if self.settings.qchat_display_admin_messages:
-            self.add_admin_message(
-                self.tr("Connected to room '{room}'").format(room=room)
-            )
+            # write new room value to auto-reconnect room in settings if needed
+            settings = self.settings
+            if settings.qchat_auto_reconnect:
+                settings.qchat_auto_reconnect_room = room
+                self.plg_settings.save_from_object(settings)
+
+            if self.settings.qchat_display_admin_messages:
+                if reconnected:
+                    text = self.tr("Reconnected to room '{room}'").format(room=room)
+                else:
+                    text = self.tr("Connected to room '{room}'").format(room=room)
+                self.add_admin_message(text)
 
         # send newcomer message to websocket
         if not self.settings.qchat_incognito_mode:
             message = QChatNewcomerMessage(
                 type=QCHAT_MESSAGE_TYPE_NEWCOMER, newcomer=self.settings.author_nickname
             )
-            self.qchat_ws.send_message(message)
+            self.send_message(message, room)
 
-    def disconnect_from_room(self, log: bool = True, close_ws: bool = True) -> None:
+    def disconnect_from_room(self, log: bool = True) -> None:
         """
         Disconnect widget from the current room
+        The other open rooms stay connected
         """
         if log and self.settings.qchat_display_admin_messages:
             self.add_admin_message(
@@ -468,35 +804,112 @@ Rooms:
                     room=self.current_room
                 ),
             )
-        self.btn_connect.setText(self.tr("Connect"))
-        self.grb_qchat.setTitle(self.tr("QChat"))
-        self.btn_list_users.setEnabled(False)
-        self.grb_user.setEnabled(False)
-        self.connected = False
-        if close_ws:
-            self.qchat_ws.connected.disconnect()
-            self.qchat_ws.close()
+        self.connections.close(self.current_room)
+        self.nb_users = None
+        self.transfers.clear()
+        self.message_batcher.clear()
+        self.update_connection_widgets()
 
-    def on_ws_disconnected(self) -> None:
+    def on_ws_disconnected(self, room: str) -> None:
         """
-        Action called when websocket is disconnected
+        Action called when the websocket of a room is disconnected for good
         """
-        self.connected = False
-        self.log(message="Websocket disconnected")
+        self.log(message=f"Websocket disconnected from room '{room}'")
+        if room != self.current_room:
+            return
+        self.nb_users = None
+        self.transfers.clear()
+        self.update_connection_widgets()
 
-    def on_ws_error(self, error_code: int) -> None:
+    def on_ws_reconnect_scheduled(self, room: str, attempt: int, delay: float) -> None:
         """
-        Action called when an error appears on the websocket
+        Action called when the connection to a room has been lost and will be retried
         """
-        if self.settings.qchat_display_admin_messages:
-            self.add_admin_message(self.qchat_ws.error_string())
+        text = self.tr(
+            "Connection lost, reconnecting in {delay:.1f}s (attempt {attempt})"
+        ).format(delay=delay, attempt=attempt)
+        if room == self.current_room:
+            self.grb_qchat.setTitle(
+                self.tr("QChat - room: {room} - reconnecting...").format(room=room)
+            )
+            if self.settings.qchat_display_admin_messages:
+                self.add_admin_message(text)
+        self.log(message=f"{room}: {text}", log_level=Qgis.Warning)
+
+    def on_ws_reconnected(self, room: str) -> None:
+        """
+        Action called when the websocket of a room is reconnected
+        Restores the state set up on connection, keeping the chat content
+        """
+        self.on_ws_connected(room, reconnected=True)
+
+    def on_ws_status_changed(self, room: str) -> None:
+        """
+        Action called when the round-trip time or the outgoing queue of a room change
+        """
+        if room == self.current_room:
+            self.update_title()
+
+    def on_ws_error(self, room: str, error_code: int) -> None:
+        """
+        Action called when an error appears on the websocket of a room
+        """
+        qchat_ws = self.connections.connection(room)
+        if qchat_ws is None:
+            return
+        if room == self.current_room and self.settings.qchat_display_admin_messages:
+            self.add_admin_message(qchat_ws.error_string())
         self.log(
-            message=f"{error_code}: {self.qchat_ws.error_string()}",
+            message=f"{room} - {error_code}: {qchat_ws.error_string()}",
             log_level=Qgis.Critical,
         )
 
     # region websocket message received
 
+    def on_room_message_received(self, room: str, message: QChatMessage) -> None:
+        """
+        Launched when a message has been received in any open room
+        Messages of the current room are displayed, those of the other rooms
+        are only kept in their history, mentions and likes being notified
+        """
+        if room == self.current_room:
+            self.message_batcher.add(message)
+            return
+        if message.type == QCHAT_MESSAGE_TYPE_TEXT:
+            self.notify_mention(message, room)
+        elif message.type == QCHAT_MESSAGE_TYPE_LIKE:
+            self.on_like_message_received(message)
+        elif message.type == QCHAT_MESSAGE_TYPE_UNCOMPLIANT:
+            self.on_uncompliant_message_received(message)
+        self.update_title()
+        self.update_history_memory()
+
+    def on_messages_batch_received(self, messages: list[QChatMessage]) -> None:
+        """
+        Launched when a batch of messages has been received from the websocket
+        Items are inserted in a single pass, with a single repaint and scroll
+        """
+        # only the last users count of the batch is worth displaying
+        last_nb_users = None
+        for message in messages:
+            if message.type == QCHAT_MESSAGE_TYPE_NB_USERS:
+                last_nb_users = message
+
+        self.in_batch = True
+        self.batch_rows = []
+        try:
+            for message in messages:
+                if message.type == QCHAT_MESSAGE_TYPE_NB_USERS:
+                    if message is not last_nb_users:
+                        continue
+                handler = self.message_handlers.get(message.type)
+                if handler:
+                    handler(message)
+        finally:
+            self.in_batch = False
+            rows, self.batch_rows = self.batch_rows, []
+            self.add_chat_rows(rows)
+
     def on_uncompliant_message_received(self, message: QChatUncompliantMessage) -> None:
         self.log(
             message=self.tr("Uncompliant message: {reason}").format(
@@ -513,7 +926,7 @@ Rooms:
         Launched when a text message is received from the websocket
         """
         # check if a cheatcode is activated
-        if self.settings.qchat_activate_cheatcode:
+        if self.settings.qchat_activate_cheatcode and not self.replaying:
             activated = self.check_cheatcode(message.text)
             if activated:
                 return
@@ -522,61 +935,151 @@ Rooms:
         if message.text in CHEATCODES:
             return
 
-        item = QChatTextTreeWidgetItem(self.twg_chat, message)
+        row = QChatTextRow(message, self.nickname)
+        if not self.replaying:
+            self.notify_mention(message)
+        self.add_chat_row(row)
 
-        # check if message mentions current user
+    def notify_mention(self, message: QChatTextMessage, room: str = None) -> None:
+        """
+        Notifies the user if a text message mentions them
+        :param room: room of the message, if it is not the current room
+        """
         words = message.text.split(" ")
-        if f"@{self.settings.author_nickname}" in words or "@all" in words:
-            if message.author != self.settings.author_nickname:
-                self.log(
-                    message=self.tr(
-                        "You were mentionned by {sender}: {message}"
-                    ).format(sender=message.author, message=message.text),
-                    application=self.tr("QChat"),
-                    log_level=Qgis.Info,
-                    push=self.settings.notify_push_info,
-                    duration=self.settings.notify_push_duration,
-                )
-
-                # check if a notification sound should be played
-                if self.settings.qchat_play_sounds:
-                    play_resource_sound(
-                        self.settings.qchat_ring_tone, self.settings.qchat_sound_volume
-                    )
+        if f"@{self.nickname}" not in words and "@all" not in words:
+            return
+        if message.author == self.nickname:
+            return
+        if room is None:
+            text = self.tr("You were mentionned by {sender}: {message}").format(
+                sender=message.author, message=message.text
+            )
+        else:
+            text = self.tr(
+                "You were mentionned by {sender} in room '{room}': {message}"
+            ).format(sender=message.author, room=room, message=message.text)
+        self.log(
+            message=text,
+            application=self.tr("QChat"),
+            log_level=Qgis.Info,
+            push=self.settings.notify_push_info,
+            duration=self.settings.notify_push_duration,
+        )
 
-        self.add_tree_widget_item(item)
+        # check if a notification sound should be played
+        if self.settings.qchat_play_sounds:
+            play_resource_sound(
+                self.settings.qchat_ring_tone, self.settings.qchat_sound_volume
+            )
 
     def on_image_message_received(self, message: QChatImageMessage) -> None:
         """
         Launched when an image message is received from the websocket
         """
-        item = QChatImageTreeWidgetItem(self.twg_chat, message)
-        self.add_tree_widget_item(item)
+        self.add_chat_row(QChatImageRow(message, self.nickname))
 
     def on_nb_users_message_received(self, message: QChatNbUsersMessage) -> None:
         """
         Launched when a nb_users message is received from the websocket
         """
-        self.grb_qchat.setTitle(
-            self.tr("QChat - room: {room} - {nb_users} {user_txt}").format(
-                room=self.current_room,
-                nb_users=message.nb_users,
-                user_txt=self.tr("user") if message.nb_users <= 1 else self.tr("users"),
+        self.nb_users = message.nb_users
+        self.update_title()
+
+    def update_title(self) -> None:
+        """
+        Updates the title at the end of the next frame, once per frame
+        """
+        self.ui_scheduler.post_coalesced("title", self.refresh_title)
+
+    def refresh_title(self) -> None:
+        """
+        Displays the room, its number of users, the smoothed round-trip time,
+        the outgoing messages waiting to be sent and the unread messages
+        of the other rooms
+        """
+        qchat_ws = self.qchat_ws
+        if self.nb_users is None or qchat_ws is None:
+            return
+        title = self.tr("QChat - room: {room} - {nb_users} {user_txt}").format(
+            room=self.current_room,
+            nb_users=self.nb_users,
+            user_txt=self.tr("user") if self.nb_users <= 1 else self.tr("users"),
+        )
+        rtt = qchat_ws.heartbeat.smoothed_rtt
+        if rtt is not None:
+            title += self.tr(" - RTT {rtt:.0f} ms").format(rtt=rtt)
+        send_queue = qchat_ws.send_queue
+        if send_queue.depth:
+            title += self.tr(" - sending {depth} ({size:.1f} MB)").format(
+                depth=send_queue.depth, size=send_queue.queued_bytes / 1024 / 1024
+            )
+        if self.transfers:
+            done = sum(done for done, _ in self.transfers.values())
+            count = sum(count for _, count in self.transfers.values())
+            title += self.tr(" - transfers {progress:.0%}").format(
+                progress=done / count
+            )
+        unread = self.connections.unread_total
+        if unread:
+            title += self.tr(" - {unread} unread in other rooms").format(unread=unread)
+        self.grb_qchat.setTitle(title)
+
+    def update_history_memory(self, *args) -> None:
+        """
+        Updates the memory label at the end of the next frame, once per frame
+        """
+        self.ui_scheduler.post_coalesced("history_memory", self.refresh_history_memory)
+
+    def refresh_history_memory(self) -> None:
+        """
+        Displays the approximate memory held by the chat and by the room histories
+        """
+        self.lbl_history_memory.setText(
+            self.tr("History: {chat:.1f} MB").format(
+                chat=self.chat_model.nbytes / 1024 / 1024
+            )
+        )
+        self.lbl_history_memory.setToolTip(
+            self.tr(
+                "{rows} messages displayed, {messages} messages and {rooms:.1f} MB "
+                "kept in the histories of the open rooms"
+            ).format(
+                rows=self.chat_model.rowCount(),
+                messages=self.connections.history_total,
+                rooms=self.connections.history_bytes / 1024 / 1024,
             )
         )
 
+    def on_transfer_progress(
+        self, room: str, transfer_id: str, done: int, count: int
+    ) -> None:
+        """
+        Launched when chunks of a chunked transfer are sent or received
+        Only the transfers of the current room are displayed
+        :param done: number of chunks sent or received
+        :param count: number of chunks of the transfer, 0 if it has been dropped
+        """
+        if room != self.current_room:
+            return
+        if done >= count:
+            self.transfers.pop(transfer_id, None)
+        else:
+            self.transfers[transfer_id] = (done, count)
+        self.update_title()
+
     def on_newcomer_message_received(self, message: QChatNewcomerMessage) -> None:
         """
         Launched when a newcomer message is received from the websocket
         """
         if (
             self.settings.qchat_display_admin_messages
-            and message.newcomer != self.settings.author_nickname
+            and message.newcomer != self.nickname
         ):
             self.add_admin_message(
                 self.tr("{newcomer} has joined the room").format(
                     newcomer=message.newcomer
-                )
+                ),
+                source=message,
             )
 
     def on_exiter_message_received(self, message: QChatExiterMessage) -> None:
@@ -585,17 +1088,20 @@ Rooms:
         """
         if (
             self.settings.qchat_display_admin_messages
-            and message.exiter != self.settings.author_nickname
+            and message.exiter != self.nickname
         ):
             self.add_admin_message(
-                self.tr("{exiter} has left the room").format(exiter=message.exiter)
+                self.tr("{exiter} has left the room").format(exiter=message.exiter),
+                source=message,
             )
 
     def on_like_message_received(self, message: QChatLikeMessage) -> None:
         """
         Launched when a like message is received from the websocket
         """
-        if message.liked_author == self.settings.author_nickname:
+        if self.replaying:
+            return
+        if message.liked_author == self.nickname:
             self.log(
                 message=self.tr("{liker_author} liked your message: {message}").format(
                     liker_author=message.liker_author, message=message.message
@@ -615,38 +1121,72 @@ Rooms:
         """
         Launched when a geojson message is received from the websocket
         """
-        item = QChatGeojsonTreeWidgetItem(self.twg_chat, message)
-        self.add_tree_widget_item(item)
+        self.add_chat_row(QChatGeojsonRow(message, self.nickname))
 
     def on_crs_message_received(self, message: QChatCrsMessage) -> None:
         """
         Launched when a CRS message is received from the websocket
         """
-        item = QChatCrsTreeWidgetItem(self.twg_chat, message)
-        self.add_tree_widget_item(item)
+        self.add_chat_row(QChatCrsRow(message, self.nickname))
 
     def on_bbox_message_received(self, message: QChatBboxMessage) -> None:
         """
         Launched when a BBOX message is received from the websocket
         """
-        item = QChatBboxTreeWidgetItem(self.twg_chat, message, self.iface.mapCanvas())
-        self.add_tree_widget_item(item)
+        self.add_chat_row(QChatBboxRow(message, self.nickname, self.iface.mapCanvas()))
+
+    def on_oversized_message_received(self, message: QChatOversizedMessage) -> None:
+        """
+        Launched when a received frame exceeds the size limits
+        """
+        self.add_chat_row(QChatOversizedRow(message, self.on_load_oversized_message))
+
+    def on_load_oversized_message(self, message: QChatOversizedMessage) -> None:
+        """
+        Decodes and displays an oversized message, on user request
+        """
+        if self.qchat_ws is None:
+            return
+        QgsApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            self.qchat_ws.load_oversized_message(message)
+        except OSError as exc:
+            self.log(
+                message=self.tr("Could not load the message: {error}").format(
+                    error=exc
+                ),
+                application=self.tr("QChat"),
+                log_level=Qgis.Critical,
+                push=self.settings.notify_push_info,
+                duration=self.settings.notify_push_duration,
+            )
+        finally:
+            QgsApplication.restoreOverrideCursor()
 
     # endregion
 
-    def on_message_clicked(self, item: QTreeWidgetItem, column: int) -> None:
+    def on_message_clicked(self, index: QModelIndex) -> None:
         """
         Action called when clicking on a chat message
         """
-        item.on_click(column)
+        row = self.chat_model.row(index)
+        if row:
+            row.on_click(index.column(), self)
 
-    def on_message_double_clicked(self, item: QTreeWidgetItem, column: int) -> None:
+    def on_message_double_clicked(self, index: QModelIndex) -> None:
         """
         Action called when double clicking on a chat message
         """
-        author = item.author
+        row = self.chat_model.row(index)
+        if row:
+            self.mention_author(row.author)
+
+    def mention_author(self, author: str) -> None:
+        """
+        Adds a mention of the author of a message to the message being written
+        """
         # do nothing if double click on admin message
-        if author == ADMIN_MESSAGES_NICKNAME or author == self.settings.author_nickname:
+        if author == ADMIN_MESSAGES_NICKNAME or author == self.nickname:
             return
         text = self.lne_message.text()
         self.lne_message.setText(f"{text}@{author} ")
@@ -663,74 +1203,79 @@ Rooms:
             liked_author=liked_author,
             message=msg,
         )
-        self.qchat_ws.send_message(message)
+        self.send_message(message)
 
     def on_custom_context_menu_requested(self, point: QPoint) -> None:
         """
         Action called when right clicking on a chat message
         """
-        item = self.twg_chat.itemAt(point)
+        index = self.tvw_chat.indexAt(point)
+        row = self.chat_model.row(index)
+        if row is None:
+            return
 
         menu = QMenu(self.tr("QChat Menu"), self)
 
         # if this is a geojson message
-        if type(item) is QChatGeojsonTreeWidgetItem:
+        if type(row) is QChatGeojsonRow:
             load_geojson_action = QAction(
                 QgsApplication.getThemeIcon("mActionAddLayer.svg"),
                 self.tr("Load layer in QGIS"),
             )
             load_geojson_action.triggered.connect(
-                partial(item.on_click, MESSAGE_COLUMN)
+                partial(row.on_click, MESSAGE_COLUMN, self)
             )
             menu.addAction(load_geojson_action)
 
         # if this is a crs message
-        if type(item) is QChatCrsTreeWidgetItem:
+        if type(row) is QChatCrsRow:
             set_crs_action = QAction(
                 QgsApplication.getThemeIcon("mActionSetProjection.svg"),
                 self.tr("Set current project CRS"),
             )
-            set_crs_action.triggered.connect(partial(item.on_click, MESSAGE_COLUMN))
+            set_crs_action.triggered.connect(
+                partial(row.on_click, MESSAGE_COLUMN, self)
+            )
             menu.addAction(set_crs_action)
 
         # if this is a bbox message
-        if type(item) is QChatBboxTreeWidgetItem:
+        if type(row) is QChatBboxRow:
             set_bbox_action = QAction(
                 QgsApplication.getThemeIcon("mActionViewExtentInCanvas.svg"),
                 self.tr("Set current extent"),
             )
-            set_bbox_action.triggered.connect(partial(item.on_click, MESSAGE_COLUMN))
+            set_bbox_action.triggered.connect(
+                partial(row.on_click, MESSAGE_COLUMN, self)
+            )
             menu.addAction(set_bbox_action)
 
         # like message action if possible
-        if item.can_be_liked:
+        if row.can_be_liked and row.author != self.nickname:
             like_action = QAction(
                 QgsApplication.getThemeIcon("mActionInOverview.svg"),
                 self.tr("Like message"),
             )
             like_action.triggered.connect(
-                partial(self.on_like_message, item.author, item.liked_message)
+                partial(self.on_like_message, row.author, row.liked_message)
             )
             menu.addAction(like_action)
 
         # mention author action if possible
-        if item.can_be_mentioned:
+        if row.can_be_mentioned and row.author != self.nickname:
             mention_action = QAction(
                 QgsApplication.getThemeIcon("mMessageLogRead.svg"),
                 self.tr("Mention user"),
             )
-            mention_action.triggered.connect(
-                partial(self.on_message_double_clicked, item, 2)
-            )
+            mention_action.triggered.connect(partial(self.mention_author, row.author))
             menu.addAction(mention_action)
 
         # copy message to clipboard action if possible
-        if item.can_be_copied_to_clipboard:
+        if row.can_be_copied_to_clipboard:
             copy_action = QAction(
                 QgsApplication.getThemeIcon("mActionEditCopy.svg"),
                 self.tr("Copy message to clipboard"),
             )
-            copy_action.triggered.connect(item.copy_to_clipboard)
+            copy_action.triggered.connect(row.copy_to_clipboard)
             menu.addAction(copy_action)
 
         # hide message action
@@ -738,17 +1283,18 @@ Rooms:
             QgsApplication.getThemeIcon("mActionHideSelectedLayers.svg"),
             self.tr("Hide message"),
         )
-        hide_action.triggered.connect(partial(self.on_hide_message, item))
+        hide_action.triggered.connect(
+            partial(self.on_hide_message, QPersistentModelIndex(index))
+        )
         menu.addAction(hide_action)
 
         menu.exec(QCursor.pos())
 
-    def on_hide_message(self, item: QTreeWidgetItem) -> None:
+    def on_hide_message(self, index: QPersistentModelIndex) -> None:
         """
         Action called when hide message menu action is triggered
         """
-        root = self.twg_chat.invisibleRootItem()
-        (item.parent() or root).removeChild(item)
+        self.chat_model.remove_row(index)
 
     def on_list_users_button_clicked(self) -> None:
         """
@@ -782,7 +1328,8 @@ Rooms:
         """
         Action called when the clear chat button is clicked
         """
-        self.twg_chat.clear()
+        self.ui_scheduler.clear()
+        self.chat_model.clear()
 
     def on_send_button_clicked(self) -> None:
         """
@@ -806,11 +1353,15 @@ Rooms:
             )
             return
 
-        if len(nickname) < QCHAT_NICKNAME_MINLENGTH:
+        if self.qchat_ws is None:
+            return
+        try:
+            self.qchat_ws.validator.check_author(nickname)
+        except QChatValidationError as exc:
             self.log(
                 message=self.tr(
-                    "Nickname too short: must be at least 3 characters. Please open settings and set it"
-                ),
+                    "Invalid nickname: {error}. Please open settings and set it"
+                ).format(error=exc),
                 log_level=Qgis.Warning,
                 push=self.settings.notify_push_info,
                 duration=self.settings.notify_push_duration,
@@ -820,7 +1371,7 @@ Rooms:
             )
             return
 
-        if not message_text:
+        if not message_text.strip():
             return
 
         # send message to websocket
@@ -830,8 +1381,30 @@ Rooms:
             avatar=avatar,
             text=message_text.strip(),
         )
-        self.qchat_ws.send_message(message)
-        self.lne_message.setText("")
+        if self.send_message(message):
+            self.lne_message.setText("")
+
+    def send_message(self, message: QChatMessage, room: str = None) -> bool:
+        """
+        Sends a message to the websocket, if it complies with the instance rules
+        :param room: room to send the message to, the current room by default
+        :return: True if the message has been queued, False if it was rejected
+        """
+        qchat_ws = self.connections.connection(room or self.current_room)
+        if qchat_ws is None:
+            return False
+        try:
+            qchat_ws.send_message(message)
+        except QChatValidationError as exc:
+            self.log(
+                message=self.tr("Message not sent: {error}").format(error=exc),
+                application=self.tr("QChat"),
+                log_level=Qgis.Warning,
+                push=self.settings.notify_push_info,
+                duration=self.settings.notify_push_duration,
+            )
+            return False
+        return True
 
     def on_send_image_button_clicked(self) -> None:
         """
@@ -852,9 +1425,9 @@ Rooms:
                     type=QCHAT_MESSAGE_TYPE_IMAGE,
                     author=self.settings.author_nickname,
                     avatar=self.settings.author_avatar,
-                    image_data=base64.b64encode(data).decode("utf-8"),
+                    image_data=data,
                 )
-                self.qchat_ws.send_message(message)
+                self.send_message(message)
 
     def on_send_screenshot_button_clicked(self) -> None:
         """
@@ -869,9 +1442,9 @@ Rooms:
                 type=QCHAT_MESSAGE_TYPE_IMAGE,
                 author=self.settings.author_nickname,
                 avatar=self.settings.author_avatar,
-                image_data=base64.b64encode(data).decode("utf-8"),
+                image_data=data,
             )
-            self.qchat_ws.send_message(message)
+            self.send_message(message)
 
     def on_send_bbox_button_clicked(self) -> None:
         """
@@ -890,7 +1463,7 @@ Rooms:
             ymin=rect.yMinimum(),
             ymax=rect.yMaximum(),
         )
-        self.qchat_ws.send_message(message)
+        self.send_message(message)
 
     def on_send_crs_button_clicked(self) -> None:
         """
@@ -904,19 +1477,55 @@ Rooms:
             crs_wkt=crs.toWkt(),
             crs_authid=crs.authid(),
         )
-        self.qchat_ws.send_message(message)
+        self.send_message(message)
 
-    def add_admin_message(self, text: str) -> None:
+    def add_admin_message(self, text: str, source: QChatMessage = None) -> None:
         """
-        Adds an admin message to QTreeWidget chat
+        Adds an admin message to the chat, and to the history of the current
+        room so that it is displayed again when switching back to it
+        :param source: received message the admin message is about, e.g. a
+        newcomer message: it is already in the history, the admin message is
+        not stored and takes its arrival time
         """
-        item = QChatAdminTreeWidgetItem(self.twg_chat, text)
-        self.add_tree_widget_item(item)
+        message = QChatAdminMessage(type=QCHAT_MESSAGE_TYPE_ADMIN, text=text)
+        if source is not None:
+            message.set_received_at(source.received_at)
+        else:
+            history = self.connections.history(self.current_room)
+            if history is not None:
+                history.add(message)
+        self.add_chat_row(QChatAdminRow(message))
+
+    def on_admin_message_received(self, message: QChatAdminMessage) -> None:
+        """
+        Launched when an admin message of the history is displayed again
+        """
+        self.add_chat_row(QChatAdminRow(message))
 
-    def add_tree_widget_item(self, item: QTreeWidgetItem) -> None:
-        self.twg_chat.addTopLevelItem(item)
+    def add_chat_row(self, row: QChatChatRow) -> None:
+        if self.in_batch:
+            # rows are inserted and scrolled to once, at the end of the batch
+            self.batch_rows.append(row)
+        else:
+            self.add_chat_rows([row])
+
+    def add_chat_rows(self, rows: list[QChatChatRow]) -> None:
+        """
+        Queues the insertion of rows, a few at a time, and a single scroll per frame
+        """
+        for first in range(0, len(rows), ROWS_PER_UPDATE):
+            self.ui_scheduler.post(
+                partial(self.insert_chat_rows, rows[first : first + ROWS_PER_UPDATE])
+            )
+
+    def insert_chat_rows(self, rows: list[QChatChatRow]) -> None:
+        """
+        Inserts rows in the chat and scrolls to them at the end of the frame,
+        so that the scroll follows the insertions carried over to later frames
+        """
+        self.chat_model.append_rows(rows)
         if self.ckb_autoscroll.isChecked():
-            self.twg_chat.scrollToItem(item)
+            self.ui_scheduler.post_coalesced("scroll", self.tvw_chat.scrollToBottom)
 
     def on_widget_closed(self) -> None:
         """
@@ -925,6 +1534,9 @@ Rooms:
         if self.connected:
             self.disconnect_from_room()
         self.cbb_room.currentIndexChanged.disconnect()
+        self.connections.shutdown()
+        self.chat_model.thumbnails.shutdown()
+        self.ui_scheduler.clear()
         self.initialized = False
 
         # remove context menu on vector layer for sending as geojson in QChat
@@ -1025,12 +1637,26 @@ Visit the website ?
                 duration=self.settings.notify_push_duration,
             )
             return
+        # checked before the costly export, the message is validated again anyway
+        max_features = self.qchat_ws.validator.rules.max_geojson_features
+        if 0 < max_features < layer.featureCount():
+            self.log(
+                message=self.tr(
+                    "Layer has too many features: the instance accepts at most {max}"
+                ).format(max=max_features),
+                application=self.tr("QChat"),
+                log_level=Qgis.Warning,
+                push=self.settings.notify_push_info,
+                duration=self.settings.notify_push_duration,
+            )
+            return
 
         exporter = QgsJsonExporter(layer)
         exporter.setSourceCrs(layer.crs())
         exporter.setDestinationCrs(layer.crs())
         exporter.setTransformGeometries(True)
         geojson_str = exporter.exportFeatures(layer.getFeatures())
+        nb_features = layer.featureCount()
 
         # save and read QML style to and from temp file
         save_style_path = Path(tempfile.gettempdir()) / "qchat_layer_style.qml"
@@ -1047,7 +1673,9 @@ Visit the website ?
             layer_name=layer.name(),
             crs_wkt=layer.crs().toWkt(),
             crs_authid=layer.crs().authid(),
-            geojson=json.loads(geojson_str),
+            # sent as exported, without being parsed
+            geojson=geojson_str,
             style=qml_style,
+            nb_features=nb_features if nb_features >= 0 else None,
         )
-        self.qchat_ws.send_message(message)
+        self.send_message(message)
@@ -141,6 +141,33 @@ class ConfigOptionsPage(FORM_CLASS, QgsOptionsPageWidget):
         settings.qchat_color_self = self.cbt_color_self.color().name()
         settings.qchat_color_admin = self.cbt_color_admin.color().name()
 
+        # performance
+        settings.qchat_threaded_decoding = self.ckb_threaded_decoding.isChecked()
+        settings.qchat_batch_window_ms = self.sbx_batch_window.value()
+        settings.qchat_max_image_size_mb = self.sbx_max_image_size.value()
+        settings.qchat_max_layer_size_mb = self.sbx_max_layer_size.value()
+        settings.qchat_spill_oversized_payloads = (
+            self.ckb_spill_oversized_payloads.isChecked()
+        )
+        settings.qchat_reconnect_on_connection_lost = (
+            self.ckb_reconnect_on_connection_lost.isChecked()
+        )
+        settings.qchat_reconnect_max_delay_s = self.sbx_reconnect_max_delay.value()
+        settings.qchat_ping_interval_s = self.sbx_ping_interval.value()
+        settings.qchat_ping_max_missed = self.sbx_ping_max_missed.value()
+        settings.qchat_send_rate_messages = self.sbx_send_rate_messages.value()
+        settings.qchat_send_rate_kbytes = self.sbx_send_rate_kbytes.value()
+        settings.qchat_compression_threshold_kb = self.sbx_compression_threshold.value()
+        settings.qchat_chunk_size_kb = self.sbx_chunk_size.value()
+        settings.qchat_max_open_rooms = self.sbx_max_open_rooms.value()
+        settings.qchat_room_history_size = self.sbx_room_history_size.value()
+        settings.qchat_history_max_mb = self.sbx_history_max_mb.value()
+        settings.qchat_history_evict_heavy_first = (
+            self.ckb_history_evict_heavy_first.isChecked()
+        )
+        settings.qchat_image_cache_mb = self.sbx_image_cache_mb.value()
+        settings.qchat_frame_budget_ms = self.sbx_frame_budget_ms.value()
+
         # misc
         settings.debug_mode = self.opt_debug.isChecked()
         settings.version = __version__
@@ -201,6 +228,33 @@ class ConfigOptionsPage(FORM_CLASS, QgsOptionsPageWidget):
         self.cbt_color_self.setColor(QColor(settings.qchat_color_self))
         self.cbt_color_admin.setColor(QColor(settings.qchat_color_admin))
 
+        # performance
+        self.ckb_threaded_decoding.setChecked(settings.qchat_threaded_decoding)
+        self.sbx_batch_window.setValue(settings.qchat_batch_window_ms)
+        self.sbx_max_image_size.setValue(settings.qchat_max_image_size_mb)
+        self.sbx_max_layer_size.setValue(settings.qchat_max_layer_size_mb)
+        self.ckb_spill_oversized_payloads.setChecked(
+            settings.qchat_spill_oversized_payloads
+        )
+        self.ckb_reconnect_on_connection_lost.setChecked(
+            settings.qchat_reconnect_on_connection_lost
+        )
+        self.sbx_reconnect_max_delay.setValue(settings.qchat_reconnect_max_delay_s)
+        self.sbx_ping_interval.setValue(settings.qchat_ping_interval_s)
+        self.sbx_ping_max_missed.setValue(settings.qchat_ping_max_missed)
+        self.sbx_send_rate_messages.setValue(settings.qchat_send_rate_messages)
+        self.sbx_send_rate_kbytes.setValue(settings.qchat_send_rate_kbytes)
+        self.sbx_compression_threshold.setValue(settings.qchat_compression_threshold_kb)
+        self.sbx_chunk_size.setValue(settings.qchat_chunk_size_kb)
+        self.sbx_max_open_rooms.setValue(settings.qchat_max_open_rooms)
+        self.sbx_room_history_size.setValue(settings.qchat_room_history_size)
+        self.sbx_history_max_mb.setValue(settings.qchat_history_max_mb)
+        self.ckb_history_evict_heavy_first.setChecked(
+            settings.qchat_history_evict_heavy_first
+        )
+        self.sbx_image_cache_mb.setValue(settings.qchat_image_cache_mb)
+        self.sbx_frame_budget_ms.setValue(settings.qchat_frame_budget_ms)
+
         # global
         self.opt_debug.setChecked(settings.debug_mode)
         self.lbl_version_saved_value.setText(settings.version)
@@ -0,0 +1,253 @@
+from typing import Any, Optional
+
+from qgis.core import QgsApplication
+from qgis.PyQt.QtCore import (
+    QAbstractTableModel,
+    QModelIndex,
+    QObject,
+    QPersistentModelIndex,
+    QSize,
+    Qt,
+)
+from qgis.PyQt.QtGui import QBrush, QColor, QIcon, QPainter, QPixmap
+from qgis.PyQt.QtWidgets import QStyledItemDelegate, QStyleOptionViewItem
+
+from qchat.gui.qchat_chat_rows import (
+    AUTHOR_COLUMN,
+    MAX_THUMBNAIL_HEIGHT,
+    MESSAGE_COLUMN,
+    TIME_COLUMN,
+    QChatChatRow,
+    QChatImageRow,
+)
+from qchat.gui.qchat_thumbnails import THUMBNAIL, QChatThumbnailLoader, pixmap_cache
+from qchat.logic.qchat_room_history import (
+    ROOM_HISTORY_MAX_BYTES,
+    ROOM_HISTORY_SIZE,
+    plan_eviction,
+)
+
+# role of the row object of an index
+ROW_ROLE = Qt.UserRole
+
+
+class QChatChatModel(QAbstractTableModel):
+    """
+    Model of the chat, over a flat list of lightweight rows
+    Texts, icons and colors are only computed for the cells being displayed
+    Rows are bounded like the room histories, the oldest are evicted first
+    """
+
+    def __init__(self, parent: QObject = None):
+        super().__init__(parent)
+        self.rows: list[QChatChatRow] = []
+        # (size, heavy) of each row
+        self.sizes: list[tuple[int, bool]] = []
+        self.nbytes = 0
+        self.max_rows = ROOM_HISTORY_SIZE
+        self.max_bytes = ROOM_HISTORY_MAX_BYTES
+        self.heavy_first = False
+        self.evicted_total = 0
+        self.thumbnails = QChatThumbnailLoader(MAX_THUMBNAIL_HEIGHT, self)
+        self.thumbnails.thumbnail_loaded.connect(self.on_thumbnail_loaded)
+        self.show_avatars = True
+        self.headers = [self.tr("Date"), self.tr("Nickname"), self.tr("Message")]
+        # foreground brushes by row color
+        self.brushes: dict[str, QBrush] = {}
+        # avatar icons by name, shared by all rows
+        self.icons: dict[str, QIcon] = {}
+
+    def set_colors(self, colors: dict[str, str]) -> None:
+        """
+        Sets the foreground colors of the rows
+        :param colors: color names, e.g. '#ffa500', by row color
+        """
+        self.brushes = {key: QBrush(QColor(color)) for key, color in colors.items()}
+        if self.rows:
+            self.dataChanged.emit(
+                self.index(0, 0),
+                self.index(len(self.rows) - 1, MESSAGE_COLUMN),
+                [Qt.ForegroundRole],
+            )
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(
+        self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole
+    ) -> Any:
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.headers[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == TIME_COLUMN:
+                return row.time_text
+            if column == AUTHOR_COLUMN:
+                return row.author
+            return row.text
+        if role == Qt.DecorationRole:
+            if column == AUTHOR_COLUMN and self.show_avatars and row.avatar:
+                return self.icon(row.avatar)
+            return None
+        if role == Qt.ForegroundRole:
+            return self.brushes.get(row.color) if row.color else None
+        if role == Qt.ToolTipRole:
+            return row.tooltip if column == MESSAGE_COLUMN else None
+        if role == ROW_ROLE:
+            return row
+        return None
+
+    def icon(self, avatar: str) -> QIcon:
+        icon = self.icons.get(avatar)
+        if icon is None:
+            icon = QIcon(QgsApplication.iconPath(avatar))
+            self.icons[avatar] = icon
+        return icon
+
+    def row(self, index: QModelIndex) -> Optional[QChatChatRow]:
+        if not index.isValid():
+            return None
+        return self.rows[index.row()]
+
+    def thumbnail(self, index: QModelIndex) -> Optional[QPixmap]:
+        """
+        Returns the thumbnail of an image row, None while it is being decoded
+        Its decoding is requested if it is not in the pixmap cache
+        Called on every paint, the lookup is not counted in the cache hit rate,
+        the decoding requests are
+        """
+        row = self.rows[index.row()]
+        if row.image_key is not None:
+            thumbnail = pixmap_cache.get((row.image_key, THUMBNAIL), count=False)
+            if thumbnail is not None:
+                return thumbnail
+        self.thumbnails.request(row, row.message, row.image_key)
+        return None
+
+    def on_thumbnail_loaded(self, row: QChatImageRow, key: str) -> None:
+        row.image_key = key
+        # the row is most likely among the last ones, it may have been evicted
+        for position in range(len(self.rows) - 1, -1, -1):
+            if self.rows[position] is row:
+                index = self.index(position, MESSAGE_COLUMN)
+                self.dataChanged.emit(index, index, [Qt.DecorationRole])
+                return
+
+    def append_rows(self, rows: list[QChatChatRow]) -> None:
+        """
+        Appends rows at the end of the chat, in a single insertion,
+        then evicts the rows exceeding the limits
+        """
+        if not rows:
+            return
+        first = len(self.rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self.rows.extend(rows)
+        self.sizes.extend((row.nbytes, row.heavy) for row in rows)
+        self.nbytes += sum(row.nbytes for row in rows)
+        self.endInsertRows()
+        self.evict()
+
+    def set_limits(self, max_rows: int, max_bytes: int, heavy_first: bool) -> None:
+        """
+        Changes the number of rows and of bytes kept, evicting rows if needed
+        """
+        self.max_rows = max(1, max_rows)
+        self.max_bytes = max_bytes
+        self.heavy_first = heavy_first
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Removes rows until the chat fits in its limits
+        """
+        if len(self.rows) <= self.max_rows and self.nbytes <= self.max_bytes:
+            return
+        positions = plan_eviction(
+            self.sizes, self.nbytes, self.max_rows, self.max_bytes, self.heavy_first
+        )
+        self.evicted_total += len(positions)
+        self.remove_positions(positions)
+
+    def remove_positions(self, positions: list[int]) -> None:
+        """
+        Removes rows, a single removal for each range of consecutive rows
+        :param positions: sorted positions of the rows
+        """
+        end = len(positions)
+        while end:
+            start = end - 1
+            while start and positions[start - 1] == positions[start] - 1:
+                start -= 1
+            first, last = positions[start], positions[end - 1]
+            self.beginRemoveRows(QModelIndex(), first, last)
+            self.nbytes -= sum(size for size, _ in self.sizes[first : last + 1])
+            del self.rows[first : last + 1]
+            del self.sizes[first : last + 1]
+            self.endRemoveRows()
+            end = start
+
+    def remove_row(self, index: QPersistentModelIndex) -> None:
+        if not index.isValid():
+            return
+        self.remove_positions([index.row()])
+
+    def clear(self) -> None:
+        self.thumbnails.cancel()
+        self.beginResetModel()
+        self.rows = []
+        self.sizes = []
+        self.nbytes = 0
+        self.endResetModel()
+
+
+class QChatChatDelegate(QStyledItemDelegate):
+    """
+    Paints the cells of the chat on demand, the thumbnail of image rows
+    in the message column and the texts and avatars of the model otherwise
+    A placeholder is painted while a thumbnail is being decoded
+    All rows have the height of a thumbnail, so that the view can use
+    uniform row heights
+    """
+
+    def __init__(self, parent: QObject = None):
+        super().__init__(parent)
+        self.placeholder = QgsApplication.getThemeIcon("mIconRaster.svg").pixmap(
+            MAX_THUMBNAIL_HEIGHT, MAX_THUMBNAIL_HEIGHT
+        )
+
+    def paint(
+        self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex
+    ) -> None:
+        super().paint(painter, option, index)
+        if index.column() != MESSAGE_COLUMN:
+            return
+        row = index.data(ROW_ROLE)
+        if not isinstance(row, QChatImageRow):
+            return
+        thumbnail = index.model().thumbnail(index)
+        if thumbnail is None:
+            thumbnail = self.placeholder
+        if thumbnail.isNull():
+            return
+        rect = option.rect
+        painter.save()
+        painter.setClipRect(rect)
+        painter.drawPixmap(
+            rect.x(), rect.y() + (rect.height() - thumbnail.height()) // 2, thumbnail
+        )
+        painter.restore()
+
+    def sizeHint(self, option: QStyleOptionViewItem, index: QModelIndex) -> QSize:
+        size = super().sizeHint(option, index)
+        size.setHeight(max(size.height(), MAX_THUMBNAIL_HEIGHT))
+        return size
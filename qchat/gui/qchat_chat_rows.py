@@ -0,0 +1,443 @@
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from qgis.core import (
+    QgsApplication,
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsMapLayer,
+    QgsPointXY,
+    QgsProject,
+    QgsRectangle,
+    QgsVectorLayer,
+)
+from qgis.gui import QgsMapCanvas
+from qgis.PyQt.QtCore import QCoreApplication, QDateTime
+from qgis.PyQt.QtGui import QPixmap
+from qgis.PyQt.QtWidgets import QDialog, QLabel, QMessageBox, QVBoxLayout, QWidget
+
+from qchat.constants import ADMIN_MESSAGES_AVATAR, ADMIN_MESSAGES_NICKNAME
+from qchat.gui.qchat_thumbnails import load_full_size
+from qchat.logic.qchat_content_cache import content_key
+from qchat.logic.qchat_messages import (
+    QChatAdminMessage,
+    QChatBboxMessage,
+    QChatCrsMessage,
+    QChatGeojsonMessage,
+    QChatImageMessage,
+    QChatMessage,
+    QChatOversizedMessage,
+    QChatTextMessage,
+)
+from qchat.logic.qchat_room_history import MESSAGE_OVERHEAD, is_heavy, message_size
+
+TIME_COLUMN = 0
+AUTHOR_COLUMN = 1
+MESSAGE_COLUMN = 2
+
+MAX_THUMBNAIL_HEIGHT = 24
+
+# foreground colors of the rows, see the qchat_color_* settings
+COLOR_ADMIN = "admin"
+COLOR_MENTION = "mention"
+COLOR_SELF = "self"
+
+
+def message_timestamp(message: QChatMessage) -> float:
+    """
+    Returns the time a message has been sent at, if the sender set it,
+    the time it has been received at otherwise, in seconds since the epoch
+    """
+    timestamp = getattr(message, "timestamp", None)
+    if timestamp is None:
+        timestamp = message.received_at
+    return time.time() if timestamp is None else timestamp
+
+
+def self_color(message: QChatMessage, nickname: str) -> Optional[str]:
+    return COLOR_SELF if message.author == nickname else None
+
+
+class QChatChatRow:
+    """
+    Row of the chat, a lightweight view of a received message
+    Its texts are only computed when the row is displayed
+    Its approximate size in memory is known, to bound the chat
+    A QChatChatRow should not be instantiated
+    See inheriting classes for implementation
+    """
+
+    __slots__ = ("timestamp", "author", "avatar", "color", "nbytes", "heavy")
+
+    # the author of the row must not be the user either to like or mention it
+    can_be_liked = True
+    can_be_mentioned = True
+    can_be_copied_to_clipboard = False
+
+    def __init__(
+        self,
+        timestamp: float,
+        author: str,
+        avatar: Optional[str],
+        color: Optional[str] = None,
+        nbytes: int = MESSAGE_OVERHEAD,
+        heavy: bool = False,
+    ):
+        self.timestamp = timestamp
+        self.author = author
+        self.avatar = avatar
+        self.color = color
+        self.nbytes = nbytes
+        self.heavy = heavy
+
+    @property
+    def time_text(self) -> str:
+        return (
+            QDateTime.fromMSecsSinceEpoch(round(self.timestamp * 1000))
+            .time()
+            .toString()
+        )
+
+    @property
+    def text(self) -> str:
+        """
+        Returns the text displayed in the message column
+        """
+        return ""
+
+    @property
+    def tooltip(self) -> Optional[str]:
+        return None
+
+    def on_click(self, column: int, parent: QWidget) -> None:
+        """
+        Triggered when simple clicking on the row
+        Empty because this is the expected behaviour
+        :param column: column that has been clicked
+        :param parent: parent of the dialogs opened by the click
+        """
+        pass
+
+    @property
+    def liked_message(self) -> str:
+        """
+        Returns the text message that was liked
+        """
+        pass
+
+    def copy_to_clipboard(self) -> None:
+        """
+        Performs action of copying message to clipboard
+        If the can_be_copied_to_clipboard is enabled ofc
+        """
+        pass
+
+
+class QChatAdminRow(QChatChatRow):
+    __slots__ = ("message",)
+
+    can_be_liked = False
+    can_be_mentioned = False
+
+    def __init__(self, message: QChatAdminMessage):
+        super().__init__(
+            message_timestamp(message),
+            ADMIN_MESSAGES_NICKNAME,
+            ADMIN_MESSAGES_AVATAR,
+            COLOR_ADMIN,
+            message_size(message),
+        )
+        self.message = message
+
+    @property
+    def text(self) -> str:
+        return self.message.text
+
+    @property
+    def tooltip(self) -> Optional[str]:
+        return self.message.text
+
+
+class QChatTextRow(QChatChatRow):
+    __slots__ = ("message",)
+
+    can_be_copied_to_clipboard = True
+
+    def __init__(self, message: QChatTextMessage, nickname: str):
+        # set foreground color if user is mentioned, or if sent by user
+        color = self_color(message, nickname)
+        if color is None:
+            words = message.text.split(" ")
+            if f"@{nickname}" in words or "@all" in words:
+                color = COLOR_MENTION
+        super().__init__(
+            message_timestamp(message),
+            message.author,
+            message.avatar,
+            color,
+            message_size(message),
+        )
+        self.message = message
+
+    @property
+    def text(self) -> str:
+        return self.message.text
+
+    @property
+    def liked_message(self) -> str:
+        return self.message.text
+
+    def copy_to_clipboard(self) -> None:
+        QgsApplication.instance().clipboard().setText(self.message.text)
+
+
+class QChatImageRow(QChatChatRow):
+    __slots__ = ("message", "image_key")
+
+    can_be_copied_to_clipboard = True
+
+    def __init__(self, message: QChatImageMessage, nickname: str):
+        super().__init__(
+            message_timestamp(message),
+            message.author,
+            message.avatar,
+            self_color(message, nickname),
+            message_size(message),
+            is_heavy(message),
+        )
+        self.message = message
+        # key of the image in the pixmap cache, the hash of its bytes is
+        # computed in a worker thread the first time the row is displayed
+        self.image_key: Optional[str] = None
+
+    def load_pixmap(self) -> QPixmap:
+        """
+        Returns the full resolution image of the message, for the viewer only
+        """
+        image_bytes = self.message.image_bytes
+        if self.image_key is None:
+            self.image_key = content_key(image_bytes)
+        return load_full_size(self.image_key, image_bytes)
+
+    def on_click(self, column: int, parent: QWidget) -> None:
+        if column == MESSAGE_COLUMN:
+            dialog = QDialog(parent)
+            dialog.setWindowTitle(f"QChat image {self.message.author}")
+            layout = QVBoxLayout()
+            label = QLabel()
+            label.setPixmap(self.load_pixmap())
+            layout.addWidget(label)
+            dialog.setLayout(layout)
+            dialog.setModal(True)
+            dialog.show()
+
+    @property
+    def liked_message(self) -> str:
+        return "image"
+
+    def copy_to_clipboard(self) -> None:
+        QgsApplication.instance().clipboard().setPixmap(self.load_pixmap())
+
+
+class QChatGeojsonRow(QChatChatRow):
+    __slots__ = ("message",)
+
+    can_be_copied_to_clipboard = True
+
+    def __init__(self, message: QChatGeojsonMessage, nickname: str):
+        super().__init__(
+            message_timestamp(message),
+            message.author,
+            message.avatar,
+            self_color(message, nickname),
+            message_size(message),
+            is_heavy(message),
+        )
+        self.message = message
+
+    @property
+    def text(self) -> str:
+        return self.liked_message
+
+    @property
+    def tooltip(self) -> Optional[str]:
+        return self.liked_message
+
+    def on_click(self, column: int, parent: QWidget) -> None:
+        if column == MESSAGE_COLUMN:
+            # save geojson to temp file
+            save_path = (
+                Path(tempfile.gettempdir()) / f"{self.message.layer_name}.geojson"
+            )
+            with open(save_path, "wb") as file:
+                file.write(self.message.geojson_bytes)
+
+            # save QML style to temp file
+            save_style_path = (
+                Path(tempfile.gettempdir()) / f"{self.message.layer_name}_style.qml"
+            )
+            with open(save_style_path, "w", encoding="utf-8") as style_file:
+                style_file.write(self.message.style)
+
+            # load geojson file into QGIS
+            layer = QgsVectorLayer(str(save_path), self.message.layer_name, "ogr")
+            layer.setCrs(QgsCoordinateReferenceSystem.fromWkt(self.message.crs_wkt))
+            layer.loadNamedStyle(
+                str(save_style_path),
+                loadFromLocalDb=False,
+                categories=QgsMapLayer.AllStyleCategories,
+            )
+            QgsProject.instance().addMapLayer(layer)
+
+    @property
+    def liked_message(self) -> str:
+        layer_name = self.message.layer_name
+        nb_features = self.message.features_count
+        crs = self.message.crs_authid
+        return f'<layer "{layer_name}": {nb_features} features, CRS={crs}>'
+
+    def copy_to_clipboard(self) -> None:
+        QgsApplication.instance().clipboard().setText(
+            self.message.geojson_bytes.decode("utf-8")
+        )
+
+
+class QChatCrsRow(QChatChatRow):
+    __slots__ = ("message",)
+
+    can_be_copied_to_clipboard = True
+
+    def __init__(self, message: QChatCrsMessage, nickname: str):
+        super().__init__(
+            message_timestamp(message),
+            message.author,
+            message.avatar,
+            self_color(message, nickname),
+            message_size(message),
+            is_heavy(message),
+        )
+        self.message = message
+
+    @property
+    def text(self) -> str:
+        return self.liked_message
+
+    @property
+    def tooltip(self) -> Optional[str]:
+        return self.liked_message
+
+    def on_click(self, column: int, parent: QWidget) -> None:
+        if column == MESSAGE_COLUMN:
+            # set current QGIS project CRS to the message one
+            crs = QgsCoordinateReferenceSystem.fromWkt(self.message.crs_wkt)
+            QgsProject.instance().setCrs(crs)
+
+    @property
+    def liked_message(self) -> str:
+        return f"<CRS {self.message.crs_authid}>"
+
+    def copy_to_clipboard(self) -> None:
+        QgsApplication.instance().clipboard().setText(self.message.crs_wkt)
+
+
+class QChatBboxRow(QChatChatRow):
+    __slots__ = ("message", "canvas")
+
+    can_be_copied_to_clipboard = True
+
+    def __init__(self, message: QChatBboxMessage, nickname: str, canvas: QgsMapCanvas):
+        super().__init__(
+            message_timestamp(message),
+            message.author,
+            message.avatar,
+            self_color(message, nickname),
+            message_size(message),
+            is_heavy(message),
+        )
+        self.message = message
+        self.canvas = canvas
+
+    @property
+    def text(self) -> str:
+        return self.liked_message
+
+    @property
+    def tooltip(self) -> Optional[str]:
+        return self.liked_message
+
+    def on_click(self, column: int, parent: QWidget) -> None:
+        if column == MESSAGE_COLUMN:
+            # set current canvas extent to the received one
+            project = QgsProject.instance()
+            tr = QgsCoordinateTransform(
+                QgsCoordinateReferenceSystem(self.message.crs_wkt),
+                project.crs(),
+                project,
+            )
+            rect = QgsRectangle(
+                tr.transform(QgsPointXY(self.message.xmin, self.message.ymin)),
+                tr.transform(QgsPointXY(self.message.xmax, self.message.ymax)),
+            )
+            self.canvas.setExtent(rect)
+            self.canvas.refresh()
+
+    @property
+    def liked_message(self) -> str:
+        msg = f"[{self.message.xmin} {self.message.ymin}, {self.message.xmax} {self.message.ymax}]"
+        return f"<BBOX {self.message.crs_authid}: {msg}>"
+
+    def copy_to_clipboard(self) -> None:
+        msg = f"[{self.message.xmin} {self.message.ymin}, {self.message.xmax} {self.message.ymax}]"
+        QgsApplication.instance().clipboard().setText(msg)
+
+
+class QChatOversizedRow(QChatChatRow):
+    __slots__ = ("message", "load_callback")
+
+    can_be_liked = False
+
+    def __init__(
+        self,
+        message: QChatOversizedMessage,
+        load_callback: Callable[[QChatOversizedMessage], None],
+    ):
+        super().__init__(
+            message_timestamp(message),
+            message.author or "?",
+            ADMIN_MESSAGES_AVATAR,
+            COLOR_ADMIN,
+            message_size(message),
+        )
+        self.message = message
+        self.load_callback = load_callback
+
+    def tr(self, message: str) -> str:
+        """
+        Returns the translation of a string, rows not being QObjects
+        """
+        return QCoreApplication.translate(self.__class__.__name__, message)
+
+    @property
+    def text(self) -> str:
+        return self.tr(
+            "<{type}: payload too large ({size:.1f} MB) – load anyway?>"
+        ).format(type=self.message.payload_type, size=self.message.size / 1024 / 1024)
+
+    @property
+    def tooltip(self) -> Optional[str]:
+        return self.text
+
+    def on_click(self, column: int, parent: QWidget) -> None:
+        if column == MESSAGE_COLUMN:
+            answer = QMessageBox.question(
+                parent,
+                self.tr("QChat"),
+                self.tr(
+                    "This message weighs {size:.1f} MB and may freeze QGIS "
+                    "while loading. Load it anyway?"
+                ).format(size=self.message.size / 1024 / 1024),
+            )
+            if answer == QMessageBox.Yes:
+                self.load_callback(self.message)
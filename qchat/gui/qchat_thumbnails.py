@@ -0,0 +1,167 @@
+from typing import Optional
+
+from qgis.PyQt.QtCore import (
+    QBuffer,
+    QByteArray,
+    QObject,
+    Qt,
+    QThread,
+    pyqtSignal,
+    pyqtSlot,
+)
+from qgis.PyQt.QtGui import QImage, QImageReader, QPixmap
+
+from qchat.logic.qchat_content_cache import QChatContentCache, content_key
+from qchat.logic.qchat_messages import QChatImageMessage
+
+# versions of an image stored in the cache, with its content key
+THUMBNAIL = "thumbnail"
+FULL_SIZE = "full_size"
+
+# decoded images of all chats, keyed by (content key, version)
+pixmap_cache = QChatContentCache()
+
+
+def pixmap_size(pixmap: QPixmap) -> int:
+    return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+
+def load_full_size(key: str, image_bytes: bytes) -> QPixmap:
+    """
+    Returns the full resolution image of a content key, decoding it if
+    it is not cached
+    """
+    pixmap = pixmap_cache.get((key, FULL_SIZE))
+    if pixmap is None:
+        pixmap = QPixmap()
+        pixmap.loadFromData(image_bytes)
+        pixmap_cache.put((key, FULL_SIZE), pixmap, pixmap_size(pixmap))
+    return pixmap
+
+
+def decode_thumbnail(image_bytes: bytes, max_height: int) -> QImage:
+    """
+    Decodes an image at most max_height pixels high
+    Formats able to do so, e.g. JPEG, are decoded at the reduced size directly
+    :return: the decoded image, a null image if it could not be decoded
+    """
+    data = QByteArray(image_bytes)
+    buffer = QBuffer(data)
+    reader = QImageReader(buffer)
+    size = reader.size()
+    if size.isValid() and size.height() > max_height:
+        reader.setScaledSize(size.scaled(size.width(), max_height, Qt.KeepAspectRatio))
+    image = reader.read()
+    if image.height() > max_height:
+        image = image.scaledToHeight(max_height, Qt.SmoothTransformation)
+    return image
+
+
+class QChatThumbnailer(QObject):
+    """
+    Decodes the thumbnails of image messages
+    Meant to live in a worker thread: images are decoded as QImage,
+    which unlike QPixmap can be used outside of the GUI thread
+    """
+
+    def __init__(self, max_height: int):
+        super().__init__()
+        self.max_height = max_height
+
+    # request, content key, decoded thumbnail and whether it has been decoded,
+    # thumbnails already cached are not decoded again
+    thumbnail_decoded = pyqtSignal(object, str, QImage, bool)
+
+    @pyqtSlot(object, object, object)
+    def decode(
+        self, request: object, message: QChatImageMessage, key: Optional[str]
+    ) -> None:
+        try:
+            image_bytes = message.image_bytes
+        except ValueError:
+            # invalid base64 data
+            image_bytes = b""
+        if key is None:
+            key = content_key(image_bytes)
+        if (key, THUMBNAIL) in pixmap_cache:
+            self.thumbnail_decoded.emit(request, key, QImage(), False)
+            return
+        image = decode_thumbnail(image_bytes, self.max_height)
+        self.thumbnail_decoded.emit(request, key, image, True)
+
+
+class QChatThumbnailLoader(QObject):
+    """
+    Loads the thumbnails of image messages in a worker thread,
+    started on the first request
+    Thumbnails are stored in the pixmap cache, under the content key
+    of their image, so that a reposted image is decoded only once
+    """
+
+    def __init__(self, max_height: int, parent: QObject = None):
+        super().__init__(parent)
+        self.max_height = max_height
+        self.worker_thread: Optional[QThread] = None
+        # requests being decoded
+        self.pending: set[object] = set()
+        self.loaded_total = 0
+
+    thumbnail_to_decode = pyqtSignal(object, object, object)
+    # request and content key of its image, whose thumbnail is cached
+    thumbnail_loaded = pyqtSignal(object, str)
+
+    def request(
+        self, request: object, message: QChatImageMessage, key: Optional[str] = None
+    ) -> None:
+        """
+        Asks for the thumbnail of an image message, unless it is being decoded
+        :param request: hashable request, given back with the content key
+        :param key: content key of the image, if already known
+        """
+        if request in self.pending:
+            return
+        if self.worker_thread is None:
+            thumbnailer = QChatThumbnailer(self.max_height)
+            self.worker_thread = QThread()
+            thumbnailer.moveToThread(self.worker_thread)
+            self.thumbnail_to_decode.connect(thumbnailer.decode)
+            thumbnailer.thumbnail_decoded.connect(self.on_thumbnail_decoded)
+            self.worker_thread.finished.connect(thumbnailer.deleteLater)
+            self.worker_thread.start()
+        self.pending.add(request)
+        self.thumbnail_to_decode.emit(request, message, key)
+
+    def on_thumbnail_decoded(
+        self, request: object, key: str, image: QImage, decoded: bool
+    ) -> None:
+        if request not in self.pending:
+            # cancelled meanwhile
+            return
+        self.pending.discard(request)
+        # a thumbnail not decoded was found in the cache, e.g. for a reposted image
+        pixmap_cache.count_lookup(hit=not decoded)
+        if decoded:
+            self.loaded_total += 1
+            # pixmaps can only be created in the GUI thread,
+            # a null one is cached for invalid images not to be decoded again
+            pixmap = QPixmap.fromImage(image)
+            pixmap_cache.put((key, THUMBNAIL), pixmap, pixmap_size(pixmap))
+        self.thumbnail_loaded.emit(request, key)
+
+    def cancel(self) -> None:
+        """
+        Drops the requests being decoded, their thumbnails will be ignored
+        """
+        self.pending.clear()
+
+    def shutdown(self) -> None:
+        """
+        Stops the worker thread, to be called before the loader is deleted
+        """
+        self.cancel()
+        if self.worker_thread is None:
+            return
+        self.thumbnail_to_decode.disconnect()
+        self.worker_thread.quit()
+        self.worker_thread.wait()
+        self.worker_thread = None
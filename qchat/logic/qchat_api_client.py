@@ -1,4 +1,3 @@
-import json
 from typing import Any
 
 # 3rd party
@@ -6,6 +5,7 @@ from qgis.PyQt.QtCore import QByteArray
 
 # plugin
 from qchat.__about__ import __title__, __version__
+from qchat.logic import qchat_json
 from qchat.toolbelt import NetworkRequestsManager
 
 # -- GLOBALS --
@@ -38,7 +38,7 @@ class QChatApiClient:
             response_expected_content_type="text/plain; charset=utf-8",
             use_cache=False,
         )
-        data = json.loads(str(response, "UTF8"))
+        data = qchat_json.loads(response.data())
         return data
 
     def get_status(self) -> dict[str, Any]:
@@ -52,7 +52,7 @@ class QChatApiClient:
             response_expected_content_type=CONTENT_TYPE_JSON,
             use_cache=False,
         )
-        data = json.loads(str(response, "UTF8"))
+        data = qchat_json.loads(response.data())
         return data
 
     def get_rules(self) -> dict[str, str]:
@@ -66,7 +66,7 @@ class QChatApiClient:
             response_expected_content_type=CONTENT_TYPE_JSON,
             use_cache=True,
         )
-        data = json.loads(str(response, "UTF8"))
+        data = qchat_json.loads(response.data())
         return data
 
     def get_rooms(self) -> list[str]:
@@ -80,7 +80,7 @@ class QChatApiClient:
             response_expected_content_type=CONTENT_TYPE_JSON,
             use_cache=True,
         )
-        data = json.loads(str(response, "UTF8"))
+        data = qchat_json.loads(response.data())
         return data
 
     def get_registered_users(self, room: str) -> list[str]:
@@ -94,5 +94,5 @@ class QChatApiClient:
             response_expected_content_type=CONTENT_TYPE_JSON,
             use_cache=False,
         )
-        data = json.loads(str(response, "UTF8"))
+        data = qchat_json.loads(response.data())
         return data
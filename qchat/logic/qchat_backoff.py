@@ -0,0 +1,48 @@
+import random
+from typing import Optional
+
+
+class ExponentialBackoff:
+    """
+    Delays between reconnection attempts, growing exponentially up to a maximum
+    A random jitter spreads the attempts of the clients disconnected at the
+    same time, e.g. when an instance is redeployed, so they do not stampede it
+    """
+
+    def __init__(
+        self,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        factor: float = 2.0,
+        jitter: float = 0.5,
+        rng: Optional[random.Random] = None,
+    ):
+        """
+        :param base_delay: delay before the first attempt, in seconds
+        :param max_delay: maximum delay between two attempts, in seconds
+        :param factor: growth factor of the delay after each attempt
+        :param jitter: share of the delay that is randomised, between 0 and 1
+        :param rng: random generator, for reproducible delays
+        """
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.factor = factor
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        self.attempts = 0
+
+    def next_delay(self) -> float:
+        """
+        Returns the delay before the next attempt and counts this attempt
+        """
+        # cap the exponent, the delay is capped anyway
+        exponent = min(self.attempts, 64)
+        delay = min(self.max_delay, self.base_delay * self.factor**exponent)
+        self.attempts += 1
+        return delay * (1 - self.jitter * self.rng.random())
+
+    def reset(self) -> None:
+        """
+        Resets the delay to its base value, e.g. once reconnected
+        """
+        self.attempts = 0
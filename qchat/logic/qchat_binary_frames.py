@@ -0,0 +1,149 @@
+"""
+Binary websocket frames carrying heavy QChat payloads.
+
+A binary frame is made of:
+
+- the length of the header, as a 4 bytes big-endian unsigned integer
+- the header: the UTF-8 JSON message, without its heavy field
+- the body: the raw value of the heavy field
+
+The header names the field carried by the body in the 'body' key, so that
+image bytes travel without base64 and GeoJSON without being embedded in text.
+A 'compression' key, if any, names the compression of the body.
+"""
+
+import struct
+from dataclasses import fields
+from typing import Any
+
+from qchat.constants import (
+    QCHAT_MESSAGE_TYPE_CHUNK,
+    QCHAT_MESSAGE_TYPE_GEOJSON,
+    QCHAT_MESSAGE_TYPE_IMAGE,
+)
+from qchat.logic import qchat_json
+from qchat.logic.qchat_compression import (
+    COMPRESSION_ZLIB,
+    compress_if_worth,
+    decompress,
+)
+from qchat.logic.qchat_messages import ENVELOPE_FIELDS, QChatMessage, add_envelope
+
+HEADER_LENGTH = struct.Struct(">I")
+BODY_KEY = "body"
+COMPRESSION_KEY = "compression"
+
+# message field carried by the body of binary frames, by message type
+BINARY_BODY_FIELDS: dict[str, str] = {
+    QCHAT_MESSAGE_TYPE_IMAGE: "image_data",
+    QCHAT_MESSAGE_TYPE_GEOJSON: "geojson",
+    QCHAT_MESSAGE_TYPE_CHUNK: "data",
+}
+
+
+def encode_binary_frame(header: dict[str, Any], body: bytes) -> bytes:
+    """
+    Builds a binary frame from a header and a raw body
+    """
+    header_bytes = qchat_json.dumps_bytes(header)
+    return b"".join((HEADER_LENGTH.pack(len(header_bytes)), header_bytes, body))
+
+
+def decode_binary_frame(data: bytes) -> tuple[dict[str, Any], memoryview]:
+    """
+    Splits a binary frame into its header and its body
+    The body is a view on the frame data, no copy is made
+    :raises ValueError: if the frame is truncated or its header is not a JSON object
+    """
+    view = memoryview(data)
+    if len(view) < HEADER_LENGTH.size:
+        raise ValueError("Truncated binary frame")
+    (header_length,) = HEADER_LENGTH.unpack_from(view)
+    body_start = HEADER_LENGTH.size + header_length
+    if len(view) < body_start:
+        raise ValueError("Truncated binary frame header")
+    header = qchat_json.loads(view[HEADER_LENGTH.size : body_start])
+    if not isinstance(header, dict):
+        raise ValueError("Binary frame header is not a JSON object")
+    return header, view[body_start:]
+
+
+def is_compressed_binary_frame(data: bytes) -> bool:
+    """
+    Tells whether the body of a binary frame is compressed, without parsing
+    its header
+    """
+    if len(data) < HEADER_LENGTH.size:
+        return False
+    (header_length,) = HEADER_LENGTH.unpack_from(data)
+    end = HEADER_LENGTH.size + header_length
+    if end > len(data):
+        return False
+    return data.find(b'"' + COMPRESSION_KEY.encode("ascii") + b'"', 0, end) != -1
+
+
+def can_be_sent_as_binary(message: QChatMessage) -> bool:
+    return message.type in BINARY_BODY_FIELDS
+
+
+def message_to_binary_frame(
+    message: QChatMessage, compression_threshold: int = 0
+) -> bytes:
+    """
+    Encodes an image, GeoJSON or chunk QChat message as a binary frame
+    :param compression_threshold: body size above which it is compressed,
+    if worth it, 0 to never compress
+    :raises KeyError: if the message type has no binary representation
+    """
+    body_field = BINARY_BODY_FIELDS[message.type]
+    header = {
+        f.name: getattr(message, f.name)
+        for f in fields(message)
+        if f.name != body_field and f.name not in ENVELOPE_FIELDS
+    }
+    add_envelope(message, header)
+    header[BODY_KEY] = body_field
+    if body_field == "image_data":
+        body = message.image_bytes
+    elif body_field == "geojson":
+        header["nb_features"] = message.features_count
+        body = message.geojson_bytes
+    else:
+        body = message.data_bytes
+    compressed = compress_if_worth(body, compression_threshold)
+    if compressed is not None:
+        header[COMPRESSION_KEY] = COMPRESSION_ZLIB
+        body = compressed
+    return encode_binary_frame(header, body)
+
+
+def binary_frame_to_wire_dict(data: bytes) -> dict[str, Any]:
+    """
+    Decodes a binary frame into a wire dict
+    The body is kept raw: it is only decoded when the message needs it
+    :raises ValueError: if the frame is invalid or its body field is unknown
+    """
+    header, body = decode_binary_frame(data)
+    return header_to_wire_dict(header, body)
+
+
+def header_to_wire_dict(
+    header: dict[str, Any], body: memoryview, max_body_size: int = 0
+) -> dict[str, Any]:
+    """
+    Builds a wire dict from the split header and body of a binary frame
+    :param max_body_size: maximum size of a decompressed body, 0 for no limit
+    :raises DecompressedSizeExceeded: if the body expands beyond max_body_size
+    :raises ValueError: if the body field or the compression is unknown
+    """
+    body_field = header.pop(BODY_KEY, None)
+    if body_field not in BINARY_BODY_FIELDS.values():
+        raise ValueError(f"Unknown binary frame body field: {body_field}")
+    compression = header.pop(COMPRESSION_KEY, None)
+    if compression == COMPRESSION_ZLIB:
+        header[body_field] = decompress(body, max_body_size)
+    elif compression is None:
+        header[body_field] = bytes(body)
+    else:
+        raise ValueError(f"Unknown binary frame compression: {compression}")
+    return header
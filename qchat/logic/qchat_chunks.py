@@ -0,0 +1,200 @@
+"""
+Chunked transfer of large QChat messages.
+
+The frame of a large message, text or binary, is split into numbered
+'chunk' messages sent one after the other through the send queue, so that
+no single frame exceeds the chunk size: the part of the frame carried by a
+chunk leaves room for the chunk header and, in text frames, for the base64
+encoding of the part. Each chunk names the transfer it
+belongs to, its index, the number of chunks and the CRC-32 of the whole
+frame. Receivers buffer the chunks until the frame is complete and checked,
+then decode it as if it had been received at once.
+"""
+
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Callable, Optional, Union
+from uuid import uuid4
+
+from qchat.constants import QCHAT_MESSAGE_TYPE_CHUNK
+from qchat.logic import qchat_json
+from qchat.logic.qchat_messages import QChatChunkMessage
+
+# bytes buffered for incomplete transfers above which new chunks are dropped
+MAX_BUFFERED_BYTES = 64 * 1024 * 1024
+
+# time after which a transfer without new chunks is dropped, in seconds
+TRANSFER_TIMEOUT = 60.0
+
+# room left in a chunk frame for the fields around its part, besides the author
+CHUNK_HEADER_SIZE = 256
+
+
+def chunk_part_size(chunk_size: int, author: Optional[str], base64_parts: bool) -> int:
+    """
+    Returns the size of the part of a frame carried by each chunk, so that
+    chunk frames, header included, do not exceed the chunk size
+    :param chunk_size: maximum size of a chunk frame, in bytes
+    :param author: author of the message to transfer, if any
+    :param base64_parts: True for text chunk frames, whose parts are base64 encoded
+    """
+    room = chunk_size - CHUNK_HEADER_SIZE - len(qchat_json.dumps_bytes(author))
+    if base64_parts:
+        # 4 base64 characters for every 3 bytes
+        room = room // 4 * 3
+    return max(1, room)
+
+
+def make_chunks(
+    frame: Union[str, bytes],
+    inner_type: str,
+    author: Optional[str],
+    chunk_size: int,
+) -> list[QChatChunkMessage]:
+    """
+    Splits a frame into chunk messages
+    :param frame: text or binary frame of the message to transfer
+    :param inner_type: type of the message to transfer
+    :param author: author of the message to transfer, if any
+    :param chunk_size: maximum size of the part of the frame in each chunk, in bytes
+    """
+    binary = isinstance(frame, bytes)
+    data = frame if binary else frame.encode("utf-8")
+    transfer_id = uuid4().hex
+    checksum = zlib.crc32(data)
+    count = max(1, -(-len(data) // chunk_size))
+    return [
+        QChatChunkMessage(
+            type=QCHAT_MESSAGE_TYPE_CHUNK,
+            transfer_id=transfer_id,
+            index=index,
+            count=count,
+            checksum=checksum,
+            binary=binary,
+            inner_type=inner_type,
+            author=author,
+            data=data[index * chunk_size : (index + 1) * chunk_size],
+        )
+        for index in range(count)
+    ]
+
+
+@dataclass
+class _Transfer:
+    count: int
+    checksum: int
+    binary: bool
+    updated: float
+    parts: dict[int, bytes] = field(default_factory=dict)
+    size: int = 0
+
+
+class QChatChunkReassembler:
+    """
+    Reassembles the frames of chunked transfers, in a bounded buffer
+    Transfers are dropped when the buffer is full or when they time out
+    """
+
+    def __init__(
+        self,
+        max_buffered_bytes: int = MAX_BUFFERED_BYTES,
+        timeout: float = TRANSFER_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param max_buffered_bytes: maximum size of the buffered chunks, in bytes
+        :param timeout: time after which a transfer without new chunks is dropped
+        :param clock: monotonic clock, in seconds
+        """
+        self.max_buffered_bytes = max_buffered_bytes
+        self.timeout = timeout
+        self.clock = clock
+        self.transfers: dict[str, _Transfer] = {}
+        self.buffered_bytes = 0
+        self.completed_total = 0
+        self.dropped_total = 0
+
+    def __len__(self) -> int:
+        return len(self.transfers)
+
+    def add(self, chunk: QChatChunkMessage) -> Optional[Union[str, bytes]]:
+        """
+        Buffers a chunk
+        :return: the frame of the transfer once complete, text or binary
+        :raises ValueError: if the chunk is inconsistent with its transfer, does
+        not fit in the buffer or completes a frame with a wrong checksum.
+        The transfer is dropped
+        """
+        transfer = self.transfers.get(chunk.transfer_id)
+        if transfer is None:
+            transfer = _Transfer(
+                count=chunk.count,
+                checksum=chunk.checksum,
+                binary=chunk.binary,
+                updated=self.clock(),
+            )
+            self.transfers[chunk.transfer_id] = transfer
+        if (
+            chunk.count != transfer.count
+            or chunk.checksum != transfer.checksum
+            or not 0 <= chunk.index < transfer.count
+        ):
+            self.drop(chunk.transfer_id)
+            raise ValueError(f"Inconsistent chunk for transfer {chunk.transfer_id}")
+        data = chunk.data_bytes
+        if chunk.index not in transfer.parts:
+            if self.buffered_bytes + len(data) > self.max_buffered_bytes:
+                self.drop(chunk.transfer_id)
+                raise ValueError(
+                    f"Chunk buffer full, transfer {chunk.transfer_id} dropped"
+                )
+            transfer.parts[chunk.index] = data
+            transfer.size += len(data)
+            self.buffered_bytes += len(data)
+        transfer.updated = self.clock()
+        if len(transfer.parts) < transfer.count:
+            return None
+        frame = b"".join(transfer.parts[index] for index in range(transfer.count))
+        self.drop(chunk.transfer_id, dropped=False)
+        if zlib.crc32(frame) != transfer.checksum:
+            self.dropped_total += 1
+            raise ValueError(f"Wrong checksum for transfer {chunk.transfer_id}")
+        self.completed_total += 1
+        return frame if transfer.binary else frame.decode("utf-8")
+
+    def progress(self, transfer_id: str) -> tuple[int, int]:
+        """
+        Returns the number of chunks received and expected of a transfer
+        """
+        transfer = self.transfers.get(transfer_id)
+        if transfer is None:
+            return 0, 0
+        return len(transfer.parts), transfer.count
+
+    def drop(self, transfer_id: str, dropped: bool = True) -> None:
+        transfer = self.transfers.pop(transfer_id, None)
+        if transfer is None:
+            return
+        self.buffered_bytes -= transfer.size
+        if dropped:
+            self.dropped_total += 1
+
+    def expire(self) -> list[str]:
+        """
+        Drops the transfers without new chunks for longer than the timeout
+        :return: ids of the dropped transfers
+        """
+        deadline = self.clock() - self.timeout
+        expired = [
+            transfer_id
+            for transfer_id, transfer in self.transfers.items()
+            if transfer.updated < deadline
+        ]
+        for transfer_id in expired:
+            self.drop(transfer_id)
+        return expired
+
+    def clear(self) -> None:
+        self.transfers.clear()
+        self.buffered_bytes = 0
@@ -0,0 +1,115 @@
+"""
+Compression of large QChat payloads.
+
+Text frames above the threshold are wrapped in a compressed envelope message:
+
+    {"type": "compressed", "inner_type": "geojson", "compression": "zlib",
+     "data": "<base64 of the zlib compressed JSON text of the inner message>"}
+
+Binary frames keep their header and name the compression of their body in its
+'compression' key, see qchat_binary_frames.
+"""
+
+import base64
+import binascii
+import zlib
+from typing import Any, Optional
+
+from qchat.constants import QCHAT_MESSAGE_TYPE_COMPRESSED
+from qchat.logic import qchat_json
+
+COMPRESSION_ZLIB = "zlib"
+
+# payloads smaller than this are sent as is, in bytes
+COMPRESSION_THRESHOLD = 64 * 1024
+COMPRESSION_LEVEL = 6
+
+# compressed payloads are only sent if at most this ratio of the original size
+MAX_COMPRESSION_RATIO = 0.9
+
+
+class DecompressedSizeExceeded(ValueError):
+    """
+    Raised when a compressed payload expands beyond the allowed size
+    """
+
+
+def compress(data: bytes) -> bytes:
+    return zlib.compress(data, COMPRESSION_LEVEL)
+
+
+def decompress(data: bytes, max_size: int = 0) -> bytes:
+    """
+    Decompresses zlib data, without ever expanding it beyond max_size
+    :param max_size: maximum decompressed size in bytes, 0 for no limit
+    :raises DecompressedSizeExceeded: if the data expands beyond max_size
+    :raises ValueError: if the data is not valid zlib data
+    """
+    decompressor = zlib.decompressobj()
+    try:
+        if max_size > 0:
+            data = decompressor.decompress(data, max_size)
+            if decompressor.unconsumed_tail:
+                raise DecompressedSizeExceeded(
+                    f"Compressed payload expands beyond {max_size} bytes"
+                )
+        else:
+            data = decompressor.decompress(data)
+    except zlib.error as exc:
+        raise ValueError(f"Invalid compressed payload: {exc}") from exc
+    if not decompressor.eof:
+        raise ValueError("Truncated compressed payload")
+    return data
+
+
+def compress_if_worth(
+    data: bytes, threshold: int = COMPRESSION_THRESHOLD
+) -> Optional[bytes]:
+    """
+    Compresses data above the threshold if it shrinks enough
+    :param threshold: minimum size of the data to compress, 0 to never compress
+    :return: compressed data, None if not worth it
+    """
+    if threshold <= 0 or len(data) < threshold:
+        return None
+    compressed = compress(data)
+    if len(compressed) > len(data) * MAX_COMPRESSION_RATIO:
+        return None
+    return compressed
+
+
+def compress_text_frame(
+    text: str, inner_type: str, threshold: int = COMPRESSION_THRESHOLD
+) -> str:
+    """
+    Wraps the JSON text of a message in a compressed envelope if worth it
+    :return: the envelope JSON text, or the original text
+    """
+    compressed = compress_if_worth(text.encode("utf-8"), threshold)
+    if compressed is None:
+        return text
+    return qchat_json.dumps(
+        {
+            "type": QCHAT_MESSAGE_TYPE_COMPRESSED,
+            "inner_type": inner_type,
+            "compression": COMPRESSION_ZLIB,
+            "data": base64.b64encode(compressed).decode("ascii"),
+        }
+    )
+
+
+def decompress_envelope(envelope: dict[str, Any], max_size: int = 0) -> str:
+    """
+    Returns the JSON text of the message wrapped in a compressed envelope
+    :param max_size: maximum decompressed size in bytes, 0 for no limit
+    :raises DecompressedSizeExceeded: if the message expands beyond max_size
+    :raises ValueError: if the envelope is invalid
+    """
+    compression = envelope.get("compression")
+    if compression != COMPRESSION_ZLIB:
+        raise ValueError(f"Unknown compression: {compression}")
+    try:
+        data = base64.b64decode(envelope["data"], validate=True)
+    except (KeyError, TypeError, binascii.Error) as exc:
+        raise ValueError(f"Invalid compressed envelope: {exc}") from exc
+    return decompress(data, max_size).decode("utf-8")
@@ -0,0 +1,220 @@
+from functools import partial
+from typing import Callable, Optional
+
+from qgis.PyQt.QtCore import QObject, pyqtSignal
+
+from qchat.logic.qchat_messages import QChatMessage
+from qchat.logic.qchat_room_history import (
+    ROOM_HISTORY_MAX_BYTES,
+    ROOM_HISTORY_SIZE,
+    QChatRoomHistory,
+)
+from qchat.logic.qchat_string_table import QChatStringTable
+from qchat.logic.qchat_websocket import QChatWebsocket
+
+# number of rooms kept open at once
+MAX_OPEN_ROOMS = 3
+
+
+class QChatConnectionManager(QObject):
+    """
+    Keeps websockets to several rooms of a QChat instance open at once
+    The messages of every room go through a single dispatcher, tagged with
+    their room, and are stored in a bounded history per room, so that
+    displaying another open room needs no new websocket handshake
+    """
+
+    def __init__(
+        self,
+        max_rooms: int = MAX_OPEN_ROOMS,
+        history_size: int = ROOM_HISTORY_SIZE,
+        history_max_bytes: int = ROOM_HISTORY_MAX_BYTES,
+        parent: QObject = None,
+    ):
+        super().__init__(parent)
+        self.max_rooms = max_rooms
+        self.history_size = history_size
+        self.history_max_bytes = history_max_bytes
+        # evict images and layers before text messages
+        self.history_heavy_first = False
+        # websockets by room, the least recently viewed first
+        self.connections: dict[str, QChatWebsocket] = {}
+        self.histories: dict[str, QChatRoomHistory] = {}
+        # rooms whose websocket is connected, or reconnecting
+        self.connected_rooms: set[str] = set()
+        # room displayed in the chat, its messages are not counted as unread
+        self.viewed_room: Optional[str] = None
+        # authors and avatars shared by the messages of all rooms
+        self.string_table = QChatStringTable()
+        # applies the settings and the instance rules to a new websocket
+        self.configure: Optional[Callable[[QChatWebsocket], None]] = None
+        self.evicted_total = 0
+
+    # room and message, for the messages of every room
+    message_received = pyqtSignal(str, QChatMessage)
+    connected = pyqtSignal(str)
+    reconnected = pyqtSignal(str)
+    # room whose connection has been lost for good, or could not be opened
+    disconnected = pyqtSignal(str)
+    error = pyqtSignal(str, int)
+    # room, attempt number and delay before it, in seconds
+    reconnect_scheduled = pyqtSignal(str, int, float)
+    # room whose round-trip time or outgoing queue has changed
+    status_changed = pyqtSignal(str)
+    # room, transfer id, number of chunks sent or received and number of chunks
+    transfer_progress = pyqtSignal(str, str, int, int)
+    # room closed to open another one, above the maximum number of open rooms
+    room_evicted = pyqtSignal(str)
+
+    @property
+    def rooms(self) -> list[str]:
+        return list(self.connections)
+
+    def connection(self, room: Optional[str]) -> Optional[QChatWebsocket]:
+        return self.connections.get(room)
+
+    def history(self, room: Optional[str]) -> Optional[QChatRoomHistory]:
+        return self.histories.get(room)
+
+    def is_connected(self, room: Optional[str]) -> bool:
+        return room in self.connected_rooms
+
+    @property
+    def unread_total(self) -> int:
+        """
+        Number of unread messages in the rooms which are not displayed
+        """
+        return sum(history.unread for history in self.histories.values())
+
+    @property
+    def history_total(self) -> int:
+        """
+        Number of messages stored in the histories of all rooms
+        """
+        return sum(len(history) for history in self.histories.values())
+
+    @property
+    def history_bytes(self) -> int:
+        """
+        Approximate number of bytes held by the histories of all rooms
+        """
+        return sum(history.nbytes for history in self.histories.values())
+
+    @property
+    def history_dropped_total(self) -> int:
+        return sum(history.dropped_total for history in self.histories.values())
+
+    def new_history(self) -> QChatRoomHistory:
+        return QChatRoomHistory(
+            self.history_size, self.history_max_bytes, self.history_heavy_first
+        )
+
+    def open(self, qchat_instance_uri: str, room: str) -> QChatWebsocket:
+        """
+        Opens a websocket to a room, unless one is already open
+        The least recently viewed room is closed if too many rooms are open
+        :param qchat_instance_uri: URI of the QChat instance to connect to
+        :param room: room to connect to
+        """
+        qchat_ws = self.connections.get(room)
+        if qchat_ws is not None:
+            return qchat_ws
+        while self.connections and len(self.connections) >= max(1, self.max_rooms):
+            evicted = next(iter(self.connections))
+            self.close(evicted)
+            self.evicted_total += 1
+            self.room_evicted.emit(evicted)
+
+        qchat_ws = QChatWebsocket(self.string_table)
+        if self.configure:
+            self.configure(qchat_ws)
+        qchat_ws.message_received.connect(partial(self.on_message_received, room))
+        qchat_ws.connected.connect(partial(self.on_connected, room))
+        qchat_ws.reconnected.connect(partial(self.on_reconnected, room))
+        qchat_ws.disconnected.connect(partial(self.on_disconnected, room))
+        qchat_ws.error.connect(partial(self.error.emit, room))
+        qchat_ws.reconnect_scheduled.connect(
+            partial(self.reconnect_scheduled.emit, room)
+        )
+        qchat_ws.rtt_measured.connect(partial(self.on_status_changed, room))
+        qchat_ws.send_queue_changed.connect(partial(self.on_status_changed, room))
+        qchat_ws.chunks_sent.connect(partial(self.transfer_progress.emit, room))
+        qchat_ws.chunks_received.connect(partial(self.transfer_progress.emit, room))
+        self.connections[room] = qchat_ws
+        self.histories[room] = self.new_history()
+        qchat_ws.open(qchat_instance_uri, room)
+        return qchat_ws
+
+    def view(self, room: Optional[str]) -> None:
+        """
+        Marks a room as displayed: its unread messages are cleared and
+        it becomes the last room to be closed to open another one
+        """
+        self.viewed_room = room
+        qchat_ws = self.connections.pop(room, None)
+        if qchat_ws is None:
+            return
+        self.connections[room] = qchat_ws
+        self.histories[room].unread = 0
+
+    def close(self, room: Optional[str]) -> None:
+        """
+        Closes the websocket of a room and drops its history
+        A room closed on purpose emits no signal
+        """
+        self.histories.pop(room, None)
+        self.connected_rooms.discard(room)
+        qchat_ws = self.connections.pop(room, None)
+        if qchat_ws is None:
+            return
+        qchat_ws.blockSignals(True)
+        qchat_ws.close()
+        qchat_ws.shutdown()
+        qchat_ws.payload_guard.cleanup()
+        qchat_ws.deleteLater()
+
+    def shutdown(self) -> None:
+        """
+        Closes the websockets of all rooms
+        """
+        for room in self.rooms:
+            self.close(room)
+        self.string_table.clear()
+
+    def reconfigure(self) -> None:
+        """
+        Applies the settings and the instance rules to the open websockets again
+        """
+        for qchat_ws in self.connections.values():
+            if self.configure:
+                self.configure(qchat_ws)
+        for history in self.histories.values():
+            history.set_limits(
+                self.history_size, self.history_max_bytes, self.history_heavy_first
+            )
+
+    def on_message_received(self, room: str, message: QChatMessage) -> None:
+        history = self.histories.get(room)
+        if history is None:
+            return
+        history.add(message, unread=room != self.viewed_room)
+        self.message_received.emit(room, message)
+
+    def on_connected(self, room: str) -> None:
+        self.connected_rooms.add(room)
+        self.connected.emit(room)
+
+    def on_reconnected(self, room: str) -> None:
+        self.connected_rooms.add(room)
+        self.reconnected.emit(room)
+
+    def on_disconnected(self, room: str) -> None:
+        """
+        Launched when the connection to a room is lost for good
+        The room is closed, so that it is opened again when selected
+        """
+        self.close(room)
+        self.disconnected.emit(room)
+
+    def on_status_changed(self, room: str, *args) -> None:
+        self.status_changed.emit(room)
@@ -0,0 +1,130 @@
+"""
+Lifecycle of the connection of a QChat websocket.
+
+The connection goes through explicit states, so that opening, closing and
+reconnecting never run twice, whatever the order of the socket signals:
+
+- idle: no connection, nothing pending
+- connecting: the handshake is in progress
+- open: connected, messages can be sent
+- closing: closed on purpose, waiting for the socket to be disconnected
+- backoff: the connection has been lost, a reconnection is scheduled
+
+The time spent in each state before every transition is recorded,
+for diagnostics such as the handshake time.
+"""
+
+import time
+from collections import deque
+from enum import Enum
+from typing import Callable
+
+from qchat.logic.qchat_stats import RollingStats
+
+
+class QChatConnectionState(Enum):
+    IDLE = "idle"
+    CONNECTING = "connecting"
+    OPEN = "open"
+    CLOSING = "closing"
+    BACKOFF = "backoff"
+
+
+# states reachable from each state
+ALLOWED_TRANSITIONS: dict[QChatConnectionState, tuple[QChatConnectionState, ...]] = {
+    # opened
+    QChatConnectionState.IDLE: (QChatConnectionState.CONNECTING,),
+    # handshake done, failed, or closed on purpose
+    QChatConnectionState.CONNECTING: (
+        QChatConnectionState.OPEN,
+        QChatConnectionState.IDLE,
+        QChatConnectionState.BACKOFF,
+        QChatConnectionState.CLOSING,
+    ),
+    # closed on purpose, or lost with or without reconnection
+    QChatConnectionState.OPEN: (
+        QChatConnectionState.CLOSING,
+        QChatConnectionState.IDLE,
+        QChatConnectionState.BACKOFF,
+    ),
+    # socket disconnected
+    QChatConnectionState.CLOSING: (QChatConnectionState.IDLE,),
+    # reconnection attempt, or closed on purpose
+    QChatConnectionState.BACKOFF: (
+        QChatConnectionState.CONNECTING,
+        QChatConnectionState.IDLE,
+    ),
+}
+
+
+class QChatInvalidTransition(ValueError):
+    """
+    Raised when a transition is not allowed from the current state
+    """
+
+
+class QChatConnectionStateMachine:
+    """
+    Current state of a connection and timings of its transitions
+    """
+
+    def __init__(self, maxlen: int = 100, clock: Callable[[], float] = time.monotonic):
+        """
+        :param maxlen: number of transitions kept, in the history and per statistics
+        :param clock: monotonic clock, in seconds
+        """
+        self.clock = clock
+        self.maxlen = maxlen
+        self.state = QChatConnectionState.IDLE
+        self.entered_at = clock()
+        self.transitions_total = 0
+        # last transitions: previous state, new state and time spent in the previous one
+        self.history: deque[
+            tuple[QChatConnectionState, QChatConnectionState, float]
+        ] = deque(maxlen=maxlen)
+        # time spent in a state before leaving it for another, in seconds
+        self.durations: dict[
+            tuple[QChatConnectionState, QChatConnectionState], RollingStats
+        ] = {}
+
+    @property
+    def time_in_state(self) -> float:
+        """
+        Time spent in the current state, in seconds
+        """
+        return self.clock() - self.entered_at
+
+    def can_transition(self, state: QChatConnectionState) -> bool:
+        return state in ALLOWED_TRANSITIONS[self.state]
+
+    def transition(self, state: QChatConnectionState) -> float:
+        """
+        Moves to a new state
+        :return: time spent in the previous state, in seconds
+        :raises QChatInvalidTransition: if the new state cannot be reached
+        from the current one
+        """
+        if not self.can_transition(state):
+            raise QChatInvalidTransition(
+                f"Invalid connection transition: {self.state.value} -> {state.value}"
+            )
+        now = self.clock()
+        elapsed = now - self.entered_at
+        key = (self.state, state)
+        if key not in self.durations:
+            self.durations[key] = RollingStats(maxlen=self.maxlen)
+        self.durations[key].add(elapsed)
+        self.history.append((self.state, state, elapsed))
+        self.transitions_total += 1
+        self.state = state
+        self.entered_at = now
+        return elapsed
+
+    def stats(
+        self, from_state: QChatConnectionState, to_state: QChatConnectionState
+    ) -> RollingStats:
+        """
+        Returns the statistics of the time spent in a state before moving
+        to another one, e.g. connecting to open for the handshake time
+        """
+        return self.durations.get((from_state, to_state)) or RollingStats(maxlen=1)
@@ -0,0 +1,110 @@
+"""
+Cache of decoded payloads, keyed by the hash of their content.
+
+The same image is often posted again in a room. Its decoded versions are
+looked up by the hash of its bytes, so that a repost costs no decoding
+and no memory. Entries are evicted least recently used first once their
+total size exceeds the memory budget.
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+# memory budget of a cache, in bytes
+CONTENT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+
+def content_key(data: bytes) -> str:
+    """
+    Returns the key of a payload, the hash of its bytes
+    """
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class QChatContentCache:
+    """
+    Values under a memory budget, the least recently used are evicted first
+    Values larger than the whole budget are not stored
+    Only the thread owning the cache may change it, membership checks are
+    single dict lookups and can be done from a worker thread
+    """
+
+    def __init__(self, max_bytes: int = CONTENT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        # (value, size) by key, the least recently used first
+        self.entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted_total = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.entries
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key: Hashable, count: bool = True) -> Optional[Any]:
+        """
+        Returns the value of a key, None if it is not cached
+        :param count: False not to count the lookup in the hit rate,
+        e.g. for checks done on every paint
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            if count:
+                self.misses += 1
+            return None
+        if count:
+            self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def count_lookup(self, hit: bool) -> None:
+        """
+        Counts a lookup done without get, e.g. a membership check done
+        in a worker thread
+        """
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def put(self, key: Hashable, value: Any, size: int) -> bool:
+        """
+        Stores a value, evicting the least recently used ones if needed
+        :param size: approximate number of bytes held by the value
+        :return: False if the value is larger than the budget and was not stored
+        """
+        self.discard(key)
+        if size > self.max_bytes:
+            return False
+        self.entries[key] = (value, size)
+        self.nbytes += size
+        self.evict()
+        return True
+
+    def discard(self, key: Hashable) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry[1]
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.evict()
+
+    def evict(self) -> None:
+        while self.nbytes > self.max_bytes:
+            _, (_, size) = self.entries.popitem(last=False)
+            self.nbytes -= size
+            self.evicted_total += 1
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.nbytes = 0
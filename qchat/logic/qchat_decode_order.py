@@ -0,0 +1,80 @@
+"""
+Order of the frames decoded in a worker thread.
+
+Frames handed to the worker thread are decoded one after the other, but a
+frame reassembled from chunks is only known once its last chunk has been
+decoded, while the following frames may already be queued in the worker.
+Each frame reserves a slot when it is handed to the worker. The decoded
+messages are released in the order of their slots, and the frame of a
+completed transfer takes the slot right after its last chunk.
+"""
+
+from collections import deque
+from typing import Any, Iterator
+
+
+class DecodeSlot:
+    """
+    Place of a frame in the order of the decoded messages
+    """
+
+    __slots__ = ("result", "done", "cancelled")
+
+    def __init__(self):
+        self.result: Any = None
+        self.done = False
+        self.cancelled = False
+
+
+class QChatDecodeOrder:
+    """
+    Slots of the frames being decoded, the oldest first
+    Results are released once all the slots before theirs are complete
+    """
+
+    def __init__(self):
+        self.slots: deque[DecodeSlot] = deque()
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def reserve(self, first: bool = False) -> DecodeSlot:
+        """
+        Reserves the slot of a frame handed to the worker
+        :param first: True to release the frame before the ones already
+        reserved, e.g. the frame of a transfer whose last chunk is being released
+        """
+        slot = DecodeSlot()
+        if first:
+            self.slots.appendleft(slot)
+        else:
+            self.slots.append(slot)
+        return slot
+
+    def complete(self, slot: DecodeSlot, result: Any) -> bool:
+        """
+        Stores the result of a decoded frame
+        :return: False if the slot has been cancelled meanwhile, the result
+        is then not released
+        """
+        if slot.cancelled:
+            return False
+        slot.result = result
+        slot.done = True
+        return True
+
+    def release(self) -> Iterator[Any]:
+        """
+        Yields the results whose slots are first in order, one at a time:
+        a slot reserved first while releasing them holds the next ones back
+        """
+        while self.slots and self.slots[0].done:
+            yield self.slots.popleft().result
+
+    def clear(self) -> None:
+        """
+        Cancels the slots, e.g. when the worker thread is stopped
+        """
+        for slot in self.slots:
+            slot.cancelled = True
+        self.slots.clear()
@@ -0,0 +1,34 @@
+from collections.abc import Hashable
+
+
+class RecentlySeen:
+    """
+    Bounded set of the most recently seen keys, e.g. message ids
+    Lookups and insertions are O(1), the oldest key is dropped when full
+    """
+
+    def __init__(self, maxlen: int = 1000):
+        self.maxlen = maxlen
+        # dicts keep insertion order: the first key is the oldest one
+        self._keys: dict[Hashable, None] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._keys
+
+    def add(self, key: Hashable) -> bool:
+        """
+        Adds a key to the set
+        :return: True if the key is new, False if it has been seen recently
+        """
+        if key in self._keys:
+            return False
+        self._keys[key] = None
+        if len(self._keys) > self.maxlen:
+            del self._keys[next(iter(self._keys))]
+        return True
+
+    def clear(self) -> None:
+        self._keys.clear()
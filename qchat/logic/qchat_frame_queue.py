@@ -0,0 +1,89 @@
+"""
+Queue of the updates of the chat view, run frame by frame.
+
+A burst of messages turns into many insertions, scrolls and title updates.
+Updates are queued and run once per frame within a time budget, the
+remaining ones are carried over to the next frame. Updates only worth
+doing once per frame, e.g. scrolling to the last message, are coalesced.
+"""
+
+import time
+from collections import deque
+from typing import Callable, Hashable
+
+from qchat.logic.qchat_stats import RollingStats
+
+# duration of a frame, in milliseconds
+FRAME_INTERVAL_MS = 16
+
+# part of a frame given to the updates of the chat, in milliseconds
+FRAME_BUDGET_MS = 8
+
+
+class QChatFrameQueue:
+    """
+    Updates run in their order within a time budget per frame, at least one
+    per frame so that the queue always drains
+    Coalesced updates run once at the end of every frame, after the others,
+    the last one posted under a key replacing the previous ones
+    Updates posting coalesced ones, e.g. an insertion followed by a scroll,
+    have them run at the end of their own frame
+    """
+
+    def __init__(
+        self,
+        budget_ms: int = FRAME_BUDGET_MS,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        """
+        :param budget_ms: time given to the updates in each frame, in milliseconds
+        :param clock: monotonic clock, in seconds
+        """
+        self.budget_ms = budget_ms
+        self.clock = clock
+        self.tasks: deque[Callable[[], None]] = deque()
+        self.coalesced: dict[Hashable, Callable[[], None]] = {}
+        self.frame_stats = RollingStats()
+        self.tasks_total = 0
+        self.coalesced_total = 0
+        # frames which left updates to the next one
+        self.carried_over_total = 0
+
+    def __len__(self) -> int:
+        return len(self.tasks) + len(self.coalesced)
+
+    def post(self, task: Callable[[], None]) -> None:
+        self.tasks.append(task)
+
+    def post_coalesced(self, key: Hashable, task: Callable[[], None]) -> None:
+        if key in self.coalesced:
+            self.coalesced_total += 1
+        self.coalesced[key] = task
+
+    def run_frame(self) -> bool:
+        """
+        Runs the updates of a frame
+        :return: True if updates are left for the next frame
+        """
+        start = self.clock()
+        deadline = start + self.budget_ms / 1000
+        while self.tasks:
+            self.tasks.popleft()()
+            self.tasks_total += 1
+            if self.clock() >= deadline:
+                break
+        coalesced, self.coalesced = self.coalesced, {}
+        for task in coalesced.values():
+            task()
+        self.frame_stats.add(self.clock() - start)
+        if self.tasks:
+            self.carried_over_total += 1
+            return True
+        return False
+
+    def clear(self) -> None:
+        """
+        Drops the pending updates, e.g. when the chat is cleared
+        """
+        self.tasks.clear()
+        self.coalesced.clear()
@@ -0,0 +1,69 @@
+from typing import Optional
+
+from qchat.logic.qchat_stats import RollingStats
+
+
+class Heartbeat:
+    """
+    Round-trip time and dead peer detection of a connection, from its pings
+    A ping sent while the previous one is still unanswered counts a missed
+    pong, the connection is considered dead after too many consecutive ones
+    The round-trip time is smoothed as TCP does, so that a single slow pong
+    does not make it jump
+    """
+
+    def __init__(
+        self, max_missed_pongs: int = 3, smoothing: float = 0.125, maxlen: int = 100
+    ):
+        """
+        :param max_missed_pongs: number of consecutive pings without pong
+        after which the connection is considered dead
+        :param smoothing: weight of the last round-trip time in the smoothed one,
+        between 0 and 1
+        :param maxlen: number of round-trip times kept for the statistics
+        """
+        self.max_missed_pongs = max(1, max_missed_pongs)
+        self.smoothing = smoothing
+        self.awaiting_pong = False
+        self.missed_pongs = 0
+        self.smoothed_rtt: Optional[float] = None
+        self.rtt_stats = RollingStats(maxlen=maxlen)
+        self.dead_total = 0
+
+    def ping(self) -> bool:
+        """
+        Counts a ping about to be sent
+        :return: False if too many pongs are missing, the connection being
+        considered dead the ping is not to be sent
+        """
+        if self.awaiting_pong:
+            self.missed_pongs += 1
+            if self.missed_pongs >= self.max_missed_pongs:
+                self.dead_total += 1
+                self.reset()
+                return False
+        self.awaiting_pong = True
+        return True
+
+    def pong(self, rtt: float) -> float:
+        """
+        Counts a received pong
+        :param rtt: round-trip time, in milliseconds
+        :return: the smoothed round-trip time, in milliseconds
+        """
+        self.awaiting_pong = False
+        self.missed_pongs = 0
+        self.rtt_stats.add(rtt)
+        if self.smoothed_rtt is None:
+            self.smoothed_rtt = float(rtt)
+        else:
+            self.smoothed_rtt += self.smoothing * (rtt - self.smoothed_rtt)
+        return self.smoothed_rtt
+
+    def reset(self) -> None:
+        """
+        Forgets the pending ping, e.g. when the connection is opened or closed
+        The round-trip times are kept
+        """
+        self.awaiting_pong = False
+        self.missed_pongs = 0
@@ -0,0 +1,165 @@
+"""
+JSON codec used for QChat messages and API responses.
+
+The fastest available backend is picked at import: orjson if installed,
+the standard library json module otherwise.
+"""
+
+import dataclasses
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JsonInput = Union[str, bytes, bytearray, memoryview]
+
+
+def to_serialisable(o: Any) -> dict[str, Any]:
+    """
+    Shallow dict of an object the JSON backends do not know, without copying
+    nested values: QChat messages provide their wire dict, other dataclasses
+    their fields. Values cached on a message, e.g. lazily decoded payloads,
+    are not fields and thus are not serialised
+    :raises TypeError: if the object is not serialisable
+    """
+    to_wire_dict = getattr(o, "to_wire_dict", None)
+    if to_wire_dict is not None:
+        return to_wire_dict()
+    if dataclasses.is_dataclass(o):
+        return {f.name: getattr(o, f.name) for f in dataclasses.fields(o)}
+    raise TypeError(f"Type is not JSON serializable: {type(o).__name__}")
+
+
+class EnhancedJSONEncoder(json.JSONEncoder):
+    """
+    Custom JSON encoder for dataclass objects
+    """
+
+    def default(self, o):
+        try:
+            return to_serialisable(o)
+        except TypeError:
+            return super().default(o)
+
+
+class JsonCodec(ABC):
+    """
+    JSON codec interface
+    Dataclass instances, e.g. QChat messages, must be serialisable
+    """
+
+    name: str
+
+    @abstractmethod
+    def loads(self, data: JsonInput) -> Any:
+        """
+        Decodes a JSON document, from text or directly from UTF-8 bytes
+        """
+
+    @abstractmethod
+    def dumps(self, obj: Any) -> str:
+        """
+        Encodes an object as a JSON text
+        """
+
+    @abstractmethod
+    def dumps_bytes(self, obj: Any) -> bytes:
+        """
+        Encodes an object as UTF-8 JSON bytes
+        """
+
+
+class StdlibJsonCodec(JsonCodec):
+    """
+    JSON codec based on the standard library json module
+    """
+
+    name = "json"
+
+    def loads(self, data: JsonInput) -> Any:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj, cls=EnhancedJSONEncoder)
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        return self.dumps(obj).encode("utf-8")
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    JSON codec based on orjson
+    """
+
+    name = "orjson"
+
+    def loads(self, data: JsonInput) -> Any:
+        return orjson.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return self.dumps_bytes(obj).decode("utf-8")
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        return orjson.dumps(
+            obj, default=to_serialisable, option=orjson.OPT_PASSTHROUGH_DATACLASS
+        )
+
+
+JSON_CODECS: dict[str, type] = {StdlibJsonCodec.name: StdlibJsonCodec}
+if orjson is not None:
+    JSON_CODECS[OrjsonCodec.name] = OrjsonCodec
+
+_codec: JsonCodec = (
+    OrjsonCodec() if OrjsonCodec.name in JSON_CODECS else StdlibJsonCodec()
+)
+
+
+def available_codecs() -> list[str]:
+    """
+    Returns the names of the available JSON backends
+    """
+    return list(JSON_CODECS)
+
+
+def get_codec() -> JsonCodec:
+    """
+    Returns the JSON codec currently in use
+    """
+    return _codec
+
+
+def set_codec(name: str) -> None:
+    """
+    Sets the JSON codec to use
+    :param name: name of the backend, one of available_codecs()
+    :raises KeyError: if the backend is not available
+    """
+    global _codec
+    _codec = JSON_CODECS[name]()
+
+
+def loads(data: JsonInput) -> Any:
+    """
+    Decodes a JSON document, from text or directly from UTF-8 bytes
+    """
+    return _codec.loads(data)
+
+
+def dumps(obj: Any) -> str:
+    """
+    Encodes an object as a JSON text
+    """
+    return _codec.dumps(obj)
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """
+    Encodes an object as UTF-8 JSON bytes
+    """
+    return _codec.dumps_bytes(obj)
@@ -0,0 +1,53 @@
+from qgis.PyQt.QtCore import QObject, QTimer, pyqtSignal
+
+from qchat.logic.qchat_messages import QChatMessage
+
+
+class QChatMessageBatcher(QObject):
+    """
+    Collects received QChat messages and emits them as batches
+    A batch is emitted once per event loop iteration, or once per window
+    if a window duration is set, so that bursts are handled in one pass
+    """
+
+    def __init__(self, window_ms: int = 0, parent: QObject = None):
+        super().__init__(parent)
+        self.pending: list[QChatMessage] = []
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+        self.set_window(window_ms)
+
+    batch_ready = pyqtSignal(list)
+
+    def set_window(self, window_ms: int) -> None:
+        """
+        Sets the duration during which messages are collected before being emitted
+        :param window_ms: window duration in milliseconds, 0 for one event loop tick
+        """
+        self.timer.setInterval(max(0, window_ms))
+
+    def add(self, message: QChatMessage) -> None:
+        """
+        Adds a message to the current batch, starting it if needed
+        """
+        self.pending.append(message)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self) -> None:
+        """
+        Emits the pending messages right away, in their reception order
+        """
+        self.timer.stop()
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        self.batch_ready.emit(batch)
+
+    def clear(self) -> None:
+        """
+        Drops the pending messages
+        """
+        self.timer.stop()
+        self.pending = []
@@ -0,0 +1,184 @@
+from dataclasses import MISSING, fields
+from typing import Any, Callable, Optional
+
+from qchat.constants import (
+    QCHAT_MESSAGE_TYPE_BBOX,
+    QCHAT_MESSAGE_TYPE_CHUNK,
+    QCHAT_MESSAGE_TYPE_CRS,
+    QCHAT_MESSAGE_TYPE_EXITER,
+    QCHAT_MESSAGE_TYPE_GEOJSON,
+    QCHAT_MESSAGE_TYPE_IMAGE,
+    QCHAT_MESSAGE_TYPE_LIKE,
+    QCHAT_MESSAGE_TYPE_NB_USERS,
+    QCHAT_MESSAGE_TYPE_NEWCOMER,
+    QCHAT_MESSAGE_TYPE_TEXT,
+    QCHAT_MESSAGE_TYPE_UNCOMPLIANT,
+)
+from qchat.logic.qchat_messages import (
+    QChatBboxMessage,
+    QChatChunkMessage,
+    QChatCrsMessage,
+    QChatExiterMessage,
+    QChatGeojsonMessage,
+    QChatImageMessage,
+    QChatLikeMessage,
+    QChatMessage,
+    QChatNbUsersMessage,
+    QChatNewcomerMessage,
+    QChatTextMessage,
+    QChatUncompliantMessage,
+)
+
+MessageDecoder = Callable[[dict[str, Any]], QChatMessage]
+MessageHandler = Callable[[QChatMessage], None]
+
+# message classes of the QChat protocol, by message type
+QCHAT_MESSAGE_CLASSES: dict[str, type] = {
+    QCHAT_MESSAGE_TYPE_UNCOMPLIANT: QChatUncompliantMessage,
+    QCHAT_MESSAGE_TYPE_TEXT: QChatTextMessage,
+    QCHAT_MESSAGE_TYPE_IMAGE: QChatImageMessage,
+    QCHAT_MESSAGE_TYPE_NB_USERS: QChatNbUsersMessage,
+    QCHAT_MESSAGE_TYPE_NEWCOMER: QChatNewcomerMessage,
+    QCHAT_MESSAGE_TYPE_EXITER: QChatExiterMessage,
+    QCHAT_MESSAGE_TYPE_LIKE: QChatLikeMessage,
+    QCHAT_MESSAGE_TYPE_GEOJSON: QChatGeojsonMessage,
+    QCHAT_MESSAGE_TYPE_CRS: QChatCrsMessage,
+    QCHAT_MESSAGE_TYPE_BBOX: QChatBboxMessage,
+    QCHAT_MESSAGE_TYPE_CHUNK: QChatChunkMessage,
+}
+
+
+def dataclass_decoder(message_class: type) -> MessageDecoder:
+    """
+    Builds a decoder instantiating a QChat message dataclass from a wire dict
+    Missing required fields are reported as a KeyError naming them and unknown
+    keys are ignored, so that a newer server version does not break older clients
+    :param message_class: QChat message dataclass to instantiate
+    :return: decoder function
+    """
+    class_fields = fields(message_class)
+    names = frozenset(f.name for f in class_fields)
+    required = frozenset(
+        f.name
+        for f in class_fields
+        if f.default is MISSING and f.default_factory is MISSING
+    )
+
+    def decode(message: dict[str, Any]) -> QChatMessage:
+        # the generated __init__ rejects missing and unknown keyword arguments
+        # before building anything: only inspect the keys when it does
+        try:
+            return message_class(**message)
+        except TypeError:
+            keys = message.keys()
+            if not required <= keys:
+                missing = ", ".join(sorted(required - keys))
+                raise KeyError(
+                    f"Missing field(s) for {message_class.__name__}: {missing}"
+                ) from None
+            if keys <= names:
+                raise
+            return message_class(**{k: v for k, v in message.items() if k in names})
+
+    return decode
+
+
+class QChatMessageRegistry:
+    """
+    Registry mapping each QChat message type to its decoder and its handler
+    Lookups are dict based, whatever the number of registered types
+    """
+
+    def __init__(self):
+        self._decoders: dict[str, MessageDecoder] = {}
+        self._handlers: dict[str, MessageHandler] = {}
+
+    def register(
+        self,
+        message_type: str,
+        decoder: MessageDecoder,
+        handler: Optional[MessageHandler] = None,
+    ) -> None:
+        """
+        Registers a message type, replacing any previous registration
+        :param message_type: value of the 'type' key of the wire message
+        :param decoder: callable building a QChatMessage from the wire dict
+        :param handler: callable receiving the decoded message, if any
+        """
+        self._decoders[message_type] = decoder
+        if handler:
+            self._handlers[message_type] = handler
+        else:
+            self._handlers.pop(message_type, None)
+
+    def set_handler(self, message_type: str, handler: MessageHandler) -> None:
+        """
+        Sets the handler of an already registered message type
+        :raises KeyError: if the message type is not registered
+        """
+        if message_type not in self._decoders:
+            raise KeyError(f"Message type '{message_type}' is not registered")
+        self._handlers[message_type] = handler
+
+    def unregister(self, message_type: str) -> None:
+        """
+        Unregisters a message type. Does nothing if it was not registered
+        """
+        self._decoders.pop(message_type, None)
+        self._handlers.pop(message_type, None)
+
+    def is_registered(self, message_type: str) -> bool:
+        return message_type in self._decoders
+
+    @property
+    def message_types(self) -> list[str]:
+        return list(self._decoders)
+
+    def decode(self, message: dict[str, Any]) -> Optional[QChatMessage]:
+        """
+        Decodes a wire dict into a QChatMessage
+        :return: decoded message, None if its type is not registered
+        :raises KeyError: if the message has no type or misses a required field
+        """
+        decoder = self._decoders.get(message["type"])
+        if decoder is None:
+            return None
+        return decoder(message)
+
+    def handle(self, message: dict[str, Any]) -> Optional[QChatMessage]:
+        """
+        Decodes a wire dict and hands the result to its handler
+        :return: decoded message, None if its type is not registered
+        :raises KeyError: if the message has no type or misses a required field
+        """
+        message_type = message["type"]
+        decoder = self._decoders.get(message_type)
+        if decoder is None:
+            return None
+        decoded = decoder(message)
+        handler = self._handlers.get(message_type)
+        if handler is not None:
+            handler(decoded)
+        return decoded
+
+    def dispatch(self, message: QChatMessage) -> bool:
+        """
+        Hands a decoded message to the handler registered for its type
+        :return: True if a handler has been called
+        """
+        handler = self._handlers.get(message.type)
+        if handler is None:
+            return False
+        handler(message)
+        return True
+
+
+def default_message_registry() -> QChatMessageRegistry:
+    """
+    Returns a registry holding the decoders of the QChat protocol message types
+    No handler is registered
+    """
+    registry = QChatMessageRegistry()
+    for message_type, message_class in QCHAT_MESSAGE_CLASSES.items():
+        registry.register(message_type, dataclass_decoder(message_class))
+    return registry
@@ -1,53 +1,200 @@
-from dataclasses import dataclass
-from typing import Optional
+import base64
+import re
+from dataclasses import MISSING, dataclass, field, fields
+from typing import Any, Callable, Optional, Union
 
+from qchat.logic import qchat_json
 
+
+def _frozen_getstate(self) -> list:
+    return [getattr(self, f.name) for f in fields(self)]
+
+
+def _frozen_setstate(self, state: list) -> None:
+    # frozen __setattr__ forbids assignment, also when copying or unpickling
+    for f, value in zip(fields(self), state):
+        object.__setattr__(self, f.name, value)
+
+
+def slotted(*cache_slots: str) -> Callable[[type], type]:
+    """
+    Rebuilds a frozen dataclass with __slots__ and no per-instance __dict__,
+    as dataclass(slots=True) does from Python 3.10 on
+    Every class of a hierarchy must be slotted for instances to have no __dict__
+    :param cache_slots: extra slots, e.g. for lazily decoded values
+    """
+
+    def wrap(cls: type) -> type:
+        inherited = {
+            name for base in cls.__mro__[1:] for name in getattr(base, "__slots__", ())
+        }
+        slots = tuple(f.name for f in fields(cls) if f.name not in inherited)
+        cls_dict = dict(cls.__dict__)
+        # default values are class attributes: they would shadow the slots
+        for name in slots:
+            cls_dict.pop(name, None)
+        cls_dict.pop("__dict__", None)
+        cls_dict.pop("__weakref__", None)
+        cls_dict["__slots__"] = slots + cache_slots
+        cls_dict.setdefault("__getstate__", _frozen_getstate)
+        cls_dict.setdefault("__setstate__", _frozen_setstate)
+        slotted_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+        slotted_cls.__qualname__ = cls.__qualname__
+        return slotted_cls
+
+    return wrap
+
+
+# optional fields of the messages sent by clients: unique id and send time,
+# in seconds since epoch. They are left out of the wire dict when unset
+ENVELOPE_FIELDS = ("id", "timestamp")
+
+
+def add_envelope(message: "QChatMessage", wire: dict[str, Any]) -> dict[str, Any]:
+    """
+    Adds the envelope fields set on a message to its wire dict
+    """
+    for name in ENVELOPE_FIELDS:
+        value = getattr(message, name, None)
+        if value is not None:
+            wire[name] = value
+    return wire
+
+
+@slotted("_received_at", "_wire_size")
 @dataclass(init=True, frozen=True)
 class QChatMessage:
     type: str
 
+    @property
+    def wire_size(self) -> Optional[int]:
+        """
+        Length of the frame the message has been decoded from, set by the
+        decoder so that its size in memory is known without walking it,
+        None for local messages
+        """
+        return getattr(self, "_wire_size", None)
 
+    def set_wire_size(self, wire_size: int) -> None:
+        object.__setattr__(self, "_wire_size", wire_size)
+
+    @property
+    def received_at(self) -> Optional[float]:
+        """
+        Time the message has been received at, in seconds since epoch,
+        None until it is stored in the history of a room
+        """
+        return getattr(self, "_received_at", None)
+
+    def set_received_at(self, received_at: Optional[float]) -> None:
+        object.__setattr__(self, "_received_at", received_at)
+
+    def to_wire_dict(self) -> dict[str, Any]:
+        """
+        Returns the wire representation of the message
+        Values are not copied: nested objects are shared with the message
+        """
+        wire = {
+            f.name: getattr(self, f.name)
+            for f in fields(self)
+            if f.name not in ENVELOPE_FIELDS
+        }
+        return add_envelope(self, wire)
+
+    def to_json(self) -> str:
+        """
+        Encodes the message as the JSON text of a text frame, in a single pass
+        """
+        return qchat_json.dumps(self.to_wire_dict())
+
+
+@slotted()
 @dataclass(init=True, frozen=True)
 class QChatUncompliantMessage(QChatMessage):
     reason: str
+    id: Optional[str] = None
+    timestamp: Optional[float] = None
 
 
+@slotted()
 @dataclass(init=True, frozen=True)
 class QChatTextMessage(QChatMessage):
     author: str
     avatar: Optional[str]
     text: str
+    id: Optional[str] = None
+    timestamp: Optional[float] = None
 
 
+@slotted()
 @dataclass(init=True, frozen=True)
 class QChatImageMessage(QChatMessage):
     author: str
     avatar: Optional[str]
-    image_data: str
+    # base64 encoded image from text frames, raw image bytes from binary frames
+    image_data: Union[str, bytes]
+    id: Optional[str] = None
+    timestamp: Optional[float] = None
 
+    @property
+    def image_bytes(self) -> bytes:
+        """
+        Raw image bytes, decoded from base64 on each access
+        They are not kept, so that a message kept in a history does not hold
+        the image twice: decoded images are cached by content, see qchat_thumbnails
+        """
+        if isinstance(self.image_data, bytes):
+            return self.image_data
+        return base64.b64decode(self.image_data)
 
+    def to_wire_dict(self) -> dict[str, Any]:
+        image_data = self.image_data
+        if isinstance(image_data, bytes):
+            image_data = base64.b64encode(image_data).decode("ascii")
+        wire = {
+            "type": self.type,
+            "author": self.author,
+            "avatar": self.avatar,
+            "image_data": image_data,
+        }
+        return add_envelope(self, wire)
+
+
+@slotted()
 @dataclass(init=True, frozen=True)
 class QChatNbUsersMessage(QChatMessage):
     nb_users: int
+    id: Optional[str] = None
+    timestamp: Optional[float] = None
 
 
+@slotted()
 @dataclass(init=True, frozen=True)
 class QChatNewcomerMessage(QChatMessage):
     newcomer: str
+    id: Optional[str] = None
+    timestamp: Optional[float] = None
 
 
+@slotted()
 @dataclass(init=True, frozen=True)
 class QChatExiterMessage(QChatMessage):
     exiter: str
+    id: Optional[str] = None
+    timestamp: Optional[float] = None
 
 
+@slotted()
 @dataclass(init=True, frozen=True)
 class QChatLikeMessage(QChatMessage):
     liker_author: str
     liked_author: str
     message: str
+    id: Optional[str] = None
+    timestamp: Optional[float] = None
 
 
+@slotted("_geojson_dict", "_geojson_bytes")
 @dataclass(init=True, frozen=True)
 class QChatGeojsonMessage(QChatMessage):
     author: str
@@ -55,18 +202,172 @@ class QChatGeojsonMessage(QChatMessage):
     layer_name: str
     crs_wkt: str
     crs_authid: str
-    geojson: dict
+    # raw GeoJSON document from received frames, see split_geojson_frame,
+    # parsed GeoJSON from frames it could not be split from
+    geojson: Union[dict, str, bytes]
     style: Optional[str]
+    # number of features, if known without parsing the GeoJSON document
+    nb_features: Optional[int] = None
+    id: Optional[str] = None
+    timestamp: Optional[float] = None
+
+    @property
+    def geojson_dict(self) -> dict:
+        """
+        Parsed GeoJSON, decoded on first access
+        """
+        if isinstance(self.geojson, dict):
+            return self.geojson
+        try:
+            return self._geojson_dict
+        except AttributeError:
+            pass
+        geojson_dict = qchat_json.loads(self.geojson)
+        object.__setattr__(self, "_geojson_dict", geojson_dict)
+        return geojson_dict
+
+    @property
+    def geojson_bytes(self) -> bytes:
+        """
+        GeoJSON document as UTF-8 bytes
+        Only the encoding of parsed GeoJSON is kept, a raw document is encoded
+        again on each access not to be held twice
+        """
+        if isinstance(self.geojson, bytes):
+            return self.geojson
+        if isinstance(self.geojson, str):
+            return self.geojson.encode("utf-8")
+        try:
+            return self._geojson_bytes
+        except AttributeError:
+            pass
+        geojson_bytes = qchat_json.dumps_bytes(self.geojson)
+        object.__setattr__(self, "_geojson_bytes", geojson_bytes)
+        return geojson_bytes
+
+    def _wire_header(self) -> dict[str, Any]:
+        # nb_features is only carried by binary frames headers
+        wire = {
+            "type": self.type,
+            "author": self.author,
+            "avatar": self.avatar,
+            "layer_name": self.layer_name,
+            "crs_wkt": self.crs_wkt,
+            "crs_authid": self.crs_authid,
+            "style": self.style,
+        }
+        return add_envelope(self, wire)
+
+    def to_wire_dict(self) -> dict[str, Any]:
+        wire = self._wire_header()
+        wire["geojson"] = self.geojson_dict
+        return wire
 
+    def to_json(self) -> str:
+        """
+        Encodes the message as the JSON text of a text frame, in a single pass
+        A raw GeoJSON document is inserted as is, without being parsed
+        """
+        if isinstance(self.geojson, dict):
+            return qchat_json.dumps(self.to_wire_dict())
+        geojson = self.geojson
+        if isinstance(geojson, bytes):
+            geojson = geojson.decode("utf-8")
+        header = qchat_json.dumps(self._wire_header())
+        return f'{header[:-1]},"geojson":{geojson}}}'
 
+    @property
+    def features_count(self) -> int:
+        """
+        Number of features of the layer, parsing the GeoJSON only if unknown
+        """
+        if self.nb_features is not None:
+            return self.nb_features
+        return len(self.geojson_dict["features"])
+
+
+# fields a layer message can not be built without, besides its GeoJSON
+_GEOJSON_HEADER_FIELDS = frozenset(
+    f.name
+    for f in fields(QChatGeojsonMessage)
+    if f.default is MISSING and f.name != "geojson"
+)
+
+# key of the GeoJSON document in a text frame
+_GEOJSON_KEY_PATTERN = re.compile(r'"geojson"\s*:\s*')
+_FEATURE_PATTERN = re.compile(r'"type"\s*:\s*"Feature"')
+_JSON_STRING_PATTERN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"')
+_NOT_BRACES_PATTERN = re.compile(r"[^{}]+")
+
+
+def is_json_object(text: str) -> bool:
+    """
+    Tells whether a JSON text is a single object, its first opening brace
+    being closed by its last character
+    Strings are skipped, braces inside them do not count
+    """
+    if not (text.startswith("{") and text.endswith("}")):
+        return False
+    braces = _NOT_BRACES_PATTERN.sub("", _JSON_STRING_PATTERN.sub("", text))
+    depth = 0
+    for position, brace in enumerate(braces):
+        depth += 1 if brace == "{" else -1
+        if depth == 0:
+            return position == len(braces) - 1
+    return False
+
+
+def split_geojson_frame(text: str) -> Optional[tuple[dict[str, Any], str]]:
+    """
+    Splits the text frame of a layer message into its parsed header and its
+    raw GeoJSON document, which is left unparsed
+    Quotes inside JSON strings are escaped, so the first "geojson" key is the
+    top-level one. The document is split only if it is the last field of the
+    frame, as sent by QChat clients: the header must hold all the other
+    required fields and the document must be a single object
+    :param text: text frame of a layer message
+    :return: wire dict without the GeoJSON and raw GeoJSON document,
+    None if the frame can not be split, to be parsed as a whole
+    """
+    match = _GEOJSON_KEY_PATTERN.search(text)
+    if match is None:
+        return None
+    end = text.rfind("}")
+    header = text[: match.start()].rstrip()
+    if header.endswith(","):
+        header = header[:-1]
+    try:
+        message = qchat_json.loads(header + "}")
+    except ValueError:
+        return None
+    if not isinstance(message, dict) or not _GEOJSON_HEADER_FIELDS.issubset(message):
+        return None
+    geojson = text[match.end() : end].rstrip()
+    if not is_json_object(geojson):
+        return None
+    return message, geojson
+
+
+def count_geojson_features(geojson: str) -> int:
+    """
+    Counts the features of a raw GeoJSON document without parsing it
+    Approximate: a property whose value is "Feature" under a "type" key counts too
+    """
+    return len(_FEATURE_PATTERN.findall(geojson))
+
+
+@slotted()
 @dataclass(init=True, frozen=True)
 class QChatCrsMessage(QChatMessage):
     author: str
     avatar: Optional[str]
     crs_wkt: str
     crs_authid: str
+    id: Optional[str] = None
+    timestamp: Optional[float] = None
 
 
+@slotted()
 @dataclass(init=True, frozen=True)
 class QChatBboxMessage(QChatMessage):
     author: str
@@ -77,3 +378,76 @@ class QChatBboxMessage(QChatMessage):
     xmax: float
     ymin: float
     ymax: float
+    id: Optional[str] = None
+    timestamp: Optional[float] = None
+
+
+@slotted("_data_bytes")
+@dataclass(init=True, frozen=True)
+class QChatChunkMessage(QChatMessage):
+    transfer_id: str
+    index: int
+    count: int
+    # CRC-32 of the whole frame being transferred
+    checksum: int
+    # True if the frame being transferred is a binary frame
+    binary: bool
+    inner_type: str
+    author: Optional[str]
+    # base64 encoded part from text frames, raw bytes from binary frames
+    data: Union[str, bytes]
+    id: Optional[str] = None
+    timestamp: Optional[float] = None
+
+    @property
+    def data_bytes(self) -> bytes:
+        """
+        Raw part of the frame, decoded on first access
+        """
+        try:
+            return self._data_bytes
+        except AttributeError:
+            pass
+        if isinstance(self.data, bytes):
+            data_bytes = self.data
+        else:
+            data_bytes = base64.b64decode(self.data)
+        object.__setattr__(self, "_data_bytes", data_bytes)
+        return data_bytes
+
+    def to_wire_dict(self) -> dict[str, Any]:
+        wire = QChatMessage.to_wire_dict(self)
+        if isinstance(self.data, bytes):
+            wire["data"] = base64.b64encode(self.data).decode("ascii")
+        return wire
+
+
+# local message of the plugin, e.g. a connection status, never sent
+@slotted()
+@dataclass(init=True, frozen=True)
+class QChatAdminMessage(QChatMessage):
+    text: str
+
+
+# local placeholder of a received frame exceeding the size limits, never sent
+@slotted()
+@dataclass(init=True, frozen=True)
+class QChatOversizedMessage(QChatMessage):
+    payload_type: Optional[str]
+    author: Optional[str]
+    size: int
+    binary: bool
+    # raw frame, unless it has been spilled to the payload_path file
+    payload: Union[str, bytes, None] = field(default=None, repr=False)
+    payload_path: Optional[str] = None
+
+    def read_payload(self) -> Union[str, bytes]:
+        """
+        Returns the raw frame, reading it from its file if it has been spilled
+        :raises OSError: if the spilled file can not be read
+        """
+        if self.payload is not None:
+            return self.payload
+        with open(self.payload_path, "rb") as file:
+            data = file.read()
+        return data if self.binary else data.decode("utf-8")
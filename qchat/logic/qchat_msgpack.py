@@ -0,0 +1,102 @@
+"""
+MessagePack serialisation of QChat messages.
+
+Used instead of JSON when msgpack is installed and the instance advertises
+it in its rules. Every message is then sent as a binary frame holding a
+MessagePack map, so that coordinates travel as binary floats and image bytes
+as raw binary, instead of decimal and base64 text.
+
+MessagePack frames are told apart from the binary frames of
+qchat_binary_frames by their first byte, a map marker, whereas the 4 bytes
+header length of binary frames starts with a zero byte.
+"""
+
+from dataclasses import fields
+from typing import Any, Optional
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from qchat.constants import QCHAT_MESSAGE_TYPE_GEOJSON, QCHAT_MESSAGE_TYPE_IMAGE
+from qchat.logic.qchat_json import to_serialisable
+from qchat.logic.qchat_messages import ENVELOPE_FIELDS, QChatMessage, add_envelope
+from qchat.logic.qchat_payload_guard import SNIFF_LENGTH
+
+# number of leading map entries searched for the type and author of a frame
+SNIFF_ENTRIES = 2
+
+
+def is_available() -> bool:
+    return msgpack is not None
+
+
+def is_msgpack_frame(data: bytes) -> bool:
+    """
+    Tells whether a binary frame holds a MessagePack map: fixmap, map 16 or map 32
+    """
+    if not data:
+        return False
+    marker = data[0]
+    return 0x80 <= marker <= 0x8F or marker in (0xDE, 0xDF)
+
+
+def message_to_msgpack(message: QChatMessage) -> bytes:
+    """
+    Encodes a QChat message as a MessagePack map
+    Image bytes are kept raw and GeoJSON documents are encoded as maps
+    :raises RuntimeError: if msgpack is not installed
+    """
+    if msgpack is None:
+        raise RuntimeError("msgpack is not installed")
+    wire = {
+        f.name: getattr(message, f.name)
+        for f in fields(message)
+        if f.name not in ENVELOPE_FIELDS
+    }
+    add_envelope(message, wire)
+    if message.type == QCHAT_MESSAGE_TYPE_IMAGE:
+        wire["image_data"] = message.image_bytes
+    elif message.type == QCHAT_MESSAGE_TYPE_GEOJSON:
+        wire["geojson"] = message.geojson_dict
+    return msgpack.packb(wire, default=to_serialisable)
+
+
+def msgpack_to_wire_dict(data: bytes) -> dict[str, Any]:
+    """
+    Decodes a MessagePack frame into a wire dict
+    :raises ValueError: if the frame is invalid, not a map or msgpack is not installed
+    """
+    if msgpack is None:
+        raise ValueError("MessagePack frame received but msgpack is not installed")
+    try:
+        wire = msgpack.unpackb(data, raw=False)
+    except Exception as exc:
+        raise ValueError(f"Invalid MessagePack frame: {exc}") from exc
+    if not isinstance(wire, dict):
+        raise ValueError("MessagePack frame is not a map")
+    return wire
+
+
+def sniff_msgpack_fields(data: bytes) -> dict[str, Optional[str]]:
+    """
+    Finds the type and author of a MessagePack frame without decoding it all
+    Only the first entries of the first bytes are read, the heavy fields
+    come after them
+    :return: type and author, None if not found
+    """
+    found = {"type": None, "author": None}
+    if msgpack is None:
+        return found
+    unpacker = msgpack.Unpacker(raw=False)
+    unpacker.feed(data[:SNIFF_LENGTH])
+    try:
+        for _ in range(min(unpacker.read_map_header(), SNIFF_ENTRIES)):
+            key = unpacker.unpack()
+            value = unpacker.unpack()
+            if key in found and isinstance(value, str):
+                found[key] = value
+    except Exception:
+        pass
+    return found
@@ -0,0 +1,134 @@
+import re
+import tempfile
+from pathlib import Path
+from typing import Optional, Union
+
+from qchat.constants import (
+    QCHAT_MESSAGE_TYPE_GEOJSON,
+    QCHAT_MESSAGE_TYPE_IMAGE,
+    QCHAT_MESSAGE_TYPE_OVERSIZED,
+)
+from qchat.logic.qchat_messages import QChatOversizedMessage
+
+# size limit of the message types without a configured limit, in bytes
+DEFAULT_PAYLOAD_LIMIT = 1024 * 1024
+
+# number of characters of a text frame searched for its type and author
+SNIFF_LENGTH = 512
+
+_FIELD_PATTERNS = {
+    name: (
+        re.compile(rf'"{name}"\s*:\s*"([^"\\]*)"'),
+        re.compile(rf'"{name}"\s*:\s*"([^"\\]*)"'.encode("ascii")),
+    )
+    for name in ("type", "inner_type", "author")
+}
+
+
+def sniff_string_field(frame: Union[str, bytes], name: str) -> Optional[str]:
+    """
+    Finds the value of a string field at the beginning of a JSON frame,
+    without parsing it. Used to know what an oversized frame is about
+    :param frame: JSON text frame
+    :param name: name of the field, 'type', 'inner_type' or 'author'
+    :return: value of the field, None if not found
+    """
+    text_pattern, bytes_pattern = _FIELD_PATTERNS[name]
+    if isinstance(frame, str):
+        match = text_pattern.search(frame, 0, SNIFF_LENGTH)
+        return match.group(1) if match else None
+    match = bytes_pattern.search(frame, 0, SNIFF_LENGTH)
+    return match.group(1).decode("utf-8", errors="replace") if match else None
+
+
+def payload_limits_from_megabytes(image_mb: int, geojson_mb: int) -> dict[str, int]:
+    """
+    Builds the limits of a QChatPayloadGuard from the plugin settings
+    :param image_mb: maximum size of image messages, 0 for no limit
+    :param geojson_mb: maximum size of layer messages, 0 for no limit
+    """
+    return {
+        QCHAT_MESSAGE_TYPE_IMAGE: image_mb * 1024 * 1024,
+        QCHAT_MESSAGE_TYPE_GEOJSON: geojson_mb * 1024 * 1024,
+    }
+
+
+class QChatPayloadGuard:
+    """
+    Checks the size of received frames before they are parsed
+    Oversized frames are replaced by a lightweight QChatOversizedMessage,
+    holding the raw payload in memory or spilled to a temporary file
+    """
+
+    def __init__(
+        self,
+        limits: Optional[dict[str, int]] = None,
+        default_limit: int = DEFAULT_PAYLOAD_LIMIT,
+        spill: bool = False,
+    ):
+        """
+        :param limits: maximum payload size by message type, in bytes, 0 for no limit
+        :param default_limit: maximum payload size of the other message types
+        :param spill: True to write oversized payloads to temporary files
+        """
+        self.limits: dict[str, int] = dict(limits or {})
+        self.default_limit = default_limit
+        self.spill = spill
+        self.spilled_paths: list[Path] = []
+
+    def limit(self, message_type: Optional[str]) -> int:
+        """
+        Returns the maximum payload size of a message type, 0 for no limit
+        The most permissive limit applies if the type is unknown
+        """
+        if message_type is None:
+            limits = [*self.limits.values(), self.default_limit]
+            return 0 if 0 in limits else max(limits)
+        return self.limits.get(message_type, self.default_limit)
+
+    def is_oversized(self, message_type: Optional[str], size: int) -> bool:
+        limit = self.limit(message_type)
+        return 0 < limit < size
+
+    def quarantine(
+        self,
+        payload: Union[str, bytes],
+        message_type: Optional[str],
+        author: Optional[str],
+        binary: bool,
+    ) -> QChatOversizedMessage:
+        """
+        Builds the placeholder message of an oversized frame
+        :param payload: raw frame, text or binary
+        :param message_type: type of the message, if known
+        :param author: author of the message, if known
+        :param binary: True if the frame is a binary frame
+        """
+        size = len(payload)
+        payload_path = None
+        if self.spill:
+            data = payload.encode("utf-8") if isinstance(payload, str) else payload
+            with tempfile.NamedTemporaryFile(
+                prefix="qchat_", suffix=".bin" if binary else ".json", delete=False
+            ) as file:
+                file.write(data)
+            payload_path = file.name
+            self.spilled_paths.append(Path(payload_path))
+            payload = None
+        return QChatOversizedMessage(
+            type=QCHAT_MESSAGE_TYPE_OVERSIZED,
+            payload_type=message_type,
+            author=author,
+            size=size,
+            binary=binary,
+            payload=payload,
+            payload_path=payload_path,
+        )
+
+    def cleanup(self) -> None:
+        """
+        Deletes the temporary files of spilled payloads
+        """
+        for path in self.spilled_paths:
+            path.unlink(missing_ok=True)
+        self.spilled_paths = []
@@ -0,0 +1,224 @@
+"""
+Bounded history of the messages received in a QChat room.
+
+Every open room stores its messages in its own history, whether it is
+displayed or not, so that switching to a room only replays its history into
+the chat instead of opening a new websocket.
+
+Histories are bounded by a number of messages and by an approximate number
+of bytes. The oldest messages are evicted first. Images and layers can be
+evicted before plain text, so that a few large payloads do not push a whole
+conversation out of the history.
+"""
+
+import time
+from collections import deque
+from dataclasses import fields
+from typing import Any, Callable, Iterator, Optional, Sequence
+
+from qchat.constants import (
+    QCHAT_MESSAGE_TYPE_BBOX,
+    QCHAT_MESSAGE_TYPE_CRS,
+    QCHAT_MESSAGE_TYPE_GEOJSON,
+    QCHAT_MESSAGE_TYPE_IMAGE,
+    QCHAT_MESSAGE_TYPE_NB_USERS,
+    QCHAT_MESSAGE_TYPE_TEXT,
+    QCHAT_MESSAGE_TYPE_UNCOMPLIANT,
+)
+from qchat.logic.qchat_messages import QChatMessage
+
+# number of messages kept per room
+ROOM_HISTORY_SIZE = 500
+
+# approximate number of bytes kept per room
+ROOM_HISTORY_MAX_BYTES = 64 * 1024 * 1024
+
+# approximate size of a message object and of its metadata, in bytes
+MESSAGE_OVERHEAD = 200
+
+# messages carrying large payloads, evicted first if requested
+HEAVY_MESSAGE_TYPES = (QCHAT_MESSAGE_TYPE_IMAGE, QCHAT_MESSAGE_TYPE_GEOJSON)
+
+# messages counted as unread when received in a room which is not displayed
+UNREAD_MESSAGE_TYPES = (
+    QCHAT_MESSAGE_TYPE_TEXT,
+    QCHAT_MESSAGE_TYPE_IMAGE,
+    QCHAT_MESSAGE_TYPE_GEOJSON,
+    QCHAT_MESSAGE_TYPE_CRS,
+    QCHAT_MESSAGE_TYPE_BBOX,
+)
+
+
+def value_size(value: Any) -> int:
+    """
+    Returns the approximate number of bytes held by a field value
+    Nested values are not walked, they are counted as 8 bytes
+    """
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return 8
+
+
+def message_size(message: QChatMessage) -> int:
+    """
+    Returns the approximate number of bytes held by a message
+    Received messages are as large as their frame, whose length is set by
+    the decoder in the worker thread. Payloads decoded on demand, e.g. image
+    bytes, are not kept by the message
+    The fields of local messages are summed up
+    """
+    wire_size = message.wire_size
+    if wire_size is not None:
+        return MESSAGE_OVERHEAD + wire_size
+    return MESSAGE_OVERHEAD + sum(
+        value_size(getattr(message, f.name))
+        for f in fields(message)
+        if f.name != "type"
+    )
+
+
+def is_heavy(message: QChatMessage) -> bool:
+    return message.type in HEAVY_MESSAGE_TYPES
+
+
+def plan_eviction(
+    entries: Sequence[tuple[int, bool]],
+    total_bytes: int,
+    max_count: int,
+    max_bytes: int,
+    heavy_first: bool = False,
+) -> list[int]:
+    """
+    Chooses the entries to evict from a bounded history, the newest one
+    is always kept
+    Entries exceeding the count are the oldest ones, then entries are
+    evicted oldest first until the bytes fit, heavy ones first if requested
+    :param entries: (size, heavy) tuples, the oldest first
+    :param total_bytes: sum of the sizes of the entries
+    :return: sorted positions of the entries to evict
+    """
+    excess_count = len(entries) - max_count
+    excess_bytes = total_bytes - max_bytes
+    last = len(entries) - 1
+    evicted = []
+    for position, (size, heavy) in enumerate(entries):
+        if position == last or (excess_count <= 0 and excess_bytes <= 0):
+            break
+        if excess_count > 0 or not heavy_first or heavy:
+            evicted.append(position)
+            excess_count -= 1
+            excess_bytes -= size
+    if excess_bytes <= 0 or not heavy_first:
+        return evicted
+
+    # not enough heavy entries: evict the oldest light ones too
+    chosen = set(evicted)
+    for position, (size, heavy) in enumerate(entries):
+        if position == last or excess_bytes <= 0:
+            break
+        if position not in chosen:
+            evicted.append(position)
+            excess_bytes -= size
+    return sorted(evicted)
+
+
+class QChatRoomHistory:
+    """
+    Last messages received in a room, the oldest are dropped first
+    Users counts are not stored, only the last one is kept,
+    and neither are uncompliant messages, which are answers to sent messages
+    Messages are stamped with their arrival time when stored, so that the
+    history is displayed again with the times it has been received at
+    """
+
+    def __init__(
+        self,
+        maxlen: int = ROOM_HISTORY_SIZE,
+        max_bytes: int = ROOM_HISTORY_MAX_BYTES,
+        heavy_first: bool = False,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        :param clock: clock stamping the arrival of messages, in seconds since epoch
+        """
+        self.messages: deque[QChatMessage] = deque()
+        # (size, heavy) of each message
+        self.sizes: deque[tuple[int, bool]] = deque()
+        self.nbytes = 0
+        self.maxlen = max(1, maxlen)
+        self.max_bytes = max_bytes
+        self.heavy_first = heavy_first
+        self.clock = clock
+        self.nb_users: Optional[int] = None
+        self.unread = 0
+        self.dropped_total = 0
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def __iter__(self) -> Iterator[QChatMessage]:
+        return iter(self.messages)
+
+    def set_limits(
+        self,
+        maxlen: int,
+        max_bytes: int = ROOM_HISTORY_MAX_BYTES,
+        heavy_first: bool = False,
+    ) -> None:
+        """
+        Changes the number of messages and of bytes kept, evicting messages if needed
+        """
+        self.maxlen = max(1, maxlen)
+        self.max_bytes = max_bytes
+        self.heavy_first = heavy_first
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Drops messages until the history fits in its limits
+        """
+        if len(self.messages) <= self.maxlen and self.nbytes <= self.max_bytes:
+            return
+        evicted = plan_eviction(
+            self.sizes, self.nbytes, self.maxlen, self.max_bytes, self.heavy_first
+        )
+        if not evicted:
+            return
+        self.dropped_total += len(evicted)
+        self.nbytes -= sum(self.sizes[position][0] for position in evicted)
+        if evicted[-1] == len(evicted) - 1:
+            # the oldest messages, the usual case
+            for _ in evicted:
+                self.messages.popleft()
+                self.sizes.popleft()
+            return
+        kept = set(range(len(self.messages))).difference(evicted)
+        self.messages = deque(m for i, m in enumerate(self.messages) if i in kept)
+        self.sizes = deque(s for i, s in enumerate(self.sizes) if i in kept)
+
+    def add(self, message: QChatMessage, unread: bool = False) -> None:
+        """
+        Stores a received message
+        :param unread: True if the room is not displayed, to count the message as unread
+        """
+        if message.type == QCHAT_MESSAGE_TYPE_NB_USERS:
+            self.nb_users = message.nb_users
+            return
+        if message.type == QCHAT_MESSAGE_TYPE_UNCOMPLIANT:
+            return
+        if message.received_at is None:
+            message.set_received_at(self.clock())
+        size = message_size(message)
+        self.messages.append(message)
+        self.sizes.append((size, is_heavy(message)))
+        self.nbytes += size
+        self.evict()
+        if unread and message.type in UNREAD_MESSAGE_TYPES:
+            self.unread += 1
+
+    def clear(self) -> None:
+        self.messages.clear()
+        self.sizes.clear()
+        self.nbytes = 0
+        self.nb_users = None
+        self.unread = 0
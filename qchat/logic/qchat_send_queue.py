@@ -0,0 +1,219 @@
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Optional, Union
+
+from qchat.logic.qchat_binary_frames import message_to_binary_frame
+from qchat.logic.qchat_chunks import chunk_part_size, make_chunks
+from qchat.logic.qchat_compression import compress_text_frame
+from qchat.logic.qchat_messages import QChatMessage
+from qchat.logic.qchat_msgpack import message_to_msgpack
+
+# frames up to this size, e.g. text messages, skip the queue of large payloads
+PRIORITY_MAX_SIZE = 4 * 1024
+
+# bytes handed to the socket and not written yet above which sending pauses
+MAX_IN_FLIGHT_BYTES = 4 * 1024 * 1024
+
+
+class TokenBucket:
+    """
+    Rate limiter allowing a sustained rate and bursts up to one second of it
+    An amount larger than the burst is allowed once the bucket is full,
+    the bucket then goes into debt, delaying the next ones
+    """
+
+    def __init__(self, rate: float, clock: Callable[[], float] = time.monotonic):
+        """
+        :param rate: allowed amount per second, 0 for no limit
+        :param clock: monotonic clock, in seconds
+        """
+        self.clock = clock
+        self.set_rate(rate)
+
+    def set_rate(self, rate: float) -> None:
+        self.rate = rate
+        self.tokens = rate
+        self.updated = self.clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float) -> float:
+        """
+        Returns the time to wait before the amount can be consumed, in seconds
+        """
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        missing = min(amount, self.rate) - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def consume(self, amount: float) -> None:
+        if self.rate > 0:
+            self._refill()
+            self.tokens -= amount
+
+
+@dataclass
+class OutgoingFrame:
+    data: Union[str, bytes]
+    binary: bool
+    size: int
+    # chunked transfer the frame belongs to, if any, and its position in it
+    transfer_id: Optional[str] = None
+    index: int = 0
+    count: int = 1
+
+
+def encode_frame(
+    message: QChatMessage,
+    binary: bool,
+    compression_threshold: int = 0,
+    use_msgpack: bool = False,
+) -> OutgoingFrame:
+    """
+    Encodes a QChat message into an outgoing frame
+    :param binary: True to encode the message as a binary frame
+    :param compression_threshold: payload size above which it is compressed,
+    if worth it, 0 to never compress
+    :param use_msgpack: True to encode the message as a MessagePack frame,
+    which is never compressed
+    """
+    if use_msgpack:
+        data = message_to_msgpack(message)
+        binary = True
+    elif binary:
+        data = message_to_binary_frame(message, compression_threshold)
+    else:
+        data = compress_text_frame(
+            message.to_json(), message.type, compression_threshold
+        )
+    # size in characters for text frames, close enough to the UTF-8 size for the budgets
+    return OutgoingFrame(data=data, binary=binary, size=len(data))
+
+
+def encode_frames(
+    message: QChatMessage,
+    binary: bool,
+    compression_threshold: int = 0,
+    use_msgpack: bool = False,
+    chunk_size: int = 0,
+) -> list[OutgoingFrame]:
+    """
+    Encodes a QChat message into outgoing frames, in chunks if it is too large
+    See encode_frame for the other parameters
+    :param chunk_size: frame size above which it is sent in chunk frames of at
+    most this size, in bytes, 0 to never split frames
+    """
+    frame = encode_frame(message, binary, compression_threshold, use_msgpack)
+    if chunk_size <= 0 or frame.size <= chunk_size:
+        return [frame]
+    author = getattr(message, "author", None)
+    part_size = chunk_part_size(
+        chunk_size, author, base64_parts=not (binary or use_msgpack)
+    )
+    frames = []
+    for chunk in make_chunks(frame.data, message.type, author, part_size):
+        chunk_frame = encode_frame(chunk, binary, use_msgpack=use_msgpack)
+        chunk_frame.transfer_id = chunk.transfer_id
+        chunk_frame.index = chunk.index
+        chunk_frame.count = chunk.count
+        frames.append(chunk_frame)
+    return frames
+
+
+class QChatSendQueue:
+    """
+    Queue of outgoing frames with two priorities and rate limits
+    Small frames are sent before large ones and are only subject to the
+    messages per second budget. Large frames are also subject to the bytes
+    per second budget and to the number of bytes not written by the socket yet
+    """
+
+    def __init__(
+        self,
+        messages_per_second: float = 0,
+        bytes_per_second: float = 0,
+        max_in_flight_bytes: int = MAX_IN_FLIGHT_BYTES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param messages_per_second: messages budget, 0 for no limit
+        :param bytes_per_second: bytes budget of large frames, 0 for no limit
+        :param max_in_flight_bytes: in-flight bytes above which large frames wait
+        :param clock: monotonic clock, in seconds
+        """
+        self.priority_frames: deque[OutgoingFrame] = deque()
+        self.frames: deque[OutgoingFrame] = deque()
+        self.messages_bucket = TokenBucket(messages_per_second, clock)
+        self.bytes_bucket = TokenBucket(bytes_per_second, clock)
+        self.max_in_flight_bytes = max_in_flight_bytes
+        self.in_flight_bytes = 0
+        self.queued_bytes = 0
+        self.sent_total = 0
+
+    def set_rates(self, messages_per_second: float, bytes_per_second: float) -> None:
+        self.messages_bucket.set_rate(messages_per_second)
+        self.bytes_bucket.set_rate(bytes_per_second)
+
+    @property
+    def depth(self) -> int:
+        return len(self.priority_frames) + len(self.frames)
+
+    def push(self, frame: OutgoingFrame) -> None:
+        """
+        Adds a frame to the queue matching its size
+        """
+        if frame.size <= PRIORITY_MAX_SIZE:
+            self.priority_frames.append(frame)
+        else:
+            self.frames.append(frame)
+        self.queued_bytes += frame.size
+
+    def pop(self) -> tuple[Optional[OutgoingFrame], Optional[float]]:
+        """
+        Pops the next frame if the budgets allow sending it
+        :return: the frame to send, or None and the delay to wait for before
+        trying again, in seconds. The delay is None if the queue is empty or
+        if sending waits for in-flight bytes to be written
+        """
+        if not self.depth:
+            return None, None
+        delay = self.messages_bucket.delay(1)
+        if delay > 0:
+            return None, delay
+        if self.priority_frames:
+            frame = self.priority_frames.popleft()
+        else:
+            frame = self.frames[0]
+            if 0 < self.max_in_flight_bytes <= self.in_flight_bytes:
+                return None, None
+            delay = self.bytes_bucket.delay(frame.size)
+            if delay > 0:
+                return None, delay
+            self.frames.popleft()
+            self.bytes_bucket.consume(frame.size)
+        self.messages_bucket.consume(1)
+        self.queued_bytes -= frame.size
+        self.in_flight_bytes += frame.size
+        self.sent_total += 1
+        return frame, None
+
+    def on_bytes_written(self, nb_bytes: int) -> None:
+        """
+        Accounts bytes written by the socket
+        Frame headers are counted too, hence the floor at 0
+        """
+        self.in_flight_bytes = max(0, self.in_flight_bytes - nb_bytes)
+
+    def clear(self) -> None:
+        """
+        Drops the queued frames and resets the in-flight bytes
+        """
+        self.priority_frames.clear()
+        self.frames.clear()
+        self.queued_bytes = 0
+        self.in_flight_bytes = 0
@@ -0,0 +1,69 @@
+from collections import deque
+from typing import Optional
+
+
+class RollingStats:
+    """
+    Rolling statistics over the last values of a series
+    Used for diagnostics, e.g. GUI stall time per received frame
+    """
+
+    def __init__(self, maxlen: int = 500):
+        self._values: deque[float] = deque(maxlen=maxlen)
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        """
+        Adds a value to the series, dropping the oldest one if needed
+        """
+        self._values.append(value)
+        self.count += 1
+
+    def reset(self) -> None:
+        self._values.clear()
+        self.count = 0
+
+    @property
+    def last(self) -> Optional[float]:
+        return self._values[-1] if self._values else None
+
+    @property
+    def mean(self) -> Optional[float]:
+        if not self._values:
+            return None
+        return sum(self._values) / len(self._values)
+
+    @property
+    def max(self) -> Optional[float]:
+        return max(self._values) if self._values else None
+
+    @property
+    def p95(self) -> Optional[float]:
+        return self.percentile(95)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """
+        Returns the nearest-rank percentile of the values in the window
+        :param percent: percentile to compute, between 0 and 100
+        """
+        if not self._values:
+            return None
+        values = sorted(self._values)
+        rank = max(0, min(len(values) - 1, round(percent / 100 * len(values)) - 1))
+        return values[rank]
+
+    def summary(self, unit: str = "ms", factor: float = 1.0) -> str:
+        """
+        Returns a human readable summary of the statistics
+        :param unit: unit suffix to display
+        :param factor: factor applied to values before display, e.g. 1000 for s to ms
+        """
+        if not self._values:
+            return "n/a"
+        return (
+            f"last={self.last * factor:.1f}{unit} "
+            f"mean={self.mean * factor:.1f}{unit} "
+            f"p95={self.p95 * factor:.1f}{unit} "
+            f"max={self.max * factor:.1f}{unit} "
+            f"(n={self.count})"
+        )
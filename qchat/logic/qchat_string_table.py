@@ -0,0 +1,72 @@
+"""
+Table of the strings repeated in received QChat messages.
+
+Authors and avatars repeat in every message of a room. Each decoded value
+is replaced by a single shared instance. Messages kept in the room histories
+then share their metadata, and comparing an author with the nickname of the
+user is mostly an identity check.
+"""
+
+from typing import Any
+
+# wire fields whose values are shared
+INTERNED_FIELDS = (
+    "author",
+    "avatar",
+    "newcomer",
+    "exiter",
+    "liker_author",
+    "liked_author",
+)
+
+# distinct strings kept, new values are not shared any more above it
+MAX_STRINGS = 10_000
+
+# longer values are never shared, they are unlikely to repeat
+MAX_STRING_LENGTH = 256
+
+
+class QChatStringTable:
+    """
+    Shared instances of repeated strings, in a bounded table
+    Can be used from the worker thread, lookups and insertions being
+    single dict operations
+    """
+
+    def __init__(
+        self, max_strings: int = MAX_STRINGS, max_length: int = MAX_STRING_LENGTH
+    ):
+        self.max_strings = max_strings
+        self.max_length = max_length
+        self.strings: dict[str, str] = {}
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def intern(self, value: str) -> str:
+        """
+        Returns the shared instance of a string, adding it if there is room
+        """
+        shared = self.strings.get(value)
+        if shared is not None:
+            self.hits += 1
+            return shared
+        if len(value) > self.max_length or len(self.strings) >= self.max_strings:
+            return value
+        return self.strings.setdefault(value, value)
+
+    def intern_fields(self, wire: dict[str, Any]) -> dict[str, Any]:
+        """
+        Replaces the author and avatar values of a wire dict by their shared instance
+        :return: the same wire dict
+        """
+        for name in INTERNED_FIELDS:
+            value = wire.get(name)
+            if isinstance(value, str):
+                wire[name] = self.intern(value)
+        return wire
+
+    def clear(self) -> None:
+        self.strings.clear()
+        self.hits = 0
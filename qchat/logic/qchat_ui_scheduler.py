@@ -0,0 +1,69 @@
+import time
+from typing import Callable, Hashable
+
+from qgis.PyQt.QtCore import QObject, QTimer
+
+from qchat.logic.qchat_frame_queue import (
+    FRAME_BUDGET_MS,
+    FRAME_INTERVAL_MS,
+    QChatFrameQueue,
+)
+
+
+class QChatUiScheduler(QObject):
+    """
+    Runs the queued updates of the chat view frame by frame
+    A frame runs on the next event loop iteration after an update is posted,
+    at most once per frame interval, and as long as updates are left
+    """
+
+    def __init__(self, budget_ms: int = FRAME_BUDGET_MS, parent: QObject = None):
+        super().__init__(parent)
+        self.queue = QChatFrameQueue(budget_ms)
+        self.last_frame = 0.0
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.run_frame)
+
+    def set_budget(self, budget_ms: int) -> None:
+        """
+        :param budget_ms: time given to the updates in each frame, in milliseconds
+        """
+        self.queue.budget_ms = max(1, budget_ms)
+
+    def post(self, task: Callable[[], None]) -> None:
+        """
+        Queues an update, run after the ones already queued
+        """
+        self.queue.post(task)
+        self.schedule()
+
+    def post_coalesced(self, key: Hashable, task: Callable[[], None]) -> None:
+        """
+        Queues an update run once at the end of the next frame, replacing
+        the one queued under the same key
+        """
+        self.queue.post_coalesced(key, task)
+        self.schedule()
+
+    def schedule(self) -> None:
+        if self.timer.isActive():
+            return
+        elapsed_ms = (time.perf_counter() - self.last_frame) * 1000
+        self.timer.start(max(0, round(FRAME_INTERVAL_MS - elapsed_ms)))
+
+    def run_frame(self) -> None:
+        self.last_frame = time.perf_counter()
+        self.queue.run_frame()
+        if len(self.queue):
+            self.schedule()
+        else:
+            # coalesced updates posted by the frame itself have run
+            self.timer.stop()
+
+    def clear(self) -> None:
+        """
+        Drops the pending updates
+        """
+        self.timer.stop()
+        self.queue.clear()
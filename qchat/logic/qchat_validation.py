@@ -0,0 +1,169 @@
+"""
+Client side validation of outgoing QChat messages against the instance rules.
+
+Messages breaking the rules are rejected, or split for too long texts,
+before they reach the socket, instead of being sent and answered by an
+'uncompliant' message after a full round trip.
+"""
+
+from dataclasses import dataclass, fields, replace
+from typing import Any, Optional
+
+from qchat.constants import (
+    QCHAT_MESSAGE_TYPE_GEOJSON,
+    QCHAT_MESSAGE_TYPE_IMAGE,
+    QCHAT_MESSAGE_TYPE_TEXT,
+    QCHAT_NICKNAME_MINLENGTH,
+)
+from qchat.logic.qchat_messages import QChatMessage
+
+# estimated size of the JSON syntax and name of a field, in bytes
+FIELD_OVERHEAD = 16
+
+
+class QChatValidationError(ValueError):
+    """
+    Raised when an outgoing message breaks the rules of the instance
+    """
+
+
+@dataclass
+class QChatRules:
+    """
+    Rules of a QChat instance applying to outgoing messages, 0 for no limit
+    """
+
+    min_author_length: int = QCHAT_NICKNAME_MINLENGTH
+    max_author_length: int = 32
+    max_message_length: int = 0
+    max_geojson_features: int = 0
+    # in bytes
+    max_payload_size: int = 0
+
+    @classmethod
+    def from_dict(cls, rules: dict[str, Any]) -> "QChatRules":
+        """
+        Builds the rules from the response of the instance rules endpoint
+        Missing or invalid values keep their default
+        """
+        values = {}
+        for f in fields(cls):
+            value = rules.get(f.name)
+            if isinstance(value, int) and not isinstance(value, bool):
+                values[f.name] = value
+        return cls(**values)
+
+
+def estimate_payload_size(
+    message: QChatMessage, binary: bool = False, use_msgpack: bool = False
+) -> int:
+    """
+    Estimates the size of a message on the wire without encoding it, in bytes
+    Only string fields and heavy payloads are accounted for precisely
+    :param binary: True if the message is sent as a binary frame
+    :param use_msgpack: True if the message is sent as a MessagePack frame
+    """
+    size = 0
+    for f in fields(message):
+        value = getattr(message, f.name)
+        size += FIELD_OVERHEAD
+        if f.name == "image_data":
+            nb_bytes = len(message.image_bytes)
+            # base64 in text frames
+            size += nb_bytes if binary or use_msgpack else 4 * -(-nb_bytes // 3)
+        elif f.name == "geojson":
+            size += len(message.geojson_bytes)
+        elif isinstance(value, (str, bytes)):
+            size += len(value)
+    return size
+
+
+def split_text(text: str, max_length: int) -> list[str]:
+    """
+    Splits a text into parts of at most max_length characters,
+    at the last whitespace of each part if any
+    """
+    parts = []
+    while len(text) > max_length:
+        cut = text.rfind(" ", 1, max_length + 1)
+        if cut <= 0:
+            cut = max_length
+        parts.append(text[:cut].rstrip())
+        text = text[cut:].lstrip()
+    if text:
+        parts.append(text)
+    return parts
+
+
+class QChatMessageValidator:
+    """
+    Validates outgoing messages against the cached rules of the instance
+    """
+
+    def __init__(self, rules: Optional[QChatRules] = None):
+        self.rules = rules or QChatRules()
+        self.rejected_total = 0
+        self.split_total = 0
+
+    def check_author(self, author: str) -> None:
+        """
+        :raises QChatValidationError: if the author length is out of bounds
+        """
+        rules = self.rules
+        too_long = 0 < rules.max_author_length < len(author)
+        if len(author) < rules.min_author_length or too_long:
+            raise QChatValidationError(
+                f"Nickname must be between {self.rules.min_author_length} "
+                f"and {self.rules.max_author_length} characters long"
+            )
+
+    def validate(
+        self, message: QChatMessage, binary: bool = False, use_msgpack: bool = False
+    ) -> list[QChatMessage]:
+        """
+        Validates an outgoing message
+        :param binary: True if the message is sent as a binary frame
+        :param use_msgpack: True if the message is sent as a MessagePack frame
+        :return: messages to send, several if a too long text has been split
+        :raises QChatValidationError: if the message breaks the rules
+        """
+        try:
+            return self._validate(message, binary, use_msgpack)
+        except QChatValidationError:
+            self.rejected_total += 1
+            raise
+
+    def _validate(
+        self, message: QChatMessage, binary: bool, use_msgpack: bool
+    ) -> list[QChatMessage]:
+        rules = self.rules
+        author = getattr(message, "author", None)
+        if author is not None:
+            self.check_author(author)
+        if message.type == QCHAT_MESSAGE_TYPE_TEXT:
+            if not message.text.strip():
+                raise QChatValidationError("Empty message")
+            if 0 < rules.max_message_length < len(message.text):
+                self.split_total += 1
+                return [
+                    replace(message, text=part)
+                    for part in split_text(message.text, rules.max_message_length)
+                ]
+            return [message]
+        if message.type == QCHAT_MESSAGE_TYPE_GEOJSON:
+            if 0 < rules.max_geojson_features < message.features_count:
+                raise QChatValidationError(
+                    f"Layer has {message.features_count} features, "
+                    f"the instance accepts at most {rules.max_geojson_features}"
+                )
+        if rules.max_payload_size > 0 and message.type in (
+            QCHAT_MESSAGE_TYPE_IMAGE,
+            QCHAT_MESSAGE_TYPE_GEOJSON,
+        ):
+            size = estimate_payload_size(message, binary, use_msgpack)
+            if size > rules.max_payload_size:
+                raise QChatValidationError(
+                    f"Message of about {size / 1024 / 1024:.1f} MB, the instance "
+                    f"accepts at most {rules.max_payload_size / 1024 / 1024:.1f} MB"
+                )
+        return [message]
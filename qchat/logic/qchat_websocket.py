@@ -1,13 +1,25 @@
-import dataclasses
-import json
-from json import JSONEncoder
+from dataclasses import replace
+from time import perf_counter, time
+from typing import Any, Optional
+from uuid import uuid4
 
 from PyQt5 import QtWebSockets  # noqa QGS103
 from qgis.core import Qgis
-from qgis.PyQt.QtCore import QObject, QUrl, pyqtSignal
+from qgis.PyQt.QtCore import (
+    QByteArray,
+    QObject,
+    QThread,
+    QTimer,
+    QUrl,
+    pyqtSignal,
+    pyqtSlot,
+)
+from qgis.PyQt.QtNetwork import QAbstractSocket
 
 from qchat.constants import (
     QCHAT_MESSAGE_TYPE_BBOX,
+    QCHAT_MESSAGE_TYPE_CHUNK,
+    QCHAT_MESSAGE_TYPE_COMPRESSED,
     QCHAT_MESSAGE_TYPE_CRS,
     QCHAT_MESSAGE_TYPE_EXITER,
     QCHAT_MESSAGE_TYPE_GEOJSON,
@@ -18,8 +30,36 @@ from qchat.constants import (
     QCHAT_MESSAGE_TYPE_TEXT,
     QCHAT_MESSAGE_TYPE_UNCOMPLIANT,
 )
+from qchat.logic import qchat_json
+from qchat.logic.qchat_backoff import ExponentialBackoff
+from qchat.logic.qchat_binary_frames import (
+    can_be_sent_as_binary,
+    decode_binary_frame,
+    header_to_wire_dict,
+    is_compressed_binary_frame,
+)
+from qchat.logic.qchat_chunks import QChatChunkReassembler
+from qchat.logic.qchat_compression import (
+    COMPRESSION_THRESHOLD,
+    DecompressedSizeExceeded,
+    decompress_envelope,
+)
+from qchat.logic.qchat_connection_state import (
+    QChatConnectionState,
+    QChatConnectionStateMachine,
+)
+from qchat.logic.qchat_decode_order import DecodeSlot, QChatDecodeOrder
+from qchat.logic.qchat_dedup import RecentlySeen
+from qchat.logic.qchat_heartbeat import Heartbeat
+from qchat.logic.qchat_message_registry import (
+    MessageDecoder,
+    MessageHandler,
+    QChatMessageRegistry,
+    default_message_registry,
+)
 from qchat.logic.qchat_messages import (
     QChatBboxMessage,
+    QChatChunkMessage,
     QChatCrsMessage,
     QChatExiterMessage,
     QChatGeojsonMessage,
@@ -28,22 +68,273 @@ from qchat.logic.qchat_messages import (
     QChatMessage,
     QChatNbUsersMessage,
     QChatNewcomerMessage,
+    QChatOversizedMessage,
     QChatTextMessage,
     QChatUncompliantMessage,
+    count_geojson_features,
+    split_geojson_frame,
+)
+from qchat.logic.qchat_msgpack import (
+    is_msgpack_frame,
+    msgpack_to_wire_dict,
+    sniff_msgpack_fields,
 )
+from qchat.logic.qchat_payload_guard import QChatPayloadGuard, sniff_string_field
+from qchat.logic.qchat_send_queue import OutgoingFrame, QChatSendQueue, encode_frames
+from qchat.logic.qchat_stats import RollingStats
+from qchat.logic.qchat_string_table import QChatStringTable
+from qchat.logic.qchat_validation import QChatMessageValidator
 from qchat.toolbelt import PlgLogger
-from qchat.toolbelt.exceptions import QChatMessageCanNotBeParsedException
 
 
-class EnhancedJSONEncoder(JSONEncoder):
+class QChatFrameDecoder(QObject):
+    """
+    Decodes websocket text and binary frames into QChat messages
+    Meant to live in a worker thread: decoded messages are queued back,
+    in the order the frames were received, to the thread of the receivers
+    """
+
+    def __init__(
+        self,
+        registry: QChatMessageRegistry,
+        payload_guard: QChatPayloadGuard,
+        string_table: Optional[QChatStringTable] = None,
+    ):
+        super().__init__()
+        self.log = PlgLogger().log
+        self.registry = registry
+        self.payload_guard = payload_guard
+        # shares the author and avatar strings of decoded messages
+        self.string_table = string_table
+
+    # decoded message and the slot of its frame
+    message_decoded = pyqtSignal(object, object)
+    decoding_failed = pyqtSignal(str)
+
+    def decode_frame(
+        self, text: str, check_size: bool = True
+    ) -> Optional[QChatMessage]:
+        """
+        Parses and validates a text frame
+        :param text: text message received, should be a jsonified string
+        :param check_size: False to parse the frame whatever its size
+        :return: decoded message, None if it has no or an unknown type or is invalid.
+        A QChatOversizedMessage if the frame exceeds the size limit of its type
+        """
+        if check_size:
+            msg_type = sniff_string_field(text, "type")
+            if msg_type == QCHAT_MESSAGE_TYPE_COMPRESSED:
+                msg_type = sniff_string_field(text, "inner_type")
+            if self.payload_guard.is_oversized(msg_type, len(text)):
+                return self.payload_guard.quarantine(
+                    text, msg_type, sniff_string_field(text, "author"), binary=False
+                )
+        message = self.parse_text_frame(text)
+        if message.get("type") == QCHAT_MESSAGE_TYPE_COMPRESSED:
+            return self.decode_envelope(text, message, check_size)
+        return self.decode_wire_dict(message, len(text))
+
+    @staticmethod
+    def parse_text_frame(text: str) -> dict[str, Any]:
+        """
+        Parses a text frame into a wire dict
+        The GeoJSON document of layer messages is kept as raw text, so that
+        layers kept in the room histories are not held as parsed objects
+        """
+        if sniff_string_field(text, "type") == QCHAT_MESSAGE_TYPE_GEOJSON:
+            split = split_geojson_frame(text)
+            if split is not None:
+                message, geojson = split
+                message["geojson"] = geojson
+                message.setdefault("nb_features", count_geojson_features(geojson))
+                return message
+        return qchat_json.loads(text)
+
+    def decode_envelope(
+        self, text: str, envelope: dict[str, Any], check_size: bool = True
+    ) -> Optional[QChatMessage]:
+        """
+        Decompresses and decodes the message wrapped in a compressed envelope
+        Envelopes are not unwrapped recursively
+        :param text: text frame of the envelope
+        :param envelope: parsed envelope, see qchat_compression
+        :param check_size: False to decompress the message whatever its size
+        :return: decoded message, None if it is invalid.
+        A QChatOversizedMessage if it expands beyond the size limit of its type
+        """
+        inner_type = envelope.get("inner_type")
+        max_size = self.payload_guard.limit(inner_type) if check_size else 0
+        try:
+            inner_text = decompress_envelope(envelope, max_size)
+        except DecompressedSizeExceeded:
+            return self.payload_guard.quarantine(
+                text, inner_type, envelope.get("author"), binary=False
+            )
+        except ValueError as exc:
+            self.log(
+                message=f"Invalid compressed message received: {exc}",
+                log_level=Qgis.Critical,
+            )
+            return None
+        return self.decode_wire_dict(self.parse_text_frame(inner_text), len(inner_text))
+
+    def decode_binary_frame(
+        self, data: bytes, check_size: bool = True
+    ) -> Optional[QChatMessage]:
+        """
+        Parses and validates a binary frame
+        Only the header is parsed before the size check
+        :param data: binary message received, see qchat_binary_frames
+        :param check_size: False to decode the frame whatever its size
+        :return: decoded message, None if it has no or an unknown type or is invalid.
+        A QChatOversizedMessage if the frame exceeds the size limit of its type
+        """
+        if is_msgpack_frame(data):
+            return self.decode_msgpack_frame(data, check_size)
+        try:
+            header, body = decode_binary_frame(data)
+            msg_type = header.get("type")
+            if check_size and self.payload_guard.is_oversized(msg_type, len(data)):
+                return self.payload_guard.quarantine(
+                    data, msg_type, header.get("author"), binary=True
+                )
+            max_body_size = self.payload_guard.limit(msg_type) if check_size else 0
+            message = header_to_wire_dict(header, body, max_body_size)
+        except DecompressedSizeExceeded:
+            return self.payload_guard.quarantine(
+                data, msg_type, header.get("author"), binary=True
+            )
+        except ValueError as exc:
+            self.log(
+                message=f"Invalid binary message received: {exc}",
+                log_level=Qgis.Critical,
+            )
+            return None
+        return self.decode_wire_dict(message, len(data))
+
+    def decode_msgpack_frame(
+        self, data: bytes, check_size: bool = True
+    ) -> Optional[QChatMessage]:
+        """
+        Parses and validates a MessagePack frame
+        :param data: binary message received, see qchat_msgpack
+        :param check_size: False to decode the frame whatever its size
+        :return: decoded message, None if it has no or an unknown type or is invalid.
+        A QChatOversizedMessage if the frame exceeds the size limit of its type
+        """
+        if check_size:
+            sniffed = sniff_msgpack_fields(data)
+            if self.payload_guard.is_oversized(sniffed["type"], len(data)):
+                return self.payload_guard.quarantine(
+                    data, sniffed["type"], sniffed["author"], binary=True
+                )
+        try:
+            message = msgpack_to_wire_dict(data)
+        except ValueError as exc:
+            self.log(
+                message=f"Invalid MessagePack message received: {exc}",
+                log_level=Qgis.Critical,
+            )
+            return None
+        return self.decode_wire_dict(message, len(data))
+
+    def decode_wire_dict(
+        self, message: dict[str, Any], wire_size: int
+    ) -> Optional[QChatMessage]:
+        """
+        Builds a QChat message from a parsed frame
+        :param wire_size: length of the frame, carried by the message to bound
+        the room histories
+        """
+        if "type" not in message:
+            self.log(
+                message="No 'type' key in received message. Please make sure your configured instance is running gischat v>=2.0.0",
+                log_level=Qgis.Critical,
+            )
+            return None
+        if self.string_table is not None:
+            self.string_table.intern_fields(message)
+        try:
+            decoded = self.registry.decode(message)
+        except KeyError:
+            self.decoding_failed.emit(message["type"])
+            return None
+        if decoded is not None:
+            decoded.set_wire_size(wire_size)
+        return decoded
+
+    @pyqtSlot(str, object)
+    def decode(self, text: str, slot: DecodeSlot) -> None:
+        """
+        Decodes a text frame and emits the resulting message
+        None is emitted if there is none, so that every frame is accounted for
+        :param text: text message received, should be a jsonified string
+        :param slot: slot of the frame, emitted back with the message
+        """
+        message = None
+        try:
+            message = self.decode_frame(text)
+        finally:
+            self.message_decoded.emit(message, slot)
+
+    @pyqtSlot(bytes, object)
+    def decode_binary(self, data: bytes, slot: DecodeSlot) -> None:
+        """
+        Decodes a binary frame and emits the resulting message
+        None is emitted if there is none, so that every frame is accounted for
+        :param data: binary message received, see qchat_binary_frames
+        :param slot: slot of the frame, emitted back with the message
+        """
+        message = None
+        try:
+            message = self.decode_binary_frame(data)
+        finally:
+            self.message_decoded.emit(message, slot)
+
+
+class QChatFrameEncoder(QObject):
     """
-    Custom JSON encoder for dataclass objects
+    Encodes outgoing QChat messages into frames, compressing large payloads
+    and splitting them in chunks
+    Meant to live in a worker thread, so that compression does not stall the GUI
     """
 
-    def default(self, o):
-        if dataclasses.is_dataclass(o):
-            return dataclasses.asdict(o)
-        return super().default(o)
+    def __init__(self):
+        super().__init__()
+        self.log = PlgLogger().log
+
+    # encoded frames and the send generation they were requested for
+    frames_encoded = pyqtSignal(object, int)
+
+    @pyqtSlot(object, bool, int, bool, int, int)
+    def encode(
+        self,
+        message: QChatMessage,
+        binary: bool,
+        compression_threshold: int,
+        use_msgpack: bool,
+        chunk_size: int,
+        generation: int,
+    ) -> None:
+        """
+        Encodes a message and emits the resulting frames
+        :param binary: True to encode the message as a binary frame
+        :param compression_threshold: payload size above which it is compressed
+        :param use_msgpack: True to encode the message as a MessagePack frame
+        :param chunk_size: frame size above which it is sent in chunks
+        :param generation: send generation, emitted back with the frames
+        """
+        try:
+            frames = encode_frames(
+                message, binary, compression_threshold, use_msgpack, chunk_size
+            )
+        except Exception as exc:
+            self.log(
+                message=f"Message of type {message.type} could not be encoded: {exc}",
+                log_level=Qgis.Critical,
+            )
+            return
+        self.frames_encoded.emit(frames, generation)
 
 
 class QChatWebsocket(QObject):
@@ -51,21 +342,147 @@ class QChatWebsocket(QObject):
     Websocket wrapper for handling the QChat communications and messages
     """
 
-    def __init__(self):
+    def __init__(self, string_table: Optional[QChatStringTable] = None):
+        """
+        :param string_table: table sharing the author and avatar strings of
+        received messages, may be shared with other websockets
+        """
         super().__init__()
         self.log = PlgLogger().log
 
         self.ws_client = QtWebSockets.QWebSocket(
             "", QtWebSockets.QWebSocketProtocol.Version13, None
         )
+        # the socket handlers are connected once, the socket is reused
+        # for every connection, driven by the connection state machine
         self.ws_client.error.connect(lambda code: self.error.emit(code))
+        self.ws_client.connected.connect(self.on_ws_client_connected)
+        self.ws_client.disconnected.connect(self.on_ws_client_disconnected)
+        self.state_machine = QChatConnectionStateMachine()
+
+        # url of the current connection, None once closed on purpose
+        self.url: Optional[QUrl] = None
+        self.was_connected = False
+
+        # reconnect on connection loss, with exponential backoff
+        self.auto_reconnect = True
+        self.backoff = ExponentialBackoff()
+        self.reconnect_timer = QTimer(self)
+        self.reconnect_timer.setSingleShot(True)
+        self.reconnect_timer.timeout.connect(self.reconnect)
+        self.reconnect_attempts_total = 0
+        self.reconnections_total = 0
+
+        # outgoing frames, sent within the rate limits
+        self.send_queue = QChatSendQueue()
+        self.send_timer = QTimer(self)
+        self.send_timer.setSingleShot(True)
+        self.send_timer.timeout.connect(self.send_pending_frames)
+        self.ws_client.bytesWritten.connect(self.on_bytes_written)
+
+        # heartbeat: round-trip time and dead peer detection
+        self.ws_client.pong.connect(self.on_pong)
+        self.ping_timer = QTimer(self)
+        self.ping_timer.timeout.connect(self.send_ping)
+        self.ping_interval_s = 15
+        self.heartbeat = Heartbeat()
         self.ws_client.textMessageReceived.connect(self.on_message_received)
+        self.ws_client.binaryMessageReceived.connect(self.on_binary_message_received)
+
+        # send image and geojson messages as binary frames,
+        # to be enabled only if the instance supports them
+        self.binary_frames_enabled = False
+        # serialise messages with MessagePack instead of JSON,
+        # to be enabled only if the instance supports it and msgpack is installed
+        self.msgpack_enabled = False
+
+        self.message_registry = default_message_registry()
+        for message_type, signal in (
+            (QCHAT_MESSAGE_TYPE_UNCOMPLIANT, self.uncompliant_message_received),
+            (QCHAT_MESSAGE_TYPE_TEXT, self.text_message_received),
+            (QCHAT_MESSAGE_TYPE_IMAGE, self.image_message_received),
+            (QCHAT_MESSAGE_TYPE_NB_USERS, self.nb_users_message_received),
+            (QCHAT_MESSAGE_TYPE_NEWCOMER, self.newcomer_message_received),
+            (QCHAT_MESSAGE_TYPE_EXITER, self.exiter_message_received),
+            (QCHAT_MESSAGE_TYPE_LIKE, self.like_message_received),
+            (QCHAT_MESSAGE_TYPE_GEOJSON, self.geojson_message_received),
+            (QCHAT_MESSAGE_TYPE_CRS, self.crs_message_received),
+            (QCHAT_MESSAGE_TYPE_BBOX, self.bbox_message_received),
+        ):
+            self.message_registry.set_handler(message_type, signal.emit)
+
+        # time spent on the GUI thread for each received frame, in seconds,
+        # including the execution of the slots connected to the message signals
+        self.gui_stall_stats = RollingStats()
+        # ids of the last received messages, to drop duplicates
+        self.recent_ids = RecentlySeen(maxlen=5000)
+        self.duplicates_total = 0
+        # rules of the instance, checked before sending messages
+        self.validator = QChatMessageValidator()
+        # size limits of received frames, checked before parsing them
+        self.payload_guard = QChatPayloadGuard()
+        self.string_table = (
+            string_table if string_table is not None else QChatStringTable()
+        )
+        self.frame_decoder = QChatFrameDecoder(
+            self.message_registry, self.payload_guard, self.string_table
+        )
+        self.frame_decoder.decoding_failed.connect(self.on_decoding_failed)
+        self._threaded_decoding = False
+
+        # compression of large outgoing payloads, off the GUI thread,
+        # to be enabled only if the instance supports it
+        self.compression_enabled = False
+        self.compression_threshold = COMPRESSION_THRESHOLD
+        # chunked transfer of large messages,
+        # to be enabled only if the instance supports it
+        self.chunks_enabled = False
+        self.chunk_size = 0
+        self.chunk_reassembler = QChatChunkReassembler()
+        self.chunk_expiry_timer = QTimer(self)
+        self.chunk_expiry_timer.setInterval(5000)
+        self.chunk_expiry_timer.timeout.connect(self.expire_chunks)
+        # bumped when the connection is closed, to drop frames encoded for it
+        self.send_generation = 0
+
+        # worker thread decoding and encoding frames, started when needed
+        self.worker_thread: Optional[QThread] = None
+        self.threaded_frame_decoder: Optional[QChatFrameDecoder] = None
+        self.frame_encoder: Optional[QChatFrameEncoder] = None
+        # slots of the frames handed to the worker thread and not released yet,
+        # the following frames are handed to it too, to keep their order
+        self.decode_order = QChatDecodeOrder()
+        # compressed frames are decompressed in the worker thread, started
+        # on the first one received even if local compression is disabled
+        self.compressed_frames_received = False
 
     connected = pyqtSignal()
     disconnected = pyqtSignal()
+    # value of the new connection state
+    state_changed = pyqtSignal(str)
     error = pyqtSignal(int)
+    # attempt number and delay before it, in seconds
+    reconnect_scheduled = pyqtSignal(int, float)
+    reconnected = pyqtSignal()
+    # smoothed round-trip time of the pings, in milliseconds
+    rtt_measured = pyqtSignal(float)
+    # number of queued outgoing frames and their size in bytes
+    send_queue_changed = pyqtSignal(int, int)
+    # transfer id, number of chunks sent or received and number of chunks,
+    # 0 and 0 when a received transfer is dropped
+    chunks_sent = pyqtSignal(str, int, int)
+    chunks_received = pyqtSignal(str, int, int)
+
+    # internal signals handing raw frames and messages to the worker thread
+    frame_to_decode = pyqtSignal(str, object)
+    binary_frame_to_decode = pyqtSignal(bytes, object)
+    # message, binary, compression threshold, MessagePack, chunk size
+    # and send generation
+    message_to_encode = pyqtSignal(object, bool, int, bool, int, int)
 
     # QChat message signals
+    # message_received is emitted for every message, after its typed signal
+    message_received = pyqtSignal(QChatMessage)
     uncompliant_message_received = pyqtSignal(QChatUncompliantMessage)
     text_message_received = pyqtSignal(QChatTextMessage)
     image_message_received = pyqtSignal(QChatImageMessage)
@@ -77,31 +494,257 @@ class QChatWebsocket(QObject):
     crs_message_received = pyqtSignal(QChatCrsMessage)
     bbox_message_received = pyqtSignal(QChatBboxMessage)
 
+    @property
+    def state(self) -> QChatConnectionState:
+        return self.state_machine.state
+
+    def set_state(self, state: QChatConnectionState) -> None:
+        """
+        Moves the connection to a new state
+        :raises QChatInvalidTransition: if the state cannot be reached from the current one
+        """
+        self.state_machine.transition(state)
+        self.state_changed.emit(state.value)
+
     def open(self, qchat_instance_uri: str, room: str) -> None:
         """
         Opens a websocket to a QChat instance
+        Opening the url of the current connection does nothing, except retrying
+        at once if a reconnection is scheduled. Opening another url closes
+        the current connection first, the socket is reused
         :param qchat_instance_uri: URI of the QChat instance to connect to
         :param room: room to connect to
         """
         protocol, domain = qchat_instance_uri.split("://")
         ws_protocol = "wss" if protocol == "https" else "ws"
         ws_instance_url = f"{ws_protocol}://{domain}"
-        ws_url = f"{ws_instance_url}/room/{room}/ws"
-        self.ws_client.open(QUrl(ws_url))
-        self.ws_client.connected.connect(self.connected.emit)
+        url = QUrl(f"{ws_instance_url}/room/{room}/ws")
+        if url == self.url:
+            if self.state is QChatConnectionState.BACKOFF:
+                self.reconnect_timer.stop()
+                self.reconnect()
+            if self.state is not QChatConnectionState.IDLE:
+                return
+        if self.state is not QChatConnectionState.IDLE:
+            self.close()
+        self.backoff.reset()
+        self.was_connected = False
+        self.url = url
+        # if still closing, the socket is opened again once disconnected
+        if self.state is QChatConnectionState.IDLE:
+            self.connect_socket()
+
+    def connect_socket(self) -> None:
+        self.set_state(QChatConnectionState.CONNECTING)
+        self.ws_client.open(self.url)
 
     def close(self) -> None:
         """
-        Closes a websocket connection
+        Closes a websocket connection, cancelling any pending reconnection
+        """
+        self.url = None
+        self.reconnect_timer.stop()
+        self.backoff.reset()
+        self.stop_heartbeat()
+        self.send_timer.stop()
+        self.send_queue.clear()
+        self.send_generation += 1
+        self.chunk_reassembler.clear()
+        self.chunk_expiry_timer.stop()
+        if self.state is QChatConnectionState.BACKOFF:
+            # no socket to close
+            self.set_state(QChatConnectionState.IDLE)
+        elif self.state in (QChatConnectionState.CONNECTING, QChatConnectionState.OPEN):
+            self.set_state(QChatConnectionState.CLOSING)
+            self.ws_client.close()
+            if self.ws_client.state() == QAbstractSocket.UnconnectedState:
+                # closed at once, e.g. during the handshake, no signal to wait for
+                self.on_ws_client_disconnected()
+
+    @property
+    def reconnecting(self) -> bool:
+        return self.backoff.attempts > 0
+
+    def reconnect(self) -> None:
+        """
+        Opens the websocket again, to the url of the lost connection
+        """
+        if self.url is None or self.state is not QChatConnectionState.BACKOFF:
+            return
+        self.reconnect_attempts_total += 1
+        self.connect_socket()
+
+    def on_ws_client_connected(self) -> None:
+        """
+        Launched when the websocket is connected
+        Emits reconnected instead of connected after an automatic reconnection
+        Ignored if the connection has been closed during the handshake
+        """
+        if self.state is not QChatConnectionState.CONNECTING:
+            return
+        self.set_state(QChatConnectionState.OPEN)
+        self.was_connected = True
+        self.start_heartbeat()
+        if self.reconnecting:
+            self.backoff.reset()
+            self.reconnections_total += 1
+            self.reconnected.emit()
+        else:
+            self.connected.emit()
+        # frames queued while disconnected
+        self.send_pending_frames()
+
+    def on_ws_client_disconnected(self) -> None:
+        """
+        Launched when the websocket is disconnected, or failed to connect
+        Schedules a reconnection if the connection was lost unexpectedly
+        Opens the socket again if another url has been opened while closing
+        """
+        self.stop_heartbeat()
+        self.send_timer.stop()
+        self.send_queue.in_flight_bytes = 0
+        state = self.state
+        if state in (QChatConnectionState.IDLE, QChatConnectionState.BACKOFF):
+            # already handled
+            return
+        if state is QChatConnectionState.CLOSING:
+            self.set_state(QChatConnectionState.IDLE)
+            if self.url is not None:
+                self.connect_socket()
+            else:
+                self.disconnected.emit()
+            return
+        if self.url is None or not self.auto_reconnect or not self.was_connected:
+            self.set_state(QChatConnectionState.IDLE)
+            self.disconnected.emit()
+            return
+        self.set_state(QChatConnectionState.BACKOFF)
+        delay = self.backoff.next_delay()
+        self.reconnect_timer.start(round(delay * 1000))
+        self.reconnect_scheduled.emit(self.backoff.attempts, delay)
+
+    def set_heartbeat(self, interval_s: int, max_missed_pongs: int) -> None:
+        """
+        Configures the heartbeat of the connection
+        :param interval_s: interval between two pings, in seconds, 0 to disable
+        :param max_missed_pongs: number of consecutive pings without pong
+        after which the connection is considered dead and is reopened
         """
-        self.ws_client.connected.disconnect()
-        self.ws_client.close()
+        self.ping_interval_s = interval_s
+        self.heartbeat.max_missed_pongs = max(1, max_missed_pongs)
+        if self.state is QChatConnectionState.OPEN:
+            self.start_heartbeat()
+
+    def start_heartbeat(self) -> None:
+        self.heartbeat.reset()
+        if self.ping_interval_s > 0:
+            self.ping_timer.start(self.ping_interval_s * 1000)
+        else:
+            self.ping_timer.stop()
+
+    def stop_heartbeat(self) -> None:
+        self.ping_timer.stop()
+        self.heartbeat.reset()
+
+    def send_ping(self) -> None:
+        """
+        Pings the instance, aborting the connection if too many pongs are missing
+        Aborting triggers the automatic reconnection, if enabled
+        """
+        if not self.heartbeat.ping():
+            self.log(
+                message=f"No pong received for {self.heartbeat.max_missed_pongs} "
+                "pings, connection considered dead",
+                log_level=Qgis.Warning,
+            )
+            self.stop_heartbeat()
+            self.ws_client.abort()
+            return
+        self.ws_client.ping()
+
+    def on_pong(self, elapsed_time: int, payload: QByteArray) -> None:
+        """
+        Launched when a pong is received
+        :param elapsed_time: round-trip time, in milliseconds
+        """
+        self.rtt_measured.emit(self.heartbeat.pong(elapsed_time))
 
     def send_message(self, message: QChatMessage) -> None:
         """
-        Sends a QChat message to the websocket
+        Validates and queues a QChat message to be sent to the websocket
+        Too long texts are split into several messages
+        An id and a send timestamp are set on each message if it has none
+        :raises QChatValidationError: if the message breaks the instance rules
         """
-        self.ws_client.sendTextMessage(json.dumps(message, cls=EnhancedJSONEncoder))
+        heavy = can_be_sent_as_binary(message)
+        binary = self.binary_frames_enabled and heavy
+        for part in self.validator.validate(message, binary, self.msgpack_enabled):
+            if hasattr(part, "id") and part.id is None:
+                part = replace(part, id=uuid4().hex, timestamp=time())
+            self.send_validated_message(part, heavy, binary)
+
+    def send_validated_message(
+        self, message: QChatMessage, heavy: bool, binary: bool
+    ) -> None:
+        if heavy and self.compression_active:
+            # compressed off the GUI thread, queued once encoded
+            self.message_to_encode.emit(
+                message,
+                binary,
+                self.compression_threshold,
+                self.msgpack_enabled,
+                self.active_chunk_size,
+                self.send_generation,
+            )
+            return
+        self.push_frames(
+            encode_frames(
+                message,
+                binary,
+                use_msgpack=self.msgpack_enabled,
+                chunk_size=self.active_chunk_size,
+            )
+        )
+
+    def push_frames(self, frames: list[OutgoingFrame]) -> None:
+        for frame in frames:
+            self.send_queue.push(frame)
+        self.send_pending_frames()
+
+    def on_frames_encoded(self, frames: list[OutgoingFrame], generation: int) -> None:
+        """
+        Launched when the worker thread has encoded a message
+        Frames encoded for a connection closed since then are dropped
+        """
+        if generation == self.send_generation:
+            self.push_frames(frames)
+
+    def send_pending_frames(self) -> None:
+        """
+        Sends queued frames while the budgets allow it
+        Sending resumes when bytes are written or when the budgets refill
+        """
+        self.send_timer.stop()
+        while self.state is QChatConnectionState.OPEN:
+            frame, delay = self.send_queue.pop()
+            if frame is None:
+                if delay is not None:
+                    self.send_timer.start(max(1, round(delay * 1000)))
+                break
+            if frame.binary:
+                self.ws_client.sendBinaryMessage(QByteArray(frame.data))
+            else:
+                self.ws_client.sendTextMessage(frame.data)
+            if frame.transfer_id is not None:
+                self.chunks_sent.emit(frame.transfer_id, frame.index + 1, frame.count)
+        self.send_queue_changed.emit(
+            self.send_queue.depth, self.send_queue.queued_bytes
+        )
+
+    def on_bytes_written(self, nb_bytes: int) -> None:
+        self.send_queue.on_bytes_written(nb_bytes)
+        if self.send_queue.depth and not self.send_timer.isActive():
+            self.send_pending_frames()
 
     def error_string(self) -> str:
         """
@@ -109,46 +752,276 @@ class QChatWebsocket(QObject):
         """
         return self.ws_client.errorString()
 
+    def register_message_type(
+        self,
+        message_type: str,
+        decoder: MessageDecoder,
+        handler: Optional[MessageHandler] = None,
+    ) -> None:
+        """
+        Registers a (new) message type at runtime
+        :param message_type: value of the 'type' key of the wire message
+        :param decoder: callable building a QChatMessage from the wire dict
+        :param handler: callable receiving the decoded message, e.g. a signal emit
+        """
+        self.message_registry.register(message_type, decoder, handler)
+
+    @property
+    def threaded_decoding(self) -> bool:
+        return self._threaded_decoding
+
+    def set_threaded_decoding(self, enabled: bool) -> None:
+        """
+        Starts or stops decoding received frames in the worker thread
+        :param enabled: True to decode frames off the GUI thread
+        """
+        self._threaded_decoding = enabled
+        self.update_worker_thread()
+
+    @property
+    def compression_active(self) -> bool:
+        return self.compression_enabled and self.compression_threshold > 0
+
+    def set_compression(self, enabled: bool, threshold: int) -> None:
+        """
+        Configures the compression of large outgoing payloads
+        Compressed frames received are decompressed whatever this setting
+        :param enabled: True if the instance supports compressed messages
+        :param threshold: payload size above which it is compressed, in bytes,
+        0 to never compress
+        """
+        self.compression_enabled = enabled
+        self.compression_threshold = threshold
+        self.update_worker_thread()
+
+    @property
+    def active_chunk_size(self) -> int:
+        return self.chunk_size if self.chunks_enabled else 0
+
+    def update_worker_thread(self) -> None:
+        """
+        Starts the worker thread if decoding or compression needs it,
+        stops it otherwise
+        Frames already handed to the worker are decoded before it stops
+        """
+        needed = (
+            self._threaded_decoding
+            or self.compression_active
+            or self.compressed_frames_received
+        )
+        if needed == (self.worker_thread is not None):
+            return
+        if needed:
+            decoder = QChatFrameDecoder(
+                self.message_registry, self.payload_guard, self.string_table
+            )
+            encoder = QChatFrameEncoder()
+            self.worker_thread = QThread()
+            decoder.moveToThread(self.worker_thread)
+            encoder.moveToThread(self.worker_thread)
+            self.frame_to_decode.connect(decoder.decode)
+            self.binary_frame_to_decode.connect(decoder.decode_binary)
+            self.message_to_encode.connect(encoder.encode)
+            decoder.message_decoded.connect(self.on_message_decoded)
+            decoder.decoding_failed.connect(self.on_decoding_failed)
+            encoder.frames_encoded.connect(self.on_frames_encoded)
+            self.worker_thread.finished.connect(decoder.deleteLater)
+            self.worker_thread.finished.connect(encoder.deleteLater)
+            self.worker_thread.start()
+            self.threaded_frame_decoder = decoder
+            self.frame_encoder = encoder
+        else:
+            self.frame_to_decode.disconnect(self.threaded_frame_decoder.decode)
+            self.binary_frame_to_decode.disconnect(
+                self.threaded_frame_decoder.decode_binary
+            )
+            self.message_to_encode.disconnect(self.frame_encoder.encode)
+            self.worker_thread.quit()
+            self.worker_thread.wait()
+            self.worker_thread = None
+            self.threaded_frame_decoder = None
+            self.frame_encoder = None
+            self.decode_order.clear()
+
+    def shutdown(self) -> None:
+        """
+        Stops the worker thread, to be called before the websocket is deleted
+        """
+        self._threaded_decoding = False
+        self.compression_enabled = False
+        self.compressed_frames_received = False
+        self.update_worker_thread()
+
+    def on_compressed_frame_received(self) -> None:
+        """
+        Starts the worker thread on the first compressed frame received,
+        not to decompress the ones of other users on the GUI thread
+        """
+        if not self.compressed_frames_received:
+            self.compressed_frames_received = True
+            self.update_worker_thread()
+
     def on_message_received(self, text: str) -> None:
         """
         Launched when a text message is received from the websocket
         :param text: text message received, should be a jsonified string
         """
-        message = json.loads(text)
-        if "type" not in message:
+        self.receive_text_frame(text)
+
+    def receive_text_frame(self, text: str, first: bool = False) -> None:
+        """
+        Decodes a text frame, in the worker thread if needed
+        :param text: text message received, should be a jsonified string
+        :param first: True to emit the message before the ones of the frames
+        already handed to the worker, e.g. for a frame reassembled from chunks
+        """
+        compressed = sniff_string_field(text, "type") == QCHAT_MESSAGE_TYPE_COMPRESSED
+        if compressed:
+            self.on_compressed_frame_received()
+        if self.worker_thread is not None and (
+            self._threaded_decoding or self.decode_order or compressed
+        ):
+            self.frame_to_decode.emit(text, self.decode_order.reserve(first))
+            return
+        start = perf_counter()
+        try:
+            message = self.frame_decoder.decode_frame(text)
+            if message is not None:
+                self.emit_message(message)
+        finally:
+            self.gui_stall_stats.add(perf_counter() - start)
+
+    def on_binary_message_received(self, data: QByteArray) -> None:
+        """
+        Launched when a binary message is received from the websocket
+        :param data: binary message received, see qchat_binary_frames
+        """
+        self.receive_binary_frame(data.data())
+
+    def receive_binary_frame(self, data: bytes, first: bool = False) -> None:
+        """
+        Decodes a binary frame, in the worker thread if needed
+        :param data: binary message received, see qchat_binary_frames
+        :param first: True to emit the message before the ones of the frames
+        already handed to the worker, e.g. for a frame reassembled from chunks
+        """
+        compressed = is_compressed_binary_frame(data)
+        if compressed:
+            self.on_compressed_frame_received()
+        if self.worker_thread is not None and (
+            self._threaded_decoding or self.decode_order or compressed
+        ):
+            self.binary_frame_to_decode.emit(data, self.decode_order.reserve(first))
+            return
+        start = perf_counter()
+        try:
+            message = self.frame_decoder.decode_binary_frame(data)
+            if message is not None:
+                self.emit_message(message)
+        finally:
+            self.gui_stall_stats.add(perf_counter() - start)
+
+    def load_oversized_message(self, message: QChatOversizedMessage) -> None:
+        """
+        Decodes the frame of an oversized message regardless of its size,
+        on the GUI thread, and emits the resulting message
+        :raises OSError: if the spilled payload can not be read
+        """
+        payload = message.read_payload()
+        if message.binary:
+            decoded = self.frame_decoder.decode_binary_frame(payload, check_size=False)
+        else:
+            decoded = self.frame_decoder.decode_frame(payload, check_size=False)
+        if decoded is not None:
+            self.emit_message(decoded)
+
+    def on_message_decoded(
+        self, message: Optional[QChatMessage], slot: DecodeSlot
+    ) -> None:
+        """
+        Launched when the worker thread has decoded a frame
+        Messages are emitted in the order of their slots, the ones decoded
+        before the previous frames are released are held back
+        :param message: decoded message, None if the frame had none
+        :param slot: slot of the frame
+        """
+        if self.decode_order.complete(slot, message):
+            messages = self.decode_order.release()
+        else:
+            # the worker thread has been stopped meanwhile
+            messages = [message]
+        start = perf_counter()
+        try:
+            for decoded in messages:
+                if decoded is not None:
+                    self.emit_message(decoded)
+        finally:
+            self.gui_stall_stats.add(perf_counter() - start)
+
+    def on_decoding_failed(self, msg_type: str) -> None:
+        """
+        Launched when a received frame can not be decoded
+        Emits an uncompliant message explaining why
+        :param msg_type: type of the message that could not be decoded
+        """
+        text = self.tr(
+            "Unintelligible message received. Please make sure you are using the latest plugin version. (type={type})"
+        ).format(type=msg_type)
+        self.emit_message(
+            QChatUncompliantMessage(type=QCHAT_MESSAGE_TYPE_UNCOMPLIANT, reason=text)
+        )
+
+    def on_chunk_received(self, chunk: QChatChunkMessage) -> None:
+        """
+        Buffers a received chunk and decodes the frame of its transfer once complete
+        """
+        try:
+            frame = self.chunk_reassembler.add(chunk)
+        except ValueError as exc:
+            self.log(message=str(exc), log_level=Qgis.Warning)
+            self.chunks_received.emit(chunk.transfer_id, 0, 0)
+            return
+        if frame is None:
+            self.chunks_received.emit(
+                chunk.transfer_id, *self.chunk_reassembler.progress(chunk.transfer_id)
+            )
+            if not self.chunk_expiry_timer.isActive():
+                self.chunk_expiry_timer.start()
+            return
+        self.chunks_received.emit(chunk.transfer_id, chunk.count, chunk.count)
+        if not self.chunk_reassembler:
+            self.chunk_expiry_timer.stop()
+        # the frame takes the place of its last chunk among the received ones
+        if isinstance(frame, bytes):
+            self.receive_binary_frame(frame, first=True)
+        else:
+            self.receive_text_frame(frame, first=True)
+
+    def expire_chunks(self) -> None:
+        """
+        Drops the chunked transfers without new chunks for too long
+        """
+        for transfer_id in self.chunk_reassembler.expire():
             self.log(
-                message="No 'type' key in received message. Please make sure your configured instance is running gischat v>=2.0.0",
-                log_level=Qgis.Critical,
+                message=f"Chunked transfer {transfer_id} timed out",
+                log_level=Qgis.Warning,
             )
+            self.chunks_received.emit(transfer_id, 0, 0)
+        if not self.chunk_reassembler:
+            self.chunk_expiry_timer.stop()
+
+    def emit_message(self, message: QChatMessage) -> None:
+        """
+        Emits the signal(s) matching a received QChat message
+        Messages whose id has been seen recently are dropped as duplicates
+        Chunks are consumed, the message they carry is emitted once complete
+        """
+        if message.type == QCHAT_MESSAGE_TYPE_CHUNK:
+            self.on_chunk_received(message)
             return
-        msg_type = message["type"]
-        try:
-            if msg_type == QCHAT_MESSAGE_TYPE_UNCOMPLIANT:
-                self.uncompliant_message_received.emit(
-                    QChatUncompliantMessage(**message)
-                )
-            elif msg_type == QCHAT_MESSAGE_TYPE_TEXT:
-                self.text_message_received.emit(QChatTextMessage(**message))
-            elif msg_type == QCHAT_MESSAGE_TYPE_IMAGE:
-                self.image_message_received.emit(QChatImageMessage(**message))
-            elif msg_type == QCHAT_MESSAGE_TYPE_NB_USERS:
-                self.nb_users_message_received.emit(QChatNbUsersMessage(**message))
-            elif msg_type == QCHAT_MESSAGE_TYPE_NEWCOMER:
-                self.newcomer_message_received.emit(QChatNewcomerMessage(**message))
-            elif msg_type == QCHAT_MESSAGE_TYPE_EXITER:
-                self.exiter_message_received.emit(QChatExiterMessage(**message))
-            elif msg_type == QCHAT_MESSAGE_TYPE_LIKE:
-                self.like_message_received.emit(QChatLikeMessage(**message))
-            elif msg_type == QCHAT_MESSAGE_TYPE_GEOJSON:
-                self.geojson_message_received.emit(QChatGeojsonMessage(**message))
-            elif msg_type == QCHAT_MESSAGE_TYPE_CRS:
-                self.crs_message_received.emit(QChatCrsMessage(**message))
-            elif msg_type == QCHAT_MESSAGE_TYPE_BBOX:
-                self.bbox_message_received.emit(QChatBboxMessage(**message))
-        except KeyError:
-            text = self.tr(
-                "Unintelligible message received. Please make sure you are using the latest plugin version. (type={type})"
-            ).format(type=msg_type)
-            message = QChatUncompliantMessage(reason=text)
-            self.uncompliant_message_received.emit(message)
-            raise QChatMessageCanNotBeParsedException(message=text)
+        message_id = getattr(message, "id", None)
+        if message_id is not None and not self.recent_ids.add(message_id):
+            self.duplicates_total += 1
+            return
+        self.message_registry.dispatch(message)
+        self.message_received.emit(message)
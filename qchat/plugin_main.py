@@ -17,6 +17,7 @@ from qgis.PyQt.QtWidgets import QAction
 from qchat.__about__ import DIR_PLUGIN_ROOT, __icon_path__, __title__, __uri_homepage__
 from qchat.gui.dck_qchat import QChatWidget
 from qchat.gui.dlg_settings import PlgOptionsFactory
+from qchat.gui.qchat_thumbnails import pixmap_cache
 from qchat.toolbelt import PlgLogger
 from qchat.toolbelt.preferences import PlgOptionsManager
 
@@ -156,6 +157,12 @@ class QChatPlugin:
 
         # -- Clean up toolbar
         del self.toolbar
+
+        # -- Close the room websockets and stop the worker threads before deleting the chat widget
+        if self.qchat_widget:
+            self.qchat_widget.connections.shutdown()
+            self.qchat_widget.chat_model.thumbnails.shutdown()
+        pixmap_cache.clear()
         del self.qchat_widget
 
         # -- Clean up preferences panel in QGIS settings
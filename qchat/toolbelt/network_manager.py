@@ -129,8 +129,8 @@ class NetworkRequestsManager:
 
         .. code-block:: python
 
-            import json
-            response_as_dict = json.loads(str(response, "UTF8"))
+            from qchat.logic import qchat_json
+            response_as_dict = qchat_json.loads(response.data())
         """
         if not url:
             url = self.build_url(PlgOptionsManager.get_plg_settings().rss_source)
@@ -66,6 +66,27 @@ class PlgSettingsStructure:
     qchat_color_self: str = "#00cc00"
     qchat_color_admin: str = "#ffa500"
 
+    # performance
+    qchat_threaded_decoding: bool = False
+    qchat_batch_window_ms: int = 0
+    qchat_max_image_size_mb: int = 10
+    qchat_max_layer_size_mb: int = 20
+    qchat_spill_oversized_payloads: bool = False
+    qchat_reconnect_on_connection_lost: bool = True
+    qchat_reconnect_max_delay_s: int = 60
+    qchat_ping_interval_s: int = 15
+    qchat_ping_max_missed: int = 3
+    qchat_send_rate_messages: int = 20
+    qchat_send_rate_kbytes: int = 0
+    qchat_compression_threshold_kb: int = 64
+    qchat_chunk_size_kb: int = 0
+    qchat_max_open_rooms: int = 3
+    qchat_room_history_size: int = 500
+    qchat_history_max_mb: int = 64
+    qchat_history_evict_heavy_first: bool = False
+    qchat_image_cache_mb: int = 32
+    qchat_frame_budget_ms: int = 8
+
     # authoring
     author_nickname: str = ""
     author_avatar: str = "mGeoPackage.svg"
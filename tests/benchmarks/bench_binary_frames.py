@@ -0,0 +1,42 @@
+#! python3  # noqa E265
+
+"""
+Bytes on the wire of image and GeoJSON messages, text versus binary frames.
+
+Usage from the repo root folder:
+
+.. code-block:: bash
+
+    python -m tests.benchmarks.bench_binary_frames
+"""
+
+# standard library
+import random
+
+# project
+from qchat.logic import qchat_json
+from qchat.logic.qchat_binary_frames import message_to_binary_frame
+from qchat.logic.qchat_message_registry import default_message_registry
+from tests.benchmarks.samples import geojson_message, image_message
+
+
+def main() -> None:
+    rnd = random.Random(42)
+    registry = default_message_registry()
+    messages = {
+        "screenshot 100 kB": image_message(rnd, 100_000),
+        "screenshot 500 kB": image_message(rnd, 500_000),
+        "screenshot 2 MB": image_message(rnd, 2_000_000),
+        "layer 1000 features": geojson_message(rnd, 1000),
+    }
+    print(f"{'message':<22} {'text frame':>12} {'binary frame':>13} {'saving':>8}")
+    for name, wire_dict in messages.items():
+        message = registry.decode(wire_dict)
+        text_size = len(qchat_json.dumps_bytes(message))
+        binary_size = len(message_to_binary_frame(message))
+        saving = 1 - binary_size / text_size
+        print(f"{name:<22} {text_size:>12,} {binary_size:>13,} {saving:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#! python3  # noqa E265
+
+"""
+Size on the wire and compression time of layer and image messages.
+
+Usage from the repo root folder:
+
+.. code-block:: bash
+
+    python -m tests.benchmarks.bench_compression
+"""
+
+# standard library
+import random
+import time
+
+# project
+from qchat.logic.qchat_compression import compress, decompress
+from qchat.logic.qchat_message_registry import default_message_registry
+from tests.benchmarks.samples import geojson_message, image_message
+
+
+def main() -> None:
+    rnd = random.Random(42)
+    registry = default_message_registry()
+    messages = {
+        "layer 200 features": geojson_message(rnd, 200),
+        "layer 1000 features": geojson_message(rnd, 1000),
+        "layer 5000 features": geojson_message(rnd, 5000),
+        "screenshot 500 kB": image_message(rnd, 500_000),
+    }
+    print(
+        f"{'message':<22} {'raw':>11} {'compressed':>11} {'ratio':>6}"
+        f" {'compress':>10} {'decompress':>11}"
+    )
+    for name, wire_dict in messages.items():
+        data = registry.decode(wire_dict).to_json().encode("utf-8")
+        start = time.perf_counter()
+        compressed = compress(data)
+        compress_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        decompress(compressed)
+        decompress_ms = (time.perf_counter() - start) * 1000
+        print(
+            f"{name:<22} {len(data):>11,} {len(compressed):>11,}"
+            f" {len(data) / len(compressed):>5.1f}x"
+            f" {compress_ms:>7.1f} ms {decompress_ms:>8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#! python3  # noqa E265
+
+"""
+Benchmark of the available JSON backends on QChat payloads.
+
+Usage from the repo root folder:
+
+.. code-block:: bash
+
+    python -m tests.benchmarks.bench_json_codec
+"""
+
+# standard library
+import random
+import timeit
+
+# project
+from qchat.logic import qchat_json
+from qchat.logic.qchat_message_registry import default_message_registry
+from tests.benchmarks.samples import bbox_message, geojson_message, text_message
+
+REPEAT = 5
+
+
+def best_time(func, number: int) -> float:
+    """Best time of a single call, in microseconds."""
+    return min(timeit.repeat(func, number=number, repeat=REPEAT)) / number * 1e6
+
+
+def main() -> None:
+    rnd = random.Random(42)
+    registry = default_message_registry()
+    payloads = {
+        "text": (registry.decode(text_message(rnd)), 20_000),
+        "bbox": (registry.decode(bbox_message(rnd)), 20_000),
+        "geojson": (registry.decode(geojson_message(rnd, nb_features=1000)), 5),
+    }
+
+    print(
+        f"{'payload':<9} {'backend':<8} {'size':>10} {'dumps µs':>12} "
+        f"{'loads(str) µs':>14} {'loads(bytes) µs':>16}"
+    )
+    for payload_name, (message, number) in payloads.items():
+        for codec_name in qchat_json.available_codecs():
+            qchat_json.set_codec(codec_name)
+            text = qchat_json.dumps(message)
+            data = text.encode("utf-8")
+            dumps = best_time(lambda: qchat_json.dumps(message), number)
+            loads_str = best_time(lambda: qchat_json.loads(text), number)
+            loads_bytes = best_time(lambda: qchat_json.loads(data), number)
+            print(
+                f"{payload_name:<9} {codec_name:<8} {len(data):>10,} {dumps:>12,.1f} "
+                f"{loads_str:>14,.1f} {loads_bytes:>16,.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
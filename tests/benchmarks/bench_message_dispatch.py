@@ -0,0 +1,106 @@
+#! python3  # noqa E265
+
+"""
+Benchmark of the decoding and dispatch of incoming websocket frames.
+
+Compares the former if/elif chain to the message registry on a mixed stream.
+
+Usage from the repo root folder:
+
+.. code-block:: bash
+
+    python -m tests.benchmarks.bench_message_dispatch
+"""
+
+# standard library
+import json
+import timeit
+
+# project
+from qchat.constants import (
+    QCHAT_MESSAGE_TYPE_BBOX,
+    QCHAT_MESSAGE_TYPE_CRS,
+    QCHAT_MESSAGE_TYPE_EXITER,
+    QCHAT_MESSAGE_TYPE_GEOJSON,
+    QCHAT_MESSAGE_TYPE_IMAGE,
+    QCHAT_MESSAGE_TYPE_LIKE,
+    QCHAT_MESSAGE_TYPE_NB_USERS,
+    QCHAT_MESSAGE_TYPE_NEWCOMER,
+    QCHAT_MESSAGE_TYPE_TEXT,
+    QCHAT_MESSAGE_TYPE_UNCOMPLIANT,
+)
+from qchat.logic.qchat_message_registry import default_message_registry
+from qchat.logic.qchat_messages import (
+    QChatBboxMessage,
+    QChatCrsMessage,
+    QChatExiterMessage,
+    QChatGeojsonMessage,
+    QChatImageMessage,
+    QChatLikeMessage,
+    QChatNbUsersMessage,
+    QChatNewcomerMessage,
+    QChatTextMessage,
+    QChatUncompliantMessage,
+)
+from tests.benchmarks.samples import mixed_stream
+
+NB_FRAMES = 50_000
+REPEAT = 7
+
+
+def emit(message) -> None:
+    pass
+
+
+def legacy_dispatch(message: dict) -> None:
+    msg_type = message["type"]
+    if msg_type == QCHAT_MESSAGE_TYPE_UNCOMPLIANT:
+        emit(QChatUncompliantMessage(**message))
+    elif msg_type == QCHAT_MESSAGE_TYPE_TEXT:
+        emit(QChatTextMessage(**message))
+    elif msg_type == QCHAT_MESSAGE_TYPE_IMAGE:
+        emit(QChatImageMessage(**message))
+    elif msg_type == QCHAT_MESSAGE_TYPE_NB_USERS:
+        emit(QChatNbUsersMessage(**message))
+    elif msg_type == QCHAT_MESSAGE_TYPE_NEWCOMER:
+        emit(QChatNewcomerMessage(**message))
+    elif msg_type == QCHAT_MESSAGE_TYPE_EXITER:
+        emit(QChatExiterMessage(**message))
+    elif msg_type == QCHAT_MESSAGE_TYPE_LIKE:
+        emit(QChatLikeMessage(**message))
+    elif msg_type == QCHAT_MESSAGE_TYPE_GEOJSON:
+        emit(QChatGeojsonMessage(**message))
+    elif msg_type == QCHAT_MESSAGE_TYPE_CRS:
+        emit(QChatCrsMessage(**message))
+    elif msg_type == QCHAT_MESSAGE_TYPE_BBOX:
+        emit(QChatBboxMessage(**message))
+
+
+def best_rate(func, items: list) -> float:
+    best = min(
+        timeit.repeat(lambda: [func(item) for item in items], number=1, repeat=REPEAT)
+    )
+    return len(items) / best
+
+
+def main() -> None:
+    messages = mixed_stream(NB_FRAMES)
+    frames = [json.dumps(m) for m in messages]
+
+    registry = default_message_registry()
+    for message_type in registry.message_types:
+        registry.set_handler(message_type, emit)
+
+    print(f"{NB_FRAMES:,} mixed frames, best of {REPEAT}")
+    print(f"{'':<15} {'frames/s':>12} {'dispatch only':>14}")
+    for name, dispatch in (
+        ("if/elif chain", legacy_dispatch),
+        ("registry", registry.handle),
+    ):
+        with_json = best_rate(lambda text: dispatch(json.loads(text)), frames)
+        dispatch_only = best_rate(dispatch, messages)
+        print(f"{name:<15} {with_json:>12,.0f} {dispatch_only:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#! python3  # noqa E265
+
+"""
+Benchmark of the encoding of outgoing layer messages.
+
+Compares the former dataclasses.asdict based encoder, which deep copies the
+GeoJSON before serialising it, to the per-type wire encoding, from a parsed
+GeoJSON dict and from the raw GeoJSON text as exported by QGIS.
+
+Usage from the repo root folder:
+
+.. code-block:: bash
+
+    python -m tests.benchmarks.bench_message_encoding
+"""
+
+# standard library
+import dataclasses
+import json
+import random
+import timeit
+import tracemalloc
+
+# project
+from qchat.logic import qchat_json
+from qchat.logic.qchat_messages import QChatGeojsonMessage
+from tests.benchmarks.samples import geojson_message
+
+NB_FEATURES = 5_000
+REPEAT = 5
+
+
+class AsdictJSONEncoder(json.JSONEncoder):
+    def default(self, o):
+        if dataclasses.is_dataclass(o):
+            return dataclasses.asdict(o)
+        return super().default(o)
+
+
+def measure(encode) -> tuple[float, float]:
+    """Returns the best encoding time in ms and the peak memory in MB."""
+    tracemalloc.start()
+    encode()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    best = min(timeit.repeat(encode, number=1, repeat=REPEAT))
+    return best * 1000, peak / 1024 / 1024
+
+
+def main() -> None:
+    wire = geojson_message(random.Random(42), NB_FEATURES)
+    parsed = QChatGeojsonMessage(**wire)
+    raw = QChatGeojsonMessage(**{**wire, "geojson": json.dumps(wire["geojson"])})
+    size = len(parsed.to_json()) / 1024 / 1024
+
+    print(f"Layer of {NB_FEATURES:,} features, {size:.1f} MB of JSON, best of {REPEAT}")
+    print(f"{'':<28} {'time (ms)':>10} {'peak (MB)':>10}")
+    for codec in qchat_json.available_codecs():
+        qchat_json.set_codec(codec)
+        cases = [
+            (f"to_json dict ({codec})", lambda: parsed.to_json()),
+            (f"to_json raw text ({codec})", lambda: raw.to_json()),
+        ]
+        if codec == "json":
+            cases.insert(
+                0, ("asdict + json", lambda: json.dumps(parsed, cls=AsdictJSONEncoder))
+            )
+        for name, encode in cases:
+            elapsed, peak = measure(encode)
+            print(f"{name:<28} {elapsed:>10.1f} {peak:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#! python3  # noqa E265
+
+"""
+Benchmark of the memory footprint and construction time of QChat messages.
+
+Compares the slotted message classes to equivalent frozen dataclasses with a
+per-instance __dict__, as they were before, on a mixed stream of messages.
+Field values are shared with the wire dicts: only the instances are measured.
+
+Usage from the repo root folder:
+
+.. code-block:: bash
+
+    python -m tests.benchmarks.bench_message_memory
+"""
+
+# standard library
+import timeit
+import tracemalloc
+from dataclasses import MISSING, field, fields, make_dataclass
+
+# project
+from qchat.logic.qchat_message_registry import QCHAT_MESSAGE_CLASSES
+from tests.benchmarks.samples import mixed_stream
+
+NB_MESSAGES = 100_000
+REPEAT = 5
+
+
+def dict_based_class(cls: type) -> type:
+    """Frozen dataclass with the same fields as cls and a per-instance __dict__."""
+    spec = [
+        (
+            (f.name, f.type)
+            if f.default is MISSING
+            else (f.name, f.type, field(default=f.default))
+        )
+        for f in fields(cls)
+    ]
+    return make_dataclass(f"Dict{cls.__name__}", spec, frozen=True)
+
+
+def build(classes: dict, messages: list[dict]) -> list:
+    return [classes[m["type"]](**m) for m in messages]
+
+
+def measure(classes: dict, messages: list[dict]) -> tuple[float, float]:
+    """Returns the bytes per message and the construction rate in messages/s."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    instances = build(classes, messages)
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del instances
+    best = min(timeit.repeat(lambda: build(classes, messages), number=1, repeat=REPEAT))
+    return size / len(messages), len(messages) / best
+
+
+def main() -> None:
+    messages = mixed_stream(NB_MESSAGES)
+    dict_classes = {t: dict_based_class(c) for t, c in QCHAT_MESSAGE_CLASSES.items()}
+
+    print(f"{NB_MESSAGES:,} mixed messages, construction best of {REPEAT}")
+    print(f"{'':<12} {'bytes/message':>14} {'messages/s':>12}")
+    for name, classes in (
+        ("__dict__", dict_classes),
+        ("__slots__", QCHAT_MESSAGE_CLASSES),
+    ):
+        bytes_per_message, rate = measure(classes, messages)
+        print(f"{name:<12} {bytes_per_message:>14,.0f} {rate:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#! python3  # noqa E265
+
+"""
+Encoding time, decoding time and size of QChat messages, JSON versus MessagePack.
+
+Usage from the repo root folder:
+
+.. code-block:: bash
+
+    python -m tests.benchmarks.bench_msgpack
+"""
+
+# standard library
+import random
+import time
+
+# project
+from qchat.logic import qchat_json, qchat_msgpack
+from qchat.logic.qchat_message_registry import default_message_registry
+from tests.benchmarks.samples import bbox_message, geojson_message, text_message
+
+NB_RUNS = 20
+
+
+def timed(function, *args) -> float:
+    """
+    Returns the best execution time of a function, in milliseconds
+    """
+    best = float("inf")
+    for _ in range(NB_RUNS):
+        start = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    if not qchat_msgpack.is_available():
+        print("msgpack is not installed")
+        return
+    rnd = random.Random(42)
+    registry = default_message_registry()
+    traffic = {
+        "1000 text messages": [text_message(rnd) for _ in range(1000)],
+        "1000 bbox messages": [bbox_message(rnd) for _ in range(1000)],
+        "layer 1000 features": [geojson_message(rnd, 1000)],
+    }
+    print(f"JSON backend: {qchat_json.get_codec().name}")
+    print(f"{'traffic':<22} {'format':<12} {'size':>11} {'encode':>10} {'decode':>10}")
+    for name, wire_dicts in traffic.items():
+        messages = [registry.decode(wire_dict) for wire_dict in wire_dicts]
+        for format_name, encode, decode in (
+            ("JSON", lambda m: m.to_json(), qchat_json.loads),
+            (
+                "MessagePack",
+                qchat_msgpack.message_to_msgpack,
+                qchat_msgpack.msgpack_to_wire_dict,
+            ),
+        ):
+            frames = [encode(message) for message in messages]
+            size = sum(len(frame) for frame in frames)
+            encode_ms = timed(lambda: [encode(message) for message in messages])
+            decode_ms = timed(lambda: [decode(frame) for frame in frames])
+            print(
+                f"{name:<22} {format_name:<12} {size:>11,}"
+                f" {encode_ms:>7.1f} ms {decode_ms:>7.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
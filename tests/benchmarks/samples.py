@@ -0,0 +1,141 @@
+#! python3  # noqa E265
+
+"""
+Sample QChat wire messages shared by the benchmarks.
+"""
+
+# standard library
+import base64
+import random
+
+# project
+from qchat.constants import (
+    QCHAT_MESSAGE_TYPE_BBOX,
+    QCHAT_MESSAGE_TYPE_CRS,
+    QCHAT_MESSAGE_TYPE_EXITER,
+    QCHAT_MESSAGE_TYPE_GEOJSON,
+    QCHAT_MESSAGE_TYPE_IMAGE,
+    QCHAT_MESSAGE_TYPE_LIKE,
+    QCHAT_MESSAGE_TYPE_NB_USERS,
+    QCHAT_MESSAGE_TYPE_NEWCOMER,
+    QCHAT_MESSAGE_TYPE_TEXT,
+)
+
+# ############################################################################
+# ########## Globals ###############
+# ##################################
+
+AUTHORS = ["jdoe", "gischat_fan", "qgis_lover", "mapper42", "geotribu"]
+AVATARS = ["mGeoPackage.svg", "mIconPostgis.svg", "mIconInfo.svg"]
+CRS_WKT = 'GEOGCRS["WGS 84",DATUM["World Geodetic System 1984"]]'
+
+# ############################################################################
+# ########## Functions #############
+# ##################################
+
+
+def text_message(rnd: random.Random) -> dict:
+    return {
+        "type": QCHAT_MESSAGE_TYPE_TEXT,
+        "author": rnd.choice(AUTHORS),
+        "avatar": rnd.choice(AVATARS),
+        "text": " ".join(
+            rnd.choice(["hello", "map", "layer", "@all", "qgis", "cool"])
+            for _ in range(rnd.randint(3, 30))
+        ),
+    }
+
+
+def bbox_message(rnd: random.Random) -> dict:
+    xmin, ymin = rnd.uniform(-180, 0), rnd.uniform(-90, 0)
+    return {
+        "type": QCHAT_MESSAGE_TYPE_BBOX,
+        "author": rnd.choice(AUTHORS),
+        "avatar": rnd.choice(AVATARS),
+        "crs_wkt": CRS_WKT,
+        "crs_authid": "EPSG:4326",
+        "xmin": xmin,
+        "xmax": xmin + rnd.uniform(0, 180),
+        "ymin": ymin,
+        "ymax": ymin + rnd.uniform(0, 90),
+    }
+
+
+def geojson(rnd: random.Random, nb_features: int = 200, nb_vertices: int = 20) -> dict:
+    features = []
+    for i in range(nb_features):
+        x, y = rnd.uniform(-5, 8), rnd.uniform(42, 51)
+        ring = [
+            [round(x + rnd.uniform(0, 0.1), 7), round(y + rnd.uniform(0, 0.1), 7)]
+            for _ in range(nb_vertices)
+        ]
+        ring.append(ring[0])
+        features.append(
+            {
+                "type": "Feature",
+                "id": i,
+                "geometry": {"type": "Polygon", "coordinates": [ring]},
+                "properties": {
+                    "fid": i,
+                    "name": f"parcel {i}",
+                    "area": rnd.uniform(10, 10000),
+                    "category": rnd.choice(["forest", "water", "urban", "farm"]),
+                },
+            }
+        )
+    return {"type": "FeatureCollection", "features": features}
+
+
+def geojson_message(rnd: random.Random, nb_features: int = 200) -> dict:
+    return {
+        "type": QCHAT_MESSAGE_TYPE_GEOJSON,
+        "author": rnd.choice(AUTHORS),
+        "avatar": rnd.choice(AVATARS),
+        "layer_name": "parcels",
+        "crs_wkt": CRS_WKT,
+        "crs_authid": "EPSG:4326",
+        "geojson": geojson(rnd, nb_features),
+        "style": "<qgis></qgis>",
+    }
+
+
+def image_bytes(rnd: random.Random, size: int = 300_000) -> bytes:
+    """Random bytes: as incompressible as a PNG screenshot."""
+    return rnd.randbytes(size)
+
+
+def image_message(rnd: random.Random, size: int = 300_000) -> dict:
+    return {
+        "type": QCHAT_MESSAGE_TYPE_IMAGE,
+        "author": rnd.choice(AUTHORS),
+        "avatar": rnd.choice(AVATARS),
+        "image_data": base64.b64encode(image_bytes(rnd, size)).decode("utf-8"),
+    }
+
+
+def mixed_stream(nb_messages: int, seed: int = 42) -> list[dict]:
+    """Mixed stream of light messages, as seen in a busy room."""
+    rnd = random.Random(seed)
+    builders = [
+        text_message,
+        text_message,
+        text_message,
+        bbox_message,
+        lambda r: {"type": QCHAT_MESSAGE_TYPE_NB_USERS, "nb_users": r.randint(1, 99)},
+        lambda r: {"type": QCHAT_MESSAGE_TYPE_NEWCOMER, "newcomer": r.choice(AUTHORS)},
+        lambda r: {"type": QCHAT_MESSAGE_TYPE_EXITER, "exiter": r.choice(AUTHORS)},
+        lambda r: {
+            "type": QCHAT_MESSAGE_TYPE_LIKE,
+            "liker_author": r.choice(AUTHORS),
+            "liked_author": r.choice(AUTHORS),
+            "message": "hello",
+        },
+        lambda r: {
+            "type": QCHAT_MESSAGE_TYPE_CRS,
+            "author": r.choice(AUTHORS),
+            "avatar": r.choice(AVATARS),
+            "crs_wkt": CRS_WKT,
+            "crs_authid": "EPSG:4326",
+        },
+    ]
+    return [rnd.choice(builders)(rnd) for _ in range(nb_messages)]
@@ -0,0 +1,63 @@
+#! python3  # noqa E265
+
+"""
+Usage from the repo root folder:
+
+.. code-block:: bash
+    # for whole tests
+    python -m unittest tests.unit.test_backoff
+    # for specific test
+    python -m unittest tests.unit.test_backoff.TestBackoff.test_exponential
+"""
+
+# standard library
+import random
+import unittest
+
+# project
+from qchat.logic.qchat_backoff import ExponentialBackoff
+
+# ############################################################################
+# ########## Classes #############
+# ################################
+
+
+class TestBackoff(unittest.TestCase):
+    """Test reconnection delays"""
+
+    def test_exponential(self):
+        """Test delay growth and cap without jitter."""
+        backoff = ExponentialBackoff(base_delay=1, max_delay=10, jitter=0)
+        delays = [backoff.next_delay() for _ in range(6)]
+        self.assertEqual(delays, [1, 2, 4, 8, 10, 10])
+        self.assertEqual(backoff.attempts, 6)
+        backoff.reset()
+        self.assertEqual(backoff.next_delay(), 1)
+
+    def test_jitter(self):
+        """Test that jitter spreads delays within bounds."""
+        backoff = ExponentialBackoff(
+            base_delay=1, max_delay=60, jitter=0.5, rng=random.Random(42)
+        )
+        delays = set()
+        for _ in range(100):
+            backoff.reset()
+            delay = backoff.next_delay()
+            self.assertGreaterEqual(delay, 0.5)
+            self.assertLessEqual(delay, 1)
+            delays.add(delay)
+        self.assertGreater(len(delays), 90)
+
+    def test_many_attempts(self):
+        """Test that the delay stays capped after many attempts."""
+        backoff = ExponentialBackoff(max_delay=30, jitter=0)
+        for _ in range(2000):
+            delay = backoff.next_delay()
+        self.assertEqual(delay, 30)
+
+
+# ############################################################################
+# ####### Stand-alone run ########
+# ################################
+if __name__ == "__main__":
+    unittest.main()
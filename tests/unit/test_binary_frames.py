@@ -0,0 +1,109 @@
+#! python3  # noqa E265
+
+"""
+Usage from the repo root folder:
+
+.. code-block:: bash
+    # for whole tests
+    python -m unittest tests.unit.test_binary_frames
+    # for specific test
+    python -m unittest tests.unit.test_binary_frames.TestBinaryFrames.test_image_round_trip
+"""
+
+# standard library
+import base64
+import unittest
+
+# project
+from qchat.constants import (
+    QCHAT_MESSAGE_TYPE_GEOJSON,
+    QCHAT_MESSAGE_TYPE_IMAGE,
+    QCHAT_MESSAGE_TYPE_TEXT,
+)
+from qchat.logic.qchat_binary_frames import (
+    binary_frame_to_wire_dict,
+    can_be_sent_as_binary,
+    decode_binary_frame,
+    encode_binary_frame,
+    message_to_binary_frame,
+)
+from qchat.logic.qchat_messages import (
+    QChatGeojsonMessage,
+    QChatImageMessage,
+    QChatTextMessage,
+)
+
+# ############################################################################
+# ########## Classes #############
+# ################################
+
+
+class TestBinaryFrames(unittest.TestCase):
+    """Test binary frames envelope"""
+
+    def test_envelope(self):
+        """Test header and body split."""
+        frame = encode_binary_frame({"type": "test"}, b"\x00\x01\x02")
+        header, body = decode_binary_frame(frame)
+        self.assertEqual(header, {"type": "test"})
+        self.assertEqual(bytes(body), b"\x00\x01\x02")
+
+    def test_invalid_frames(self):
+        """Test truncated frames and unknown body fields."""
+        frame = encode_binary_frame({"type": "test"}, b"")
+        with self.assertRaises(ValueError):
+            decode_binary_frame(frame[:2])
+        with self.assertRaises(ValueError):
+            decode_binary_frame(frame[:6])
+        with self.assertRaises(ValueError):
+            binary_frame_to_wire_dict(frame)
+
+    def test_image_round_trip(self):
+        """Test that image bytes travel without base64."""
+        raw = bytes(range(256)) * 100
+        image_data = base64.b64encode(raw).decode("utf-8")
+        message = QChatImageMessage(
+            type=QCHAT_MESSAGE_TYPE_IMAGE,
+            author="jdoe",
+            avatar=None,
+            image_data=image_data,
+        )
+        self.assertTrue(can_be_sent_as_binary(message))
+        frame = message_to_binary_frame(message)
+        self.assertTrue(frame.endswith(raw))
+        self.assertLess(len(frame), len(image_data))
+        decoded = QChatImageMessage(**binary_frame_to_wire_dict(frame))
+        self.assertEqual(decoded.image_data, raw)
+        self.assertEqual(decoded.image_bytes, message.image_bytes)
+
+    def test_geojson_round_trip(self):
+        """Test GeoJSON messages."""
+        message = QChatGeojsonMessage(
+            type=QCHAT_MESSAGE_TYPE_GEOJSON,
+            author="jdoe",
+            avatar="mIconInfo.svg",
+            layer_name="points",
+            crs_wkt="",
+            crs_authid="EPSG:4326",
+            geojson={"type": "FeatureCollection", "features": []},
+            style=None,
+        )
+        frame = message_to_binary_frame(message)
+        decoded = QChatGeojsonMessage(**binary_frame_to_wire_dict(frame))
+        self.assertIsInstance(decoded.geojson, bytes)
+        self.assertEqual(decoded.nb_features, 0)
+        self.assertEqual(decoded.geojson_dict, message.geojson)
+
+    def test_text_messages_stay_text(self):
+        """Test that light messages have no binary representation."""
+        message = QChatTextMessage(
+            type=QCHAT_MESSAGE_TYPE_TEXT, author="jdoe", avatar=None, text="hi"
+        )
+        self.assertFalse(can_be_sent_as_binary(message))
+
+
+# ############################################################################
+# ####### Stand-alone run ########
+# ################################
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+#! python3  # noqa E265
+
+"""
+Usage from the repo root folder:
+
+.. code-block:: bash
+    # for whole tests
+    python -m unittest tests.unit.test_chunks
+    # for specific test
+    python -m unittest tests.unit.test_chunks.TestChunks.test_round_trip
+"""
+
+# standard library
+import random
+import unittest
+from dataclasses import replace
+
+# project
+from qchat.constants import QCHAT_MESSAGE_TYPE_CHUNK, QCHAT_MESSAGE_TYPE_IMAGE
+from qchat.logic import qchat_json
+from qchat.logic.qchat_binary_frames import binary_frame_to_wire_dict
+from qchat.logic.qchat_chunks import (
+    QChatChunkReassembler,
+    chunk_part_size,
+    make_chunks,
+)
+from qchat.logic.qchat_message_registry import default_message_registry
+from qchat.logic.qchat_messages import QChatImageMessage
+from qchat.logic.qchat_send_queue import encode_frames
+
+# ############################################################################
+# ########## Classes #############
+# ################################
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def image_message(size: int = 10_000) -> QChatImageMessage:
+    return QChatImageMessage(
+        type=QCHAT_MESSAGE_TYPE_IMAGE,
+        author="jdoe",
+        avatar=None,
+        image_data=random.Random(42).randbytes(size),
+    )
+
+
+class TestChunks(unittest.TestCase):
+    def test_make_chunks(self):
+        """Frames are split into numbered chunks of at most the chunk size."""
+        chunks = make_chunks(b"x" * 2500, QCHAT_MESSAGE_TYPE_IMAGE, "jdoe", 1000)
+        self.assertEqual([chunk.index for chunk in chunks], [0, 1, 2])
+        self.assertEqual({chunk.count for chunk in chunks}, {3})
+        self.assertEqual(len({chunk.transfer_id for chunk in chunks}), 1)
+        self.assertEqual([len(chunk.data) for chunk in chunks], [1000, 1000, 500])
+        self.assertTrue(all(chunk.binary for chunk in chunks))
+
+    def test_round_trip(self):
+        """Chunks received in any order, twice, give back the frame."""
+        for frame in ("é" * 5000, random.Random(1).randbytes(5000)):
+            with self.subTest(binary=isinstance(frame, bytes)):
+                chunks = make_chunks(frame, QCHAT_MESSAGE_TYPE_IMAGE, None, 700)
+                random.Random(2).shuffle(chunks)
+                reassembler = QChatChunkReassembler()
+                for chunk in chunks[:-1]:
+                    self.assertIsNone(reassembler.add(chunk))
+                    self.assertIsNone(reassembler.add(chunk))
+                self.assertEqual(
+                    reassembler.progress(chunks[0].transfer_id),
+                    (len(chunks) - 1, len(chunks)),
+                )
+                self.assertEqual(reassembler.add(chunks[-1]), frame)
+                self.assertEqual(len(reassembler), 0)
+                self.assertEqual(reassembler.buffered_bytes, 0)
+                self.assertEqual(reassembler.completed_total, 1)
+
+    def test_wrong_checksum(self):
+        """A transfer whose frame does not match its checksum is dropped."""
+        chunks = make_chunks(b"x" * 3000, QCHAT_MESSAGE_TYPE_IMAGE, None, 1000)
+        chunks[1] = replace(chunks[1], data=b"y" * 1000)
+        reassembler = QChatChunkReassembler()
+        reassembler.add(chunks[0])
+        reassembler.add(chunks[1])
+        with self.assertRaises(ValueError):
+            reassembler.add(chunks[2])
+        self.assertEqual(reassembler.dropped_total, 1)
+
+    def test_inconsistent_chunk(self):
+        """Chunks out of the bounds of their transfer drop it."""
+        chunks = make_chunks(b"x" * 3000, QCHAT_MESSAGE_TYPE_IMAGE, None, 1000)
+        reassembler = QChatChunkReassembler()
+        reassembler.add(chunks[0])
+        with self.assertRaises(ValueError):
+            reassembler.add(replace(chunks[1], index=3))
+        self.assertEqual(len(reassembler), 0)
+
+    def test_bounded_buffer(self):
+        """Chunks not fitting in the buffer drop their transfer."""
+        reassembler = QChatChunkReassembler(max_buffered_bytes=3500)
+        first = make_chunks(b"x" * 4000, QCHAT_MESSAGE_TYPE_IMAGE, None, 1000)
+        second = make_chunks(b"y" * 4000, QCHAT_MESSAGE_TYPE_IMAGE, None, 1000)
+        reassembler.add(first[0])
+        reassembler.add(first[1])
+        reassembler.add(second[0])
+        with self.assertRaises(ValueError):
+            reassembler.add(second[1])
+        self.assertEqual(reassembler.buffered_bytes, 2000)
+        self.assertEqual(len(reassembler), 1)
+
+    def test_timeout(self):
+        """Transfers without new chunks for too long are dropped."""
+        clock = FakeClock()
+        reassembler = QChatChunkReassembler(timeout=10, clock=clock)
+        chunks = make_chunks(b"x" * 3000, QCHAT_MESSAGE_TYPE_IMAGE, None, 1000)
+        reassembler.add(chunks[0])
+        clock.now = 8
+        reassembler.add(chunks[1])
+        clock.now = 15
+        self.assertEqual(reassembler.expire(), [])
+        clock.now = 19
+        self.assertEqual(reassembler.expire(), [chunks[0].transfer_id])
+        self.assertEqual(reassembler.buffered_bytes, 0)
+        self.assertIsNone(reassembler.add(chunks[2]))
+
+    def test_encode_frames(self):
+        """Large frames are sent as chunk frames, text or binary."""
+        registry = default_message_registry()
+        message = image_message()
+        self.assertEqual(len(encode_frames(message, binary=True)), 1)
+        for binary in (False, True):
+            with self.subTest(binary=binary):
+                frames = encode_frames(message, binary, chunk_size=4000)
+                self.assertEqual(
+                    [frame.index for frame in frames], list(range(len(frames)))
+                )
+                self.assertGreater(len(frames), 1)
+                reassembler = QChatChunkReassembler()
+                for frame in frames:
+                    self.assertEqual(frame.count, len(frames))
+                    wire = (
+                        binary_frame_to_wire_dict(frame.data)
+                        if binary
+                        else qchat_json.loads(frame.data)
+                    )
+                    chunk = registry.decode(wire)
+                    self.assertEqual(chunk.type, QCHAT_MESSAGE_TYPE_CHUNK)
+                    data = reassembler.add(chunk)
+                if binary:
+                    wire = binary_frame_to_wire_dict(data)
+                else:
+                    wire = qchat_json.loads(data)
+                self.assertEqual(registry.decode(wire).image_bytes, message.image_bytes)
+
+    def test_chunk_frame_size(self):
+        """Chunk frames, header and base64 encoding included, fit in the chunk size."""
+        message = replace(image_message(100_000), author="Jérôme " * 20)
+        for binary, use_msgpack in ((False, False), (True, False), (True, True)):
+            with self.subTest(binary=binary, use_msgpack=use_msgpack):
+                frames = encode_frames(
+                    message, binary, use_msgpack=use_msgpack, chunk_size=4096
+                )
+                self.assertGreater(len(frames), 1)
+                for frame in frames:
+                    data = frame.data
+                    if isinstance(data, str):
+                        data = data.encode("utf-8")
+                    self.assertLessEqual(len(data), 4096)
+        self.assertEqual(chunk_part_size(1000, None, base64_parts=True) % 3, 0)
+        self.assertEqual(chunk_part_size(100, "jdoe", base64_parts=False), 1)
+
+
+# ############################################################################
+# ####### Stand-alone run ########
+# ################################
+if __name__ == "__main__":
+    unittest.main()
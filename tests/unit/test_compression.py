@@ -0,0 +1,170 @@
+#! python3  # noqa E265
+
+"""
+Usage from the repo root folder:
+
+.. code-block:: bash
+    # for whole tests
+    python -m unittest tests.unit.test_compression
+    # for specific test
+    python -m unittest tests.unit.test_compression.TestCompression.test_text_frame_round_trip
+"""
+
+# standard library
+import random
+import unittest
+
+# project
+from qchat.constants import (
+    QCHAT_MESSAGE_TYPE_COMPRESSED,
+    QCHAT_MESSAGE_TYPE_GEOJSON,
+    QCHAT_MESSAGE_TYPE_IMAGE,
+    QCHAT_MESSAGE_TYPE_TEXT,
+)
+from qchat.logic import qchat_json
+from qchat.logic.qchat_binary_frames import (
+    binary_frame_to_wire_dict,
+    decode_binary_frame,
+    header_to_wire_dict,
+    is_compressed_binary_frame,
+    message_to_binary_frame,
+)
+from qchat.logic.qchat_compression import (
+    DecompressedSizeExceeded,
+    compress,
+    compress_if_worth,
+    compress_text_frame,
+    decompress,
+    decompress_envelope,
+)
+from qchat.logic.qchat_messages import (
+    QChatGeojsonMessage,
+    QChatImageMessage,
+    QChatTextMessage,
+)
+from qchat.logic.qchat_send_queue import encode_frame
+
+# ############################################################################
+# ########## Classes #############
+# ################################
+
+
+def layer_message(nb_features: int = 500) -> QChatGeojsonMessage:
+    features = [
+        {
+            "type": "Feature",
+            "properties": {"name": f"feature {i}"},
+            "geometry": {"type": "Point", "coordinates": [i, i]},
+        }
+        for i in range(nb_features)
+    ]
+    return QChatGeojsonMessage(
+        type=QCHAT_MESSAGE_TYPE_GEOJSON,
+        author="me",
+        avatar=None,
+        layer_name="points",
+        crs_wkt="",
+        crs_authid="EPSG:4326",
+        geojson={"type": "FeatureCollection", "features": features},
+        style=None,
+    )
+
+
+class TestCompression(unittest.TestCase):
+    def test_round_trip(self):
+        """Decompressing compressed data gives it back."""
+        data = b"qchat " * 1000
+        self.assertEqual(decompress(compress(data)), data)
+
+    def test_decompress_max_size(self):
+        """Data expanding beyond the maximum size is rejected early."""
+        bomb = compress(b"\0" * 10_000_000)
+        self.assertLess(len(bomb), 20_000)
+        with self.assertRaises(DecompressedSizeExceeded):
+            decompress(bomb, max_size=1_000_000)
+        self.assertEqual(len(decompress(bomb, max_size=10_000_000)), 10_000_000)
+
+    def test_decompress_invalid(self):
+        """Invalid or truncated data raises ValueError."""
+        with self.assertRaises(ValueError):
+            decompress(b"not zlib")
+        with self.assertRaises(ValueError):
+            decompress(compress(b"qchat " * 1000)[:-10])
+
+    def test_compress_if_worth(self):
+        """Only data above the threshold that shrinks enough is compressed."""
+        data = b"qchat " * 1000
+        self.assertIsNone(compress_if_worth(data, 0))
+        self.assertIsNone(compress_if_worth(data, len(data) + 1))
+        self.assertIsNotNone(compress_if_worth(data, len(data)))
+        incompressible = random.Random(42).randbytes(10_000)
+        self.assertIsNone(compress_if_worth(incompressible, 1))
+
+    def test_text_frame_round_trip(self):
+        """A large text frame is wrapped in an envelope naming its type."""
+        text = layer_message().to_json()
+        frame = compress_text_frame(text, QCHAT_MESSAGE_TYPE_GEOJSON, 1024)
+        self.assertLess(len(frame), len(text))
+        envelope = qchat_json.loads(frame)
+        self.assertEqual(envelope["type"], QCHAT_MESSAGE_TYPE_COMPRESSED)
+        self.assertEqual(envelope["inner_type"], QCHAT_MESSAGE_TYPE_GEOJSON)
+        self.assertEqual(decompress_envelope(envelope), text)
+        with self.assertRaises(DecompressedSizeExceeded):
+            decompress_envelope(envelope, max_size=1024)
+
+    def test_small_text_frame_unchanged(self):
+        """Text frames below the threshold are sent as is."""
+        text = QChatTextMessage(
+            type=QCHAT_MESSAGE_TYPE_TEXT, author="me", avatar=None, text="hello"
+        ).to_json()
+        self.assertIs(compress_text_frame(text, QCHAT_MESSAGE_TYPE_TEXT), text)
+
+    def test_invalid_envelope(self):
+        """Envelopes with an unknown compression or invalid data are rejected."""
+        with self.assertRaises(ValueError):
+            decompress_envelope({"compression": "lzma", "data": ""})
+        with self.assertRaises(ValueError):
+            decompress_envelope({"compression": "zlib", "data": "!!"})
+
+    def test_binary_frame_round_trip(self):
+        """The body of a large binary frame is compressed and restored."""
+        message = layer_message()
+        frame = message_to_binary_frame(message, compression_threshold=1024)
+        self.assertTrue(is_compressed_binary_frame(frame))
+        self.assertLess(len(frame), len(message_to_binary_frame(message)))
+        wire_dict = binary_frame_to_wire_dict(frame)
+        self.assertNotIn("compression", wire_dict)
+        self.assertEqual(qchat_json.loads(wire_dict["geojson"]), message.geojson_dict)
+
+    def test_binary_frame_max_body_size(self):
+        """A compressed body expanding beyond the maximum size is rejected."""
+        frame = message_to_binary_frame(layer_message(), compression_threshold=1024)
+        header, body = decode_binary_frame(frame)
+        with self.assertRaises(DecompressedSizeExceeded):
+            header_to_wire_dict(header, body, max_body_size=1024)
+
+    def test_incompressible_binary_frame(self):
+        """Image bodies that do not shrink are sent uncompressed."""
+        image = random.Random(42).randbytes(10_000)
+        message = QChatImageMessage(
+            type=QCHAT_MESSAGE_TYPE_IMAGE, author="me", avatar=None, image_data=image
+        )
+        frame = message_to_binary_frame(message, compression_threshold=1024)
+        self.assertFalse(is_compressed_binary_frame(frame))
+
+    def test_encode_frame(self):
+        """Outgoing frames are compressed above the threshold only."""
+        message = layer_message()
+        plain = encode_frame(message, binary=False)
+        compressed = encode_frame(message, binary=False, compression_threshold=1024)
+        self.assertLess(compressed.size, plain.size)
+        self.assertEqual(compressed.size, len(compressed.data))
+        self.assertFalse(compressed.binary)
+        self.assertTrue(encode_frame(message, binary=True).binary)
+
+
+# ############################################################################
+# ####### Stand-alone run ########
+# ################################
+if __name__ == "__main__":
+    unittest.main()
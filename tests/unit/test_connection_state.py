@@ -0,0 +1,110 @@
+#! python3  # noqa E265
+
+"""
+Usage from the repo root folder:
+
+.. code-block:: bash
+    # for whole tests
+    python -m unittest tests.unit.test_connection_state
+    # for specific test
+    python -m unittest tests.unit.test_connection_state.TestConnectionStateMachine.test_lifecycle
+"""
+
+# standard library
+import unittest
+
+# project
+from qchat.logic.qchat_connection_state import (
+    ALLOWED_TRANSITIONS,
+    QChatConnectionState,
+    QChatConnectionStateMachine,
+    QChatInvalidTransition,
+)
+
+# ############################################################################
+# ########## Classes #############
+# ################################
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestConnectionStateMachine(unittest.TestCase):
+    """Test the lifecycle of a connection."""
+
+    def test_lifecycle(self):
+        """A connection is opened, lost, reopened then closed."""
+        machine = QChatConnectionStateMachine()
+        for state in (
+            QChatConnectionState.CONNECTING,
+            QChatConnectionState.OPEN,
+            QChatConnectionState.BACKOFF,
+            QChatConnectionState.CONNECTING,
+            QChatConnectionState.OPEN,
+            QChatConnectionState.CLOSING,
+            QChatConnectionState.IDLE,
+        ):
+            machine.transition(state)
+        self.assertIs(machine.state, QChatConnectionState.IDLE)
+        self.assertEqual(machine.transitions_total, 7)
+        self.assertEqual(len(machine.history), 7)
+
+    def test_invalid_transitions(self):
+        """Only the allowed transitions are accepted, the state is kept otherwise."""
+        for from_state, allowed in ALLOWED_TRANSITIONS.items():
+            for to_state in QChatConnectionState:
+                with self.subTest(from_state=from_state, to_state=to_state):
+                    machine = QChatConnectionStateMachine()
+                    machine.state = from_state
+                    if to_state in allowed:
+                        machine.transition(to_state)
+                        self.assertIs(machine.state, to_state)
+                    else:
+                        with self.assertRaises(QChatInvalidTransition):
+                            machine.transition(to_state)
+                        self.assertIs(machine.state, from_state)
+
+    def test_no_self_transition(self):
+        """Opening twice is refused, handlers cannot run twice."""
+        machine = QChatConnectionStateMachine()
+        machine.transition(QChatConnectionState.CONNECTING)
+        self.assertFalse(machine.can_transition(QChatConnectionState.CONNECTING))
+
+    def test_timings(self):
+        """The time spent in each state is recorded by transition."""
+        clock = FakeClock()
+        machine = QChatConnectionStateMachine(clock=clock)
+        machine.transition(QChatConnectionState.CONNECTING)
+        clock.now += 0.25
+        self.assertEqual(machine.time_in_state, 0.25)
+        self.assertEqual(machine.transition(QChatConnectionState.OPEN), 0.25)
+        clock.now += 10
+        machine.transition(QChatConnectionState.BACKOFF)
+        clock.now += 2
+        machine.transition(QChatConnectionState.CONNECTING)
+        clock.now += 0.75
+        machine.transition(QChatConnectionState.OPEN)
+
+        handshake = machine.stats(
+            QChatConnectionState.CONNECTING, QChatConnectionState.OPEN
+        )
+        self.assertEqual(handshake.count, 2)
+        self.assertEqual(handshake.mean, 0.5)
+        backoff = machine.stats(
+            QChatConnectionState.BACKOFF, QChatConnectionState.CONNECTING
+        )
+        self.assertEqual(backoff.last, 2)
+        closing = machine.stats(QChatConnectionState.CLOSING, QChatConnectionState.IDLE)
+        self.assertEqual(closing.count, 0)
+
+
+# ############################################################################
+# ####### Stand-alone run ########
+# ################################
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+#! python3  # noqa E265
+
+"""
+Usage from the repo root folder:
+
+.. code-block:: bash
+    # for whole tests
+    python -m unittest tests.unit.test_content_cache
+    # for specific test
+    python -m unittest tests.unit.test_content_cache.TestContentCache.test_lru
+"""
+
+# standard library
+import unittest
+
+# project
+from qchat.logic.qchat_content_cache import QChatContentCache, content_key
+
+# ############################################################################
+# ########## Classes #############
+# ################################
+
+
+class TestContentCache(unittest.TestCase):
+    """Test the cache of decoded payloads."""
+
+    def test_content_key(self):
+        """Equal payloads share a key, different payloads do not."""
+        self.assertEqual(content_key(b"meme"), content_key(bytes(b"meme")))
+        self.assertNotEqual(content_key(b"meme"), content_key(b"meme2"))
+
+    def test_lru(self):
+        """The least recently used values are evicted first."""
+        cache = QChatContentCache(max_bytes=30)
+        for key in ("a", "b", "c"):
+            cache.put(key, key.upper(), 10)
+        self.assertEqual(cache.get("a"), "A")
+        cache.put("d", "D", 10)
+        self.assertNotIn("b", cache)
+        self.assertEqual(list(cache.entries), ["c", "a", "d"])
+        self.assertEqual((cache.nbytes, cache.evicted_total), (30, 1))
+
+    def test_replace(self):
+        """Storing a key again replaces its value and size."""
+        cache = QChatContentCache(max_bytes=30)
+        cache.put("a", "A", 10)
+        cache.put("a", "AA", 20)
+        self.assertEqual((len(cache), cache.nbytes), (1, 20))
+        self.assertEqual(cache.get("a"), "AA")
+
+    def test_too_large(self):
+        """Values larger than the budget are not stored, nor evict others."""
+        cache = QChatContentCache(max_bytes=30)
+        cache.put("a", "A", 10)
+        self.assertFalse(cache.put("b", "B", 40))
+        self.assertEqual(list(cache.entries), ["a"])
+
+    def test_hit_rate(self):
+        """Lookups are counted unless told otherwise, the budget can be lowered."""
+        cache = QChatContentCache(max_bytes=30)
+        cache.put("a", "A", 10)
+        cache.put("b", "B", 10)
+        cache.get("a")
+        cache.get("c")
+        self.assertEqual(cache.hit_rate, 0.5)
+        # uncounted lookups still mark the value as recently used
+        self.assertEqual(cache.get("b", count=False), "B")
+        self.assertIsNone(cache.get("c", count=False))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(list(cache.entries), ["a", "b"])
+        cache.count_lookup(hit=True)
+        self.assertEqual(cache.hits, 2)
+        cache.set_max_bytes(10)
+        self.assertEqual(list(cache.entries), ["b"])
+
+
+# ############################################################################
+# ####### Stand-alone run ########
+# ################################
+if __name__ == "__main__":
+    unittest.main()
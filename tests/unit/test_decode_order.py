@@ -0,0 +1,78 @@
+#! python3  # noqa E265
+
+"""
+Usage from the repo root folder:
+
+.. code-block:: bash
+    # for whole tests
+    python -m unittest tests.unit.test_decode_order
+    # for specific test
+    python -m unittest tests.unit.test_decode_order.TestDecodeOrder.test_in_order
+"""
+
+# standard library
+import unittest
+from collections import deque
+
+# project
+from qchat.logic.qchat_decode_order import QChatDecodeOrder
+
+# ############################################################################
+# ########## Classes #############
+# ################################
+
+
+class TestDecodeOrder(unittest.TestCase):
+    """Test the order of the messages decoded in a worker thread."""
+
+    def setUp(self):
+        self.order = QChatDecodeOrder()
+        # frames handed to the fake worker, decoded first in first out
+        self.worker = deque()
+        self.emitted = []
+
+    def receive(self, frame: str, first: bool = False) -> None:
+        self.worker.append((frame, self.order.reserve(first)))
+
+    def decode_next(self) -> None:
+        frame, slot = self.worker.popleft()
+        self.order.complete(slot, frame)
+        for message in self.order.release():
+            self.emitted.append(message)
+            if message == "last chunk":
+                # the reassembled frame is handed to the worker after "next"
+                self.receive("reassembled", first=True)
+
+    def test_in_order(self):
+        """Messages are released in the order their frames were received."""
+        slots = [self.order.reserve() for _ in range(3)]
+        self.order.complete(slots[1], "b")
+        self.assertEqual(list(self.order.release()), [])
+        self.order.complete(slots[0], "a")
+        self.order.complete(slots[2], "c")
+        self.assertEqual(list(self.order.release()), ["a", "b", "c"])
+        self.assertEqual(len(self.order), 0)
+
+    def test_reassembled_frame(self):
+        """A frame completed by its last chunk keeps the place of that chunk."""
+        self.receive("chunk")
+        self.receive("last chunk")
+        self.receive("next")
+        while self.worker:
+            self.decode_next()
+        self.assertEqual(self.emitted, ["chunk", "last chunk", "reassembled", "next"])
+        self.assertEqual(len(self.order), 0)
+
+    def test_clear(self):
+        """Results of cancelled slots are not released."""
+        slot = self.order.reserve()
+        self.order.clear()
+        self.assertFalse(self.order.complete(slot, "late"))
+        self.assertEqual(list(self.order.release()), [])
+
+
+# ############################################################################
+# ####### Stand-alone run ########
+# ################################
+if __name__ == "__main__":
+    unittest.main()
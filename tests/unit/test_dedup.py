@@ -0,0 +1,50 @@
+#! python3  # noqa E265
+
+"""
+Usage from the repo root folder:
+
+.. code-block:: bash
+    # for whole tests
+    python -m unittest tests.unit.test_dedup
+    # for specific test
+    python -m unittest tests.unit.test_dedup.TestRecentlySeen.test_bounded
+"""
+
+# standard library
+import unittest
+
+# project
+from qchat.logic.qchat_dedup import RecentlySeen
+
+# ############################################################################
+# ########## Classes #############
+# ################################
+
+
+class TestRecentlySeen(unittest.TestCase):
+    """Test duplicates detection"""
+
+    def test_duplicates(self):
+        """Test that a key is only new once."""
+        seen = RecentlySeen()
+        self.assertTrue(seen.add("a"))
+        self.assertFalse(seen.add("a"))
+        self.assertTrue(seen.add("b"))
+        self.assertIn("a", seen)
+
+    def test_bounded(self):
+        """Test that the oldest keys are dropped."""
+        seen = RecentlySeen(maxlen=3)
+        for key in range(5):
+            seen.add(key)
+        self.assertEqual(len(seen), 3)
+        self.assertNotIn(1, seen)
+        self.assertTrue(seen.add(0))
+        self.assertFalse(seen.add(4))
+
+
+# ############################################################################
+# ####### Stand-alone run ########
+# ################################
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+#! python3  # noqa E265
+
+"""
+Usage from the repo root folder:
+
+.. code-block:: bash
+    # for whole tests
+    python -m unittest tests.unit.test_frame_queue
+    # for specific test
+    python -m unittest tests.unit.test_frame_queue.TestFrameQueue.test_budget
+"""
+
+# standard library
+import unittest
+
+# project
+from qchat.logic.qchat_frame_queue import QChatFrameQueue
+
+# ############################################################################
+# ########## Classes #############
+# ################################
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestFrameQueue(unittest.TestCase):
+    """Test the frame by frame queue of view updates."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.queue = QChatFrameQueue(budget_ms=8, clock=self.clock)
+        self.done = []
+
+    def task(self, name: str, duration_ms: float = 0):
+        def run():
+            self.clock.now += duration_ms / 1000
+            self.done.append(name)
+
+        return run
+
+    def test_budget(self):
+        """Updates exceeding the budget are carried over to the next frame."""
+        for i in range(5):
+            self.queue.post(self.task(i, duration_ms=3))
+        self.assertTrue(self.queue.run_frame())
+        self.assertEqual(self.done, [0, 1, 2])
+        self.assertFalse(self.queue.run_frame())
+        self.assertEqual(self.done, [0, 1, 2, 3, 4])
+        self.assertEqual(self.queue.carried_over_total, 1)
+
+    def test_progress(self):
+        """An update longer than the budget still runs, one per frame."""
+        self.queue.post(self.task("slow", duration_ms=20))
+        self.queue.post(self.task("next"))
+        self.assertTrue(self.queue.run_frame())
+        self.assertEqual(self.done, ["slow"])
+
+    def test_coalesced(self):
+        """Coalesced updates run once per frame, after the others, the last one wins."""
+        self.queue.post_coalesced("scroll", self.task("scroll 1"))
+        self.queue.post(self.task("insert", duration_ms=10))
+        self.queue.post(self.task("insert again"))
+        self.queue.post_coalesced("scroll", self.task("scroll 2"))
+        self.queue.post_coalesced("title", self.task("title"))
+        self.assertTrue(self.queue.run_frame())
+        self.assertEqual(self.done, ["insert", "scroll 2", "title"])
+        self.assertEqual(len(self.queue), 1)
+        self.assertEqual(self.queue.coalesced_total, 1)
+
+    def test_coalesced_during_burst(self):
+        """Coalesced updates run every frame while insertions are carried over."""
+
+        def insert(i: int):
+            def run():
+                self.clock.now += 0.010
+                self.done.append(f"insert {i}")
+                self.queue.post_coalesced("scroll", self.task("scroll"))
+
+            return run
+
+        for frame in range(5):
+            # the queue is never empty, new insertions keep arriving
+            self.queue.post(insert(2 * frame))
+            self.queue.post(insert(2 * frame + 1))
+            self.queue.post_coalesced("title", self.task("title"))
+            self.done = []
+            self.assertTrue(self.queue.run_frame())
+            self.assertEqual(self.done, [f"insert {frame}", "title", "scroll"])
+        self.assertEqual(len(self.queue.tasks), 5)
+        self.assertEqual(self.queue.carried_over_total, 5)
+
+    def test_clear(self):
+        """Cleared updates are not run."""
+        self.queue.post(self.task("insert"))
+        self.queue.post_coalesced("scroll", self.task("scroll"))
+        self.queue.clear()
+        self.assertFalse(self.queue.run_frame())
+        self.assertEqual(self.done, [])
+
+
+# ############################################################################
+# ####### Stand-alone run ########
+# ################################
+if __name__ == "__main__":
+    unittest.main()
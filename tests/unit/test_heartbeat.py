@@ -0,0 +1,62 @@
+#! python3  # noqa E265
+
+"""
+Usage from the repo root folder:
+
+.. code-block:: bash
+    # for whole tests
+    python -m unittest tests.unit.test_heartbeat
+    # for specific test
+    python -m unittest tests.unit.test_heartbeat.TestHeartbeat.test_dead
+"""
+
+# standard library
+import unittest
+
+# project
+from qchat.logic.qchat_heartbeat import Heartbeat
+
+# ############################################################################
+# ########## Classes #############
+# ################################
+
+
+class TestHeartbeat(unittest.TestCase):
+    """Test round-trip time and dead peer detection."""
+
+    def test_dead(self):
+        """The connection is dead after too many consecutive missed pongs."""
+        heartbeat = Heartbeat(max_missed_pongs=3)
+        self.assertEqual([heartbeat.ping() for _ in range(4)], [True] * 3 + [False])
+        self.assertEqual(heartbeat.dead_total, 1)
+        self.assertFalse(heartbeat.awaiting_pong)
+        # a new connection starts afresh
+        self.assertTrue(heartbeat.ping())
+        self.assertEqual(heartbeat.missed_pongs, 0)
+
+    def test_pong_resets(self):
+        """A pong resets the count of missed pongs."""
+        heartbeat = Heartbeat(max_missed_pongs=2)
+        for _ in range(10):
+            self.assertTrue(heartbeat.ping())
+            self.assertTrue(heartbeat.ping())
+            self.assertEqual(heartbeat.missed_pongs, 1)
+            heartbeat.pong(20)
+        self.assertEqual(heartbeat.dead_total, 0)
+
+    def test_smoothed_rtt(self):
+        """The smoothed round-trip time follows the measures slowly."""
+        heartbeat = Heartbeat(smoothing=0.25)
+        self.assertIsNone(heartbeat.smoothed_rtt)
+        self.assertEqual(heartbeat.pong(100), 100)
+        self.assertEqual(heartbeat.pong(200), 125)
+        self.assertEqual(heartbeat.pong(125), 125)
+        self.assertEqual(heartbeat.rtt_stats.last, 125)
+        self.assertEqual(heartbeat.rtt_stats.max, 200)
+
+
+# ############################################################################
+# ####### Stand-alone run ########
+# ################################
+if __name__ == "__main__":
+    unittest.main()
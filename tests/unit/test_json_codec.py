@@ -0,0 +1,87 @@
+#! python3  # noqa E265
+
+"""
+Usage from the repo root folder:
+
+.. code-block:: bash
+    # for whole tests
+    python -m unittest tests.unit.test_json_codec
+    # for specific test
+    python -m unittest tests.unit.test_json_codec.TestJsonCodec.test_round_trip
+"""
+
+# standard library
+import unittest
+
+# project
+from qchat.constants import QCHAT_MESSAGE_TYPE_BBOX
+from qchat.logic import qchat_json
+from qchat.logic.qchat_messages import QChatBboxMessage
+
+# ############################################################################
+# ########## Classes #############
+# ################################
+
+
+class TestJsonCodec(unittest.TestCase):
+    """Test JSON codec backends"""
+
+    def setUp(self):
+        self.default_codec = qchat_json.get_codec().name
+
+    def tearDown(self):
+        qchat_json.set_codec(self.default_codec)
+
+    def test_available_codecs(self):
+        """Test that the standard library backend is always available."""
+        self.assertIn("json", qchat_json.available_codecs())
+        with self.assertRaises(KeyError):
+            qchat_json.set_codec("unknown")
+
+    def test_abstract_interface(self):
+        """Test that the codec interface can not be instantiated."""
+        with self.assertRaises(TypeError):
+            qchat_json.JsonCodec()
+
+    def test_round_trip(self):
+        """Test encoding and decoding with every available backend."""
+        message = QChatBboxMessage(
+            type=QCHAT_MESSAGE_TYPE_BBOX,
+            author="jdoe",
+            avatar=None,
+            crs_wkt="",
+            crs_authid="EPSG:4326",
+            xmin=-1.5,
+            xmax=1.5,
+            ymin=0,
+            ymax=2,
+        )
+        expected = {
+            "type": QCHAT_MESSAGE_TYPE_BBOX,
+            "author": "jdoe",
+            "avatar": None,
+            "crs_wkt": "",
+            "crs_authid": "EPSG:4326",
+            "xmin": -1.5,
+            "xmax": 1.5,
+            "ymin": 0,
+            "ymax": 2,
+        }
+        for name in qchat_json.available_codecs():
+            with self.subTest(codec=name):
+                qchat_json.set_codec(name)
+                text = qchat_json.dumps(message)
+                self.assertIsInstance(text, str)
+                self.assertEqual(qchat_json.loads(text), expected)
+
+                data = qchat_json.dumps_bytes({"text": "héhé"})
+                self.assertIsInstance(data, bytes)
+                self.assertEqual(qchat_json.loads(data), {"text": "héhé"})
+                self.assertEqual(qchat_json.loads(memoryview(data)), {"text": "héhé"})
+
+
+# ############################################################################
+# ####### Stand-alone run ########
+# ################################
+if __name__ == "__main__":
+    unittest.main()
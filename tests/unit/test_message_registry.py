@@ -0,0 +1,128 @@
+#! python3  # noqa E265
+
+"""
+Usage from the repo root folder:
+
+.. code-block:: bash
+    # for whole tests
+    python -m unittest tests.unit.test_message_registry
+    # for specific test
+    python -m unittest tests.unit.test_message_registry.TestMessageRegistry.test_decode_all_types
+"""
+
+# standard library
+import unittest
+from dataclasses import dataclass
+
+# project
+from qchat.constants import (
+    QCHAT_MESSAGE_TYPE_BBOX,
+    QCHAT_MESSAGE_TYPE_NB_USERS,
+    QCHAT_MESSAGE_TYPE_TEXT,
+)
+from qchat.logic.qchat_message_registry import (
+    QCHAT_MESSAGE_CLASSES,
+    dataclass_decoder,
+    default_message_registry,
+)
+from qchat.logic.qchat_messages import (
+    QChatBboxMessage,
+    QChatMessage,
+    QChatNbUsersMessage,
+    QChatTextMessage,
+)
+
+# ############################################################################
+# ########## Classes #############
+# ################################
+
+
+@dataclass(init=True, frozen=True)
+class QChatPingMessage(QChatMessage):
+    payload: str
+
+
+class TestMessageRegistry(unittest.TestCase):
+    """Test QChat message registry"""
+
+    def test_decode_all_types(self):
+        """Test that every protocol type has a decoder."""
+        registry = default_message_registry()
+        for message_type in QCHAT_MESSAGE_CLASSES:
+            self.assertTrue(registry.is_registered(message_type))
+
+        message = registry.decode(
+            {
+                "type": QCHAT_MESSAGE_TYPE_TEXT,
+                "author": "jdoe",
+                "avatar": None,
+                "text": "hello",
+            }
+        )
+        self.assertEqual(
+            message,
+            QChatTextMessage(
+                type=QCHAT_MESSAGE_TYPE_TEXT, author="jdoe", avatar=None, text="hello"
+            ),
+        )
+
+    def test_decode_missing_field(self):
+        """Test that a missing field is reported before instantiation."""
+        registry = default_message_registry()
+        with self.assertRaises(KeyError):
+            registry.decode({"type": QCHAT_MESSAGE_TYPE_BBOX, "author": "jdoe"})
+
+    def test_decode_unknown_keys_and_types(self):
+        """Test that unknown keys are ignored and unknown types are skipped."""
+        registry = default_message_registry()
+        message = registry.decode(
+            {"type": QCHAT_MESSAGE_TYPE_NB_USERS, "nb_users": 3, "unknown": "key"}
+        )
+        self.assertEqual(
+            message, QChatNbUsersMessage(type=QCHAT_MESSAGE_TYPE_NB_USERS, nb_users=3)
+        )
+        self.assertIsNone(registry.decode({"type": "unknown"}))
+
+    def test_dispatch(self):
+        """Test that decoded messages are handed to their handler."""
+        registry = default_message_registry()
+        received = []
+        registry.set_handler(QCHAT_MESSAGE_TYPE_BBOX, received.append)
+        message = QChatBboxMessage(
+            type=QCHAT_MESSAGE_TYPE_BBOX,
+            author="jdoe",
+            avatar=None,
+            crs_wkt="",
+            crs_authid="EPSG:4326",
+            xmin=0,
+            xmax=1,
+            ymin=0,
+            ymax=1,
+        )
+        self.assertTrue(registry.dispatch(message))
+        self.assertFalse(
+            registry.dispatch(
+                QChatNbUsersMessage(type=QCHAT_MESSAGE_TYPE_NB_USERS, nb_users=1)
+            )
+        )
+        self.assertEqual(received, [message])
+
+    def test_register_at_runtime(self):
+        """Test registering a new message type."""
+        registry = default_message_registry()
+        received = []
+        registry.register("ping", dataclass_decoder(QChatPingMessage), received.append)
+        registry.dispatch(registry.decode({"type": "ping", "payload": "pong"}))
+        self.assertEqual(received, [QChatPingMessage(type="ping", payload="pong")])
+
+        registry.unregister("ping")
+        self.assertIsNone(registry.decode({"type": "ping", "payload": "pong"}))
+        with self.assertRaises(KeyError):
+            registry.set_handler("ping", received.append)
+
+
+# ############################################################################
+# ####### Stand-alone run ########
+# ################################
+if __name__ == "__main__":
+    unittest.main()
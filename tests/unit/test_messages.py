@@ -0,0 +1,192 @@
+#! python3  # noqa E265
+
+"""
+Usage from the repo root folder:
+
+.. code-block:: bash
+    # for whole tests
+    python -m unittest tests.unit.test_messages
+    # for specific test
+    python -m unittest tests.unit.test_messages.TestMessages.test_lazy_image
+"""
+
+# standard library
+import base64
+import copy
+import pickle
+import unittest
+from dataclasses import FrozenInstanceError, replace
+
+# project
+from qchat.constants import (
+    QCHAT_MESSAGE_TYPE_GEOJSON,
+    QCHAT_MESSAGE_TYPE_IMAGE,
+    QCHAT_MESSAGE_TYPE_TEXT,
+)
+from qchat.logic import qchat_json
+from qchat.logic.qchat_messages import (
+    QChatGeojsonMessage,
+    QChatImageMessage,
+    QChatTextMessage,
+    count_geojson_features,
+    is_json_object,
+    split_geojson_frame,
+)
+
+# ############################################################################
+# ########## Classes #############
+# ################################
+
+
+class TestMessages(unittest.TestCase):
+    """Test QChat messages"""
+
+    def geojson_message(self, geojson, nb_features=None) -> QChatGeojsonMessage:
+        return QChatGeojsonMessage(
+            type=QCHAT_MESSAGE_TYPE_GEOJSON,
+            author="jdoe",
+            avatar=None,
+            layer_name="points",
+            crs_wkt="",
+            crs_authid="EPSG:4326",
+            geojson=geojson,
+            style=None,
+            nb_features=nb_features,
+        )
+
+    def test_lazy_image(self):
+        """Test that base64 and raw images give the same bytes."""
+        raw = b"\x89PNG\r\n" + bytes(range(256))
+        encoded = QChatImageMessage(
+            type=QCHAT_MESSAGE_TYPE_IMAGE,
+            author="jdoe",
+            avatar=None,
+            image_data=base64.b64encode(raw).decode("utf-8"),
+        )
+        self.assertEqual(encoded.image_bytes, raw)
+        # the message is left as received, the decoded bytes are not kept
+        self.assertEqual(encoded.image_data, base64.b64encode(raw).decode("utf-8"))
+        self.assertEqual(encoded.to_wire_dict()["image_data"], encoded.image_data)
+        raw_message = QChatImageMessage(
+            type=QCHAT_MESSAGE_TYPE_IMAGE, author="jdoe", avatar=None, image_data=raw
+        )
+        self.assertIs(raw_message.image_bytes, raw)
+
+    def test_lazy_geojson(self):
+        """Test that raw GeoJSON is only parsed when needed."""
+        geojson = {
+            "type": "FeatureCollection",
+            "features": [{"type": "Feature", "geometry": None, "properties": {}}],
+        }
+        raw = qchat_json.dumps_bytes(geojson)
+        message = self.geojson_message(raw, nb_features=1)
+        self.assertEqual(message.features_count, 1)
+        self.assertIs(message.geojson_bytes, raw)
+        self.assertFalse(hasattr(message, "_geojson_dict"))
+        self.assertEqual(message.geojson_dict, geojson)
+
+        parsed = self.geojson_message(geojson)
+        self.assertEqual(parsed.features_count, 1)
+        self.assertEqual(qchat_json.loads(parsed.geojson_bytes), geojson)
+
+    def test_split_geojson_frame(self):
+        """Test that the GeoJSON of a text frame is kept unparsed."""
+        geojson = {
+            "type": "FeatureCollection",
+            "features": [
+                {"type": "Feature", "geometry": None, "properties": {"geojson": 1}},
+                {"type": "Feature", "geometry": None, "properties": {}},
+            ],
+        }
+        message = self.geojson_message(qchat_json.dumps(geojson))
+        header, raw = split_geojson_frame(message.to_json())
+        self.assertEqual(header["layer_name"], "points")
+        self.assertNotIn("geojson", header)
+        self.assertEqual(qchat_json.loads(raw), geojson)
+        self.assertEqual(count_geojson_features(raw), 2)
+
+        # braces inside strings do not end the document
+        geojson["features"][1]["properties"] = {"name": 'a "}" b}', "{": "{{"}
+        header, raw = split_geojson_frame(self.geojson_message(geojson).to_json())
+        self.assertEqual(qchat_json.loads(raw), geojson)
+
+        # the GeoJSON document is not the last field
+        text = qchat_json.dumps({"geojson": geojson, "type": "geojson"})
+        self.assertIsNone(split_geojson_frame(text))
+        self.assertIsNone(split_geojson_frame('{"type": "text", "text": "hi"}'))
+
+    def test_split_geojson_frame_key_order(self):
+        """Test that frames ordered differently are parsed as a whole."""
+        geojson = {"type": "FeatureCollection", "features": []}
+        wire = self.geojson_message(geojson).to_wire_dict()
+        reversed_wire = dict(reversed(list(wire.items())))
+        self.assertIsNone(split_geojson_frame(qchat_json.dumps(reversed_wire)))
+
+        # an object field after the document
+        wire["extra"] = {"key": "value"}
+        self.assertIsNone(split_geojson_frame(qchat_json.dumps(wire)))
+        self.assertFalse(is_json_object('{"a": 1}, "extra": {"key": "}"}'))
+        self.assertTrue(is_json_object('{"a": {"b": "}{"}}'))
+
+    def test_to_json(self):
+        """Test that raw and parsed payloads give the same text frame."""
+        geojson = {"type": "FeatureCollection", "features": []}
+        for payload in (
+            geojson,
+            qchat_json.dumps(geojson),
+            qchat_json.dumps_bytes(geojson),
+        ):
+            with self.subTest(payload=type(payload).__name__):
+                message = self.geojson_message(payload, nb_features=0)
+                wire = qchat_json.loads(message.to_json())
+                self.assertEqual(wire["geojson"], geojson)
+                self.assertEqual(wire["layer_name"], "points")
+                self.assertNotIn("nb_features", wire)
+
+        raw = bytes(range(256))
+        image = QChatImageMessage(
+            type=QCHAT_MESSAGE_TYPE_IMAGE, author="jdoe", avatar=None, image_data=raw
+        )
+        wire = qchat_json.loads(image.to_json())
+        self.assertEqual(base64.b64decode(wire["image_data"]), raw)
+
+    def test_envelope(self):
+        """Test that id and timestamp are only sent when set."""
+        message = QChatTextMessage(
+            type=QCHAT_MESSAGE_TYPE_TEXT, author="jdoe", avatar=None, text="hi"
+        )
+        self.assertNotIn("id", message.to_wire_dict())
+        stamped = replace(message, id="abc", timestamp=1.5)
+        wire = stamped.to_wire_dict()
+        self.assertEqual((wire["id"], wire["timestamp"]), ("abc", 1.5))
+        self.assertEqual(QChatTextMessage(**wire), stamped)
+
+    def test_slots(self):
+        """Test that messages are compact and immutable."""
+        message = self.geojson_message({"type": "FeatureCollection", "features": []})
+        self.assertFalse(hasattr(message, "__dict__"))
+        with self.assertRaises(FrozenInstanceError):
+            message.layer_name = "other"
+        self.assertEqual(copy.copy(message), message)
+        self.assertEqual(pickle.loads(pickle.dumps(message)), message)
+
+    def test_cache_not_serialised(self):
+        """Test that lazily decoded values are not sent on the wire."""
+        message = self.geojson_message({"type": "FeatureCollection", "features": []})
+        message.geojson_bytes
+        for codec in qchat_json.available_codecs():
+            with self.subTest(codec=codec):
+                previous = qchat_json.get_codec().name
+                qchat_json.set_codec(codec)
+                try:
+                    wire = qchat_json.loads(qchat_json.dumps(message))
+                finally:
+                    qchat_json.set_codec(previous)
+                self.assertNotIn("geojson_bytes", wire)
+
+
+# ############################################################################
+# ####### Stand-alone run ########
+# ################################
+if __name__ == "__main__":
+    unittest.main()
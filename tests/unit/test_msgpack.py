@@ -0,0 +1,136 @@
+#! python3  # noqa E265
+
+"""
+Usage from the repo root folder:
+
+.. code-block:: bash
+    # for whole tests
+    python -m unittest tests.unit.test_msgpack
+    # for specific test
+    python -m unittest tests.unit.test_msgpack.TestMsgpack.test_geojson_round_trip
+"""
+
+# standard library
+import unittest
+
+# project
+from qchat.constants import (
+    QCHAT_MESSAGE_TYPE_BBOX,
+    QCHAT_MESSAGE_TYPE_GEOJSON,
+    QCHAT_MESSAGE_TYPE_IMAGE,
+)
+from qchat.logic import qchat_msgpack
+from qchat.logic.qchat_binary_frames import message_to_binary_frame
+from qchat.logic.qchat_message_registry import default_message_registry
+from qchat.logic.qchat_messages import (
+    QChatBboxMessage,
+    QChatGeojsonMessage,
+    QChatImageMessage,
+)
+
+# ############################################################################
+# ########## Classes #############
+# ################################
+
+
+@unittest.skipUnless(qchat_msgpack.is_available(), "msgpack is not installed")
+class TestMsgpack(unittest.TestCase):
+    """Test the MessagePack serialisation of QChat messages"""
+
+    def setUp(self):
+        self.registry = default_message_registry()
+
+    def round_trip(self, message):
+        data = qchat_msgpack.message_to_msgpack(message)
+        self.assertTrue(qchat_msgpack.is_msgpack_frame(data))
+        return self.registry.decode(qchat_msgpack.msgpack_to_wire_dict(data))
+
+    def test_bbox_round_trip(self):
+        """Coordinates are restored exactly, envelope fields included."""
+        message = QChatBboxMessage(
+            type=QCHAT_MESSAGE_TYPE_BBOX,
+            author="jdoe",
+            avatar=None,
+            crs_wkt="",
+            crs_authid="EPSG:4326",
+            xmin=-1.123456789,
+            xmax=1.5,
+            ymin=0,
+            ymax=2,
+            id="abc",
+            timestamp=1700000000.5,
+        )
+        self.assertEqual(self.round_trip(message), message)
+
+    def test_image_round_trip(self):
+        """Image bytes travel raw, without base64."""
+        image = bytes(range(256)) * 100
+        message = QChatImageMessage(
+            type=QCHAT_MESSAGE_TYPE_IMAGE, author="jdoe", avatar=None, image_data=image
+        )
+        data = qchat_msgpack.message_to_msgpack(message)
+        self.assertLess(len(data), len(image) + 100)
+        self.assertEqual(self.round_trip(message).image_bytes, image)
+
+    def test_geojson_round_trip(self):
+        """A raw GeoJSON document is sent as a map."""
+        geojson = '{"type": "FeatureCollection", "features": []}'
+        message = QChatGeojsonMessage(
+            type=QCHAT_MESSAGE_TYPE_GEOJSON,
+            author="jdoe",
+            avatar=None,
+            layer_name="empty",
+            crs_wkt="",
+            crs_authid="EPSG:4326",
+            geojson=geojson,
+            style=None,
+        )
+        decoded = self.round_trip(message)
+        self.assertEqual(decoded.geojson, {"type": "FeatureCollection", "features": []})
+        self.assertEqual(decoded.layer_name, "empty")
+
+    def test_sniff_fields(self):
+        """The type and author are found without decoding the payload."""
+        message = QChatImageMessage(
+            type=QCHAT_MESSAGE_TYPE_IMAGE,
+            author="jdoe",
+            avatar=None,
+            image_data=b"\0" * 100_000,
+        )
+        data = qchat_msgpack.message_to_msgpack(message)
+        self.assertEqual(
+            qchat_msgpack.sniff_msgpack_fields(data),
+            {"type": QCHAT_MESSAGE_TYPE_IMAGE, "author": "jdoe"},
+        )
+        self.assertEqual(
+            qchat_msgpack.sniff_msgpack_fields(b"\x81"),
+            {"type": None, "author": None},
+        )
+
+    def test_invalid_frame(self):
+        """Invalid frames and frames that are not maps raise ValueError."""
+        with self.assertRaises(ValueError):
+            qchat_msgpack.msgpack_to_wire_dict(b"\x81\xc1")
+        with self.assertRaises(ValueError):
+            qchat_msgpack.msgpack_to_wire_dict(b"\x91\x01")
+
+
+class TestMsgpackFrameDetection(unittest.TestCase):
+    def test_binary_frames_are_not_msgpack(self):
+        """Binary frames are told apart from MessagePack frames."""
+        message = QChatImageMessage(
+            type=QCHAT_MESSAGE_TYPE_IMAGE, author="jdoe", avatar=None, image_data=b"x"
+        )
+        self.assertFalse(qchat_msgpack.is_msgpack_frame(b""))
+        self.assertFalse(
+            qchat_msgpack.is_msgpack_frame(message_to_binary_frame(message))
+        )
+        self.assertTrue(qchat_msgpack.is_msgpack_frame(b"\x80"))
+        self.assertTrue(qchat_msgpack.is_msgpack_frame(b"\xde\x00\x00"))
+
+
+# ############################################################################
+# ####### Stand-alone run ########
+# ################################
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+#! python3  # noqa E265
+
+"""
+Usage from the repo root folder:
+
+.. code-block:: bash
+    # for whole tests
+    python -m unittest tests.unit.test_payload_guard
+    # for specific test
+    python -m unittest tests.unit.test_payload_guard.TestPayloadGuard.test_limits
+"""
+
+# standard library
+import unittest
+from pathlib import Path
+
+# project
+from qchat.constants import (
+    QCHAT_MESSAGE_TYPE_GEOJSON,
+    QCHAT_MESSAGE_TYPE_IMAGE,
+    QCHAT_MESSAGE_TYPE_OVERSIZED,
+    QCHAT_MESSAGE_TYPE_TEXT,
+)
+from qchat.logic.qchat_payload_guard import (
+    QChatPayloadGuard,
+    payload_limits_from_megabytes,
+    sniff_string_field,
+)
+
+# ############################################################################
+# ########## Classes #############
+# ################################
+
+
+class TestPayloadGuard(unittest.TestCase):
+    """Test size checks of received frames"""
+
+    def test_sniff(self):
+        """Test type and author lookup without parsing."""
+        frame = '{"type": "image", "author": "jdoe", "image_data": "' + "A" * 4096
+        self.assertEqual(sniff_string_field(frame, "type"), "image")
+        self.assertEqual(sniff_string_field(frame, "author"), "jdoe")
+        self.assertEqual(sniff_string_field(frame.encode("utf-8"), "author"), "jdoe")
+        late = '{"data": "' + "A" * 4096 + '", "type": "image"}'
+        self.assertIsNone(sniff_string_field(late, "type"))
+
+    def test_limits(self):
+        """Test per type limits."""
+        guard = QChatPayloadGuard(payload_limits_from_megabytes(1, 0), default_limit=10)
+        self.assertTrue(guard.is_oversized(QCHAT_MESSAGE_TYPE_IMAGE, 2 * 1024 * 1024))
+        self.assertFalse(guard.is_oversized(QCHAT_MESSAGE_TYPE_IMAGE, 1024))
+        self.assertFalse(guard.is_oversized(QCHAT_MESSAGE_TYPE_GEOJSON, 10**9))
+        self.assertTrue(guard.is_oversized(QCHAT_MESSAGE_TYPE_TEXT, 11))
+        # unknown type: most permissive limit
+        self.assertFalse(guard.is_oversized(None, 10**9))
+
+    def test_quarantine_in_memory(self):
+        """Test placeholder keeping the payload in memory."""
+        guard = QChatPayloadGuard()
+        message = guard.quarantine("{}", QCHAT_MESSAGE_TYPE_IMAGE, "jdoe", False)
+        self.assertEqual(message.type, QCHAT_MESSAGE_TYPE_OVERSIZED)
+        self.assertEqual(message.size, 2)
+        self.assertEqual(message.read_payload(), "{}")
+        self.assertIsNone(message.payload_path)
+
+    def test_quarantine_spilled(self):
+        """Test placeholder spilling the payload to a temporary file."""
+        guard = QChatPayloadGuard(spill=True)
+        message = guard.quarantine(b"\x00\x01", QCHAT_MESSAGE_TYPE_IMAGE, None, True)
+        self.assertIsNone(message.payload)
+        self.assertEqual(message.read_payload(), b"\x00\x01")
+        guard.cleanup()
+        self.assertFalse(Path(message.payload_path).exists())
+
+
+# ############################################################################
+# ####### Stand-alone run ########
+# ################################
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+#! python3  # noqa E265
+
+"""
+Usage from the repo root folder:
+
+.. code-block:: bash
+    # for whole tests
+    python -m unittest tests.unit.test_room_history
+    # for specific test
+    python -m unittest tests.unit.test_room_history.TestRoomHistory.test_bounded
+"""
+
+# standard library
+import unittest
+
+# project
+from qchat.constants import (
+    QCHAT_MESSAGE_TYPE_ADMIN,
+    QCHAT_MESSAGE_TYPE_IMAGE,
+    QCHAT_MESSAGE_TYPE_NB_USERS,
+    QCHAT_MESSAGE_TYPE_NEWCOMER,
+    QCHAT_MESSAGE_TYPE_TEXT,
+    QCHAT_MESSAGE_TYPE_UNCOMPLIANT,
+)
+from qchat.logic.qchat_messages import (
+    QChatAdminMessage,
+    QChatImageMessage,
+    QChatNbUsersMessage,
+    QChatNewcomerMessage,
+    QChatTextMessage,
+    QChatUncompliantMessage,
+)
+from qchat.logic.qchat_room_history import (
+    MESSAGE_OVERHEAD,
+    QChatRoomHistory,
+    message_size,
+    plan_eviction,
+)
+
+# ############################################################################
+# ########## Classes #############
+# ################################
+
+
+def text_message(text: str) -> QChatTextMessage:
+    return QChatTextMessage(
+        type=QCHAT_MESSAGE_TYPE_TEXT, author="Isidore", avatar=None, text=text
+    )
+
+
+def image_message(size: int) -> QChatImageMessage:
+    return QChatImageMessage(
+        type=QCHAT_MESSAGE_TYPE_IMAGE,
+        author="Isidore",
+        avatar=None,
+        image_data=b"\x00" * size,
+    )
+
+
+class TestRoomHistory(unittest.TestCase):
+    """Test the bounded history of a room."""
+
+    def test_bounded(self):
+        """The oldest messages are dropped first."""
+        history = QChatRoomHistory(maxlen=3)
+        for i in range(5):
+            history.add(text_message(str(i)))
+        self.assertEqual([m.text for m in history], ["2", "3", "4"])
+        self.assertEqual(history.dropped_total, 2)
+
+    def test_set_maxlen(self):
+        """Shrinking the history keeps the newest messages."""
+        history = QChatRoomHistory(maxlen=10)
+        for i in range(5):
+            history.add(text_message(str(i)))
+        history.set_limits(2)
+        self.assertEqual([m.text for m in history], ["3", "4"])
+        self.assertEqual(history.maxlen, 2)
+        self.assertEqual(history.dropped_total, 3)
+
+    def test_byte_budget(self):
+        """The oldest messages are dropped once the bytes exceed the budget."""
+        size = message_size(text_message("0"))
+        history = QChatRoomHistory(maxlen=100, max_bytes=3 * size)
+        for i in range(5):
+            history.add(text_message(str(i)))
+        self.assertEqual([m.text for m in history], ["2", "3", "4"])
+        self.assertEqual(history.nbytes, 3 * size)
+        self.assertEqual(history.dropped_total, 2)
+
+    def test_wire_size(self):
+        """Received messages weigh their frame, local ones their fields."""
+        message = image_message(3000)
+        self.assertEqual(message_size(message), MESSAGE_OVERHEAD + 3000 + 7 + 8 * 3)
+        message.set_wire_size(4000)
+        self.assertEqual(message_size(message), MESSAGE_OVERHEAD + 4000)
+        history = QChatRoomHistory()
+        history.add(message)
+        self.assertEqual(history.nbytes, MESSAGE_OVERHEAD + 4000)
+
+    def test_newest_kept(self):
+        """A message larger than the budget is kept until the next one."""
+        history = QChatRoomHistory(max_bytes=1000)
+        history.add(image_message(5000))
+        self.assertEqual(len(history), 1)
+        history.add(text_message("small"))
+        self.assertEqual([m.type for m in history], [QCHAT_MESSAGE_TYPE_TEXT])
+
+    def test_heavy_first(self):
+        """Images are evicted before older text messages, if requested."""
+        for heavy_first, expected in ((False, ["b", "c"]), (True, ["a", "b", "c"])):
+            with self.subTest(heavy_first=heavy_first):
+                history = QChatRoomHistory(
+                    max_bytes=4 * MESSAGE_OVERHEAD + 2000, heavy_first=heavy_first
+                )
+                history.add(text_message("a"))
+                history.add(image_message(2000))
+                history.add(text_message("b"))
+                history.add(text_message("c"))
+                self.assertEqual(
+                    [m.text for m in history if m.type == QCHAT_MESSAGE_TYPE_TEXT],
+                    expected,
+                )
+                self.assertLessEqual(history.nbytes, history.max_bytes)
+
+    def test_plan_eviction(self):
+        """Light entries are evicted once no heavy entry is left."""
+        entries = [(10, False), (50, True), (10, False), (10, False)]
+        self.assertEqual(
+            plan_eviction(entries, 80, 10, 10, heavy_first=True), [0, 1, 2]
+        )
+        self.assertEqual(plan_eviction(entries, 80, 2, 1000, heavy_first=True), [0, 1])
+        self.assertEqual(plan_eviction(entries, 80, 10, 1000), [])
+
+    def test_nb_users_not_stored(self):
+        """Only the last users count is kept, outside of the messages."""
+        history = QChatRoomHistory()
+        for nb_users in (2, 5):
+            history.add(
+                QChatNbUsersMessage(type=QCHAT_MESSAGE_TYPE_NB_USERS, nb_users=nb_users)
+            )
+        history.add(
+            QChatUncompliantMessage(type=QCHAT_MESSAGE_TYPE_UNCOMPLIANT, reason="no")
+        )
+        self.assertEqual(len(history), 0)
+        self.assertEqual(history.nb_users, 5)
+
+    def test_unread(self):
+        """Only the messages with content are counted as unread."""
+        history = QChatRoomHistory()
+        history.add(text_message("read"))
+        history.add(text_message("unread"), unread=True)
+        history.add(
+            QChatNewcomerMessage(type=QCHAT_MESSAGE_TYPE_NEWCOMER, newcomer="Isidore"),
+            unread=True,
+        )
+        self.assertEqual(len(history), 3)
+        self.assertEqual(history.unread, 1)
+        history.clear()
+        self.assertEqual((len(history), history.unread), (0, 0))
+
+    def test_received_at(self):
+        """Messages are stamped once with their arrival time, admin ones too."""
+        now = [1000.0]
+        history = QChatRoomHistory(clock=lambda: now[0])
+        message = text_message("first")
+        self.assertIsNone(message.received_at)
+        history.add(message)
+        now[0] += 60
+        history.add(QChatAdminMessage(type=QCHAT_MESSAGE_TYPE_ADMIN, text="Connected"))
+        history.add(message)
+        self.assertEqual([m.received_at for m in history], [1000.0, 1060.0, 1000.0])
+        self.assertEqual(history.unread, 0)
+
+
+# ############################################################################
+# ####### Stand-alone run ########
+# ################################
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+#! python3  # noqa E265
+
+"""
+Usage from the repo root folder:
+
+.. code-block:: bash
+    # for whole tests
+    python -m unittest tests.unit.test_send_queue
+    # for specific test
+    python -m unittest tests.unit.test_send_queue.TestSendQueue.test_priority
+"""
+
+# standard library
+import unittest
+
+# project
+from qchat.logic.qchat_send_queue import (
+    PRIORITY_MAX_SIZE,
+    OutgoingFrame,
+    QChatSendQueue,
+    TokenBucket,
+)
+
+# ############################################################################
+# ########## Classes #############
+# ################################
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def frame(size: int) -> OutgoingFrame:
+    return OutgoingFrame(data=b"x" * size, binary=True, size=size)
+
+
+class TestSendQueue(unittest.TestCase):
+    """Test outgoing frames queue"""
+
+    def test_token_bucket(self):
+        """Test rate and debt of a token bucket."""
+        clock = FakeClock()
+        bucket = TokenBucket(10, clock)
+        self.assertEqual(bucket.delay(10), 0)
+        bucket.consume(30)
+        self.assertAlmostEqual(bucket.delay(10), 3)
+        clock.now = 3
+        self.assertEqual(bucket.delay(10), 0)
+        self.assertEqual(TokenBucket(0, clock).delay(10**9), 0)
+
+    def test_priority(self):
+        """Test that small frames overtake large ones."""
+        queue = QChatSendQueue()
+        large, small = frame(PRIORITY_MAX_SIZE + 1), frame(10)
+        queue.push(large)
+        queue.push(small)
+        self.assertEqual(queue.depth, 2)
+        self.assertIs(queue.pop()[0], small)
+        self.assertIs(queue.pop()[0], large)
+        self.assertEqual(queue.pop(), (None, None))
+        self.assertEqual(queue.queued_bytes, 0)
+
+    def test_messages_rate(self):
+        """Test messages per second budget."""
+        clock = FakeClock()
+        queue = QChatSendQueue(messages_per_second=2, clock=clock)
+        for _ in range(3):
+            queue.push(frame(10))
+        self.assertIsNotNone(queue.pop()[0])
+        self.assertIsNotNone(queue.pop()[0])
+        sent, delay = queue.pop()
+        self.assertIsNone(sent)
+        self.assertAlmostEqual(delay, 0.5)
+        clock.now = 0.5
+        self.assertIsNotNone(queue.pop()[0])
+
+    def test_bytes_rate_and_in_flight(self):
+        """Test bytes budget and in-flight limit of large frames."""
+        clock = FakeClock()
+        size = PRIORITY_MAX_SIZE * 2
+        queue = QChatSendQueue(
+            bytes_per_second=size, max_in_flight_bytes=size * 10, clock=clock
+        )
+        queue.push(frame(size))
+        queue.push(frame(size))
+        queue.push(frame(10))
+        self.assertEqual(queue.pop()[0].size, 10)
+        self.assertEqual(queue.pop()[0].size, size)
+        sent, delay = queue.pop()
+        self.assertIsNone(sent)
+        self.assertAlmostEqual(delay, 1)
+
+        queue = QChatSendQueue(max_in_flight_bytes=size, clock=clock)
+        queue.push(frame(size))
+        queue.push(frame(size))
+        self.assertIsNotNone(queue.pop()[0])
+        self.assertEqual(queue.pop(), (None, None))
+        queue.on_bytes_written(size + 14)
+        self.assertEqual(queue.in_flight_bytes, 0)
+        self.assertIsNotNone(queue.pop()[0])
+
+
+# ############################################################################
+# ####### Stand-alone run ########
+# ################################
+if __name__ == "__main__":
+    unittest.main()
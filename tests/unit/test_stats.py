@@ -0,0 +1,63 @@
+#! python3  # noqa E265
+
+"""
+Usage from the repo root folder:
+
+.. code-block:: bash
+    # for whole tests
+    python -m unittest tests.unit.test_stats
+    # for specific test
+    python -m unittest tests.unit.test_stats.TestRollingStats.test_rolling_window
+"""
+
+# standard library
+import unittest
+
+# project
+from qchat.logic.qchat_stats import RollingStats
+
+# ############################################################################
+# ########## Classes #############
+# ################################
+
+
+class TestRollingStats(unittest.TestCase):
+    """Test rolling statistics"""
+
+    def test_empty(self):
+        """Test statistics without any value."""
+        stats = RollingStats()
+        self.assertIsNone(stats.last)
+        self.assertIsNone(stats.mean)
+        self.assertIsNone(stats.p95)
+        self.assertEqual(stats.summary(), "n/a")
+
+    def test_statistics(self):
+        """Test last, mean, max and percentiles."""
+        stats = RollingStats()
+        for value in range(1, 101):
+            stats.add(value)
+        self.assertEqual(stats.last, 100)
+        self.assertEqual(stats.mean, 50.5)
+        self.assertEqual(stats.max, 100)
+        self.assertEqual(stats.p95, 95)
+        self.assertEqual(stats.percentile(50), 50)
+        self.assertEqual(stats.percentile(0), 1)
+
+    def test_rolling_window(self):
+        """Test that only the last values are kept."""
+        stats = RollingStats(maxlen=3)
+        for value in (10, 1, 2, 3):
+            stats.add(value)
+        self.assertEqual(stats.max, 3)
+        self.assertEqual(stats.count, 4)
+        stats.reset()
+        self.assertEqual(stats.count, 0)
+        self.assertIsNone(stats.last)
+
+
+# ############################################################################
+# ####### Stand-alone run ########
+# ################################
+if __name__ == "__main__":
+    unittest.main()
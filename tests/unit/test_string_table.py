@@ -0,0 +1,75 @@
+#! python3  # noqa E265
+
+"""
+Usage from the repo root folder:
+
+.. code-block:: bash
+    # for whole tests
+    python -m unittest tests.unit.test_string_table
+    # for specific test
+    python -m unittest tests.unit.test_string_table.TestStringTable.test_shared
+"""
+
+# standard library
+import unittest
+
+# project
+from qchat.constants import QCHAT_MESSAGE_TYPE_TEXT
+from qchat.logic import qchat_json
+from qchat.logic.qchat_message_registry import default_message_registry
+from qchat.logic.qchat_string_table import QChatStringTable
+
+# ############################################################################
+# ########## Classes #############
+# ################################
+
+
+class TestStringTable(unittest.TestCase):
+    """Test the table of shared strings."""
+
+    def test_shared(self):
+        """Equal strings built separately share a single instance."""
+        table = QChatStringTable()
+        first = table.intern("".join(["Isi", "dore"]))
+        second = table.intern("".join(["Isid", "ore"]))
+        self.assertIs(first, second)
+        self.assertEqual(len(table), 1)
+        self.assertEqual(table.hits, 1)
+
+    def test_bounded(self):
+        """New strings are returned as is once the table is full, or if too long."""
+        table = QChatStringTable(max_strings=2, max_length=8)
+        for value in ("a", "b", "c"):
+            table.intern(value)
+        self.assertEqual(len(table), 2)
+        self.assertNotIn("c", table.strings)
+        self.assertEqual(table.intern("a" * 9), "a" * 9)
+        self.assertEqual(len(table), 2)
+
+    def test_decoded_messages_share_metadata(self):
+        """Messages decoded from different frames share their author and avatar."""
+        table = QChatStringTable()
+        registry = default_message_registry()
+        messages = []
+        for text in ("hello", "world"):
+            wire = qchat_json.loads(
+                qchat_json.dumps(
+                    {
+                        "type": QCHAT_MESSAGE_TYPE_TEXT,
+                        "author": "Isidore",
+                        "avatar": "mGeoPackage.svg",
+                        "text": text,
+                    }
+                )
+            )
+            messages.append(registry.decode(table.intern_fields(wire)))
+        self.assertIs(messages[0].author, messages[1].author)
+        self.assertIs(messages[0].avatar, messages[1].avatar)
+        self.assertEqual(len(table), 2)
+
+
+# ############################################################################
+# ####### Stand-alone run ########
+# ################################
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+#! python3  # noqa E265
+
+"""
+Usage from the repo root folder:
+
+.. code-block:: bash
+    # for whole tests
+    python -m unittest tests.unit.test_validation
+    # for specific test
+    python -m unittest tests.unit.test_validation.TestValidation.test_split_text
+"""
+
+# standard library
+import unittest
+
+# project
+from qchat.constants import (
+    QCHAT_MESSAGE_TYPE_GEOJSON,
+    QCHAT_MESSAGE_TYPE_IMAGE,
+    QCHAT_MESSAGE_TYPE_LIKE,
+    QCHAT_MESSAGE_TYPE_TEXT,
+)
+from qchat.logic.qchat_messages import (
+    QChatGeojsonMessage,
+    QChatImageMessage,
+    QChatLikeMessage,
+    QChatTextMessage,
+)
+from qchat.logic.qchat_validation import (
+    QChatMessageValidator,
+    QChatRules,
+    QChatValidationError,
+    estimate_payload_size,
+    split_text,
+)
+
+# ############################################################################
+# ########## Classes #############
+# ################################
+
+
+def text_message(text: str, author: str = "jdoe") -> QChatTextMessage:
+    return QChatTextMessage(
+        type=QCHAT_MESSAGE_TYPE_TEXT, author=author, avatar=None, text=text
+    )
+
+
+def image_message(size: int) -> QChatImageMessage:
+    return QChatImageMessage(
+        type=QCHAT_MESSAGE_TYPE_IMAGE,
+        author="jdoe",
+        avatar=None,
+        image_data=b"\0" * size,
+    )
+
+
+class TestValidation(unittest.TestCase):
+    def test_rules_from_dict(self):
+        """Missing or invalid rules keep their default."""
+        rules = QChatRules.from_dict(
+            {
+                "min_author_length": 2,
+                "max_message_length": 255,
+                "max_geojson_features": "many",
+                "rules": "Be nice",
+            }
+        )
+        self.assertEqual(rules.min_author_length, 2)
+        self.assertEqual(rules.max_author_length, QChatRules().max_author_length)
+        self.assertEqual(rules.max_message_length, 255)
+        self.assertEqual(rules.max_geojson_features, 0)
+
+    def test_split_text(self):
+        """Texts are split at whitespaces, or anywhere if there is none."""
+        self.assertEqual(split_text("hello world", 20), ["hello world"])
+        self.assertEqual(split_text("hello big world", 10), ["hello big", "world"])
+        self.assertEqual(split_text("abcdefghij", 4), ["abcd", "efgh", "ij"])
+        for part in split_text("lorem ipsum dolor sit amet " * 50, 30):
+            self.assertLessEqual(len(part), 30)
+
+    def test_author(self):
+        """Nicknames out of the rules bounds are rejected."""
+        validator = QChatMessageValidator(QChatRules(3, 5))
+        validator.check_author("jdoe")
+        for author in ("jd", "jdoe42"):
+            with self.assertRaises(QChatValidationError):
+                validator.validate(text_message("hello", author=author))
+        self.assertEqual(validator.rejected_total, 2)
+
+    def test_long_text_split(self):
+        """Texts longer than the maximum message length are split."""
+        validator = QChatMessageValidator(QChatRules(max_message_length=10))
+        parts = validator.validate(text_message("hello big world"))
+        self.assertEqual([part.text for part in parts], ["hello big", "world"])
+        self.assertEqual(validator.split_total, 1)
+        with self.assertRaises(QChatValidationError):
+            validator.validate(text_message("  "))
+
+    def test_messages_without_author(self):
+        """Messages without author and text are left as is."""
+        message = QChatLikeMessage(
+            type=QCHAT_MESSAGE_TYPE_LIKE,
+            liker_author="jdoe",
+            liked_author="other",
+            message="hello",
+        )
+        self.assertEqual(QChatMessageValidator().validate(message), [message])
+
+    def test_geojson_features(self):
+        """Layers with too many features are rejected without parsing them."""
+        message = QChatGeojsonMessage(
+            type=QCHAT_MESSAGE_TYPE_GEOJSON,
+            author="jdoe",
+            avatar=None,
+            layer_name="points",
+            crs_wkt="",
+            crs_authid="EPSG:4326",
+            geojson="not parsed",
+            style=None,
+            nb_features=1000,
+        )
+        validator = QChatMessageValidator(QChatRules(max_geojson_features=500))
+        with self.assertRaises(QChatValidationError):
+            validator.validate(message)
+
+    def test_payload_size(self):
+        """Payloads larger than the instance limit are rejected."""
+        message = image_message(30_000)
+        self.assertGreater(estimate_payload_size(message), 40_000)
+        self.assertLess(estimate_payload_size(message, binary=True), 31_000)
+        validator = QChatMessageValidator(QChatRules(max_payload_size=35_000))
+        self.assertEqual(validator.validate(message, binary=True), [message])
+        with self.assertRaises(QChatValidationError):
+            validator.validate(message)
+
+
+# ############################################################################
+# ####### Stand-alone run ########
+# ################################
+if __name__ == "__main__":
+    unittest.main()